@@ -1,12 +1,55 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app
 from src.config import get_settings
 from src.config.constants import API_DESCRIPTION
+from src.core.executor import inference_executor
+from src.core.registry import model_registry, model_watcher
+from src.db.database import get_async_engine
+from src.db.write_behind import write_behind
+from src.monitoring.drift_scheduler import drift_scheduler
+from src.monitoring.logs import configure_logging
+from src.monitoring.metrics import STARTUP_TIME, metrics_registry, process_uptime
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the model, start background workers and drain them on shutdown"""
+    app.state.startup_time = None
+    # Load the model off the event loop and run a few predictions before taking traffic
+    await model_registry.start()
+    await inference_executor.start()
+    if settings.ENABLE_WRITE_BEHIND:
+        await write_behind.start()
+    if settings.DRIFT_MODE == "scheduled":
+        await drift_scheduler.start()
+    if settings.MODEL_WATCH:
+        await model_watcher.start()
+
+    # /ready passes from here on
+    app.state.startup_time = process_uptime()
+    STARTUP_TIME.set(app.state.startup_time)
+    logger.info(
+        "Ready in %.2fs with model %s", app.state.startup_time, model_registry.active.version,
+        extra={'startup_time': app.state.startup_time, 'model_version': model_registry.active.version}
+    )
+    try:
+        yield
+    finally:
+        await model_watcher.stop()
+        # Flush queued predictions before the process exits
+        await write_behind.stop()
+        await drift_scheduler.stop()
+        await inference_executor.shutdown()
+        # Async connections belong to this event loop, close them with it
+        await get_async_engine().dispose()
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application"""
@@ -18,6 +61,7 @@ def create_app() -> FastAPI:
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json",
+        lifespan=lifespan,
     )
 
     # Add CORS middleware(Cross-Origin Resource Sharing)
@@ -30,7 +74,7 @@ def create_app() -> FastAPI:
     )
 
     # Create metrics endpoint
-    metrics_app = make_asgi_app()
+    metrics_app = make_asgi_app(registry=metrics_registry())
     app.mount("/metrics", metrics_app)
 
     # Add exception handlers
@@ -49,8 +93,19 @@ def create_app() -> FastAPI:
         """Health check endpoint"""
         return {"status": "healthy"}
 
+    @app.get("/ready")
+    async def readiness_check():
+        """Readiness check: passes once the model is loaded and warmed up"""
+        if getattr(app.state, "startup_time", None) is None:
+            return JSONResponse(status_code=503, content={"status": "starting"})
+        return {
+            "status": "ready",
+            "model_version": model_registry.active.version,
+            "startup_time": app.state.startup_time,
+        }
+
     # Import and include API routes
-    from .routes import prediction, metrics_endpoint
+    from .routes import prediction, metrics_endpoint, admin, debug
     app.include_router(
         prediction.router,
         prefix=settings.API_V1_STR,
@@ -59,6 +114,12 @@ def create_app() -> FastAPI:
     app.include_router(
         metrics_endpoint.router,
     )
+    app.include_router(
+        admin.router,
+    )
+    app.include_router(
+        debug.router,
+    )
 
     return app
 
@@ -0,0 +1,288 @@
+"""Binary request and response bodies for the batch endpoint.
+
+Two formats, picked by Content-Type:
+
+application/vnd.fraud.matrix (little-endian):
+    16-byte prefix: magic, version, float size (4 or 8), reserved, row count, header length
+    header: UTF-8 JSON {"transaction_ids": [...], "amounts": [...], "timestamps": [...]}
+    padding to an 8-byte boundary
+    row count x 28 floats: V1-V28 row by row
+
+  The response uses the same prefix (magic FDPR, float size 8) and a JSON header
+  with transaction_ids, timestamps, conflicts, processing_time and
+  total_processing_time, followed by float64 probabilities and uint8 is_fraud
+  flags for the stored rows.
+
+application/vnd.apache.arrow.stream (needs pyarrow):
+    one table with transaction_id (string), amount (float64), timestamp
+    (string or timestamp; zoned timestamps are read as local wall-clock time,
+    like JSON timestamps with an offset) and features
+    (fixed_size_list<float32|float64>[28])
+  The response is a table with transaction_id, fraud_probability, is_fraud and
+  timestamp, with conflicts and total_processing_time in the schema metadata.
+
+V features are read straight out of the request body without copying.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
+import json
+import struct
+import numpy as np
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from src.config.constants import V_FEATURE_NAMES
+
+MATRIX_MEDIA_TYPE = "application/vnd.fraud.matrix"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+MATRIX_REQUEST_MAGIC = b"FDMX"
+MATRIX_RESPONSE_MAGIC = b"FDPR"
+MATRIX_VERSION = 1
+# magic, version, float size, reserved, row count, header length
+_PREFIX = struct.Struct("<4sBBHII")
+_FLOAT_DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+N_V_FEATURES = len(V_FEATURE_NAMES)
+
+
+class ColumnarBatch:
+    """Batch request columns decoded from a binary body"""
+
+    def __init__(self, transaction_ids: List[str], amounts: np.ndarray, timestamps: Any, v_features: np.ndarray):
+        if not len(transaction_ids) == len(amounts) == len(timestamps) == len(v_features):
+            raise ValueError("Columns have different lengths")
+        self.transaction_ids = transaction_ids
+        self.amounts = amounts
+        self.timestamps = timestamps
+        self.v_features = v_features
+
+    def __len__(self) -> int:
+        return len(self.transaction_ids)
+
+
+def _pyarrow():
+    """pyarrow, imported on first use; Arrow bodies are only accepted when it is installed"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ValueError("Arrow bodies need pyarrow installed on the server")
+    return pyarrow
+
+
+def _transaction_ids(values: List[Any]) -> List[str]:
+    """The transaction ids of a binary body, held to the same rule as JSON bodies"""
+    for value in values:
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"transaction_id must be a non-empty string, got {value!r}")
+    return values
+
+
+def _pad(length: int) -> int:
+    """Bytes needed after `length` to reach an 8-byte boundary"""
+    return -length % 8
+
+
+def encode_matrix_request(
+    transaction_ids: List[str],
+    amounts: List[float],
+    timestamps: List[str],
+    v_features: np.ndarray,
+    float_size: int = 4
+) -> bytes:
+    """Binary matrix body for a batch request (for clients and tests)"""
+    header = json.dumps({
+        "transaction_ids": transaction_ids, "amounts": amounts, "timestamps": timestamps
+    }).encode()
+    matrix = np.ascontiguousarray(v_features, dtype=_FLOAT_DTYPES[float_size])
+    prefix = _PREFIX.pack(MATRIX_REQUEST_MAGIC, MATRIX_VERSION, float_size, 0, len(matrix), len(header))
+    return prefix + header + b" " * _pad(_PREFIX.size + len(header)) + matrix.tobytes()
+
+
+def decode_matrix_request(body: bytes) -> ColumnarBatch:
+    """Columns of a binary matrix request; V features are a view into `body`"""
+    if len(body) < _PREFIX.size:
+        raise ValueError("Body is shorter than the matrix prefix")
+    magic, version, float_size, _, n_rows, header_length = _PREFIX.unpack_from(body)
+    if magic != MATRIX_REQUEST_MAGIC or version != MATRIX_VERSION:
+        raise ValueError("Not a version 1 fraud matrix body")
+    if float_size not in _FLOAT_DTYPES:
+        raise ValueError(f"Unsupported float size: {float_size}")
+
+    header_end = _PREFIX.size + header_length
+    matrix_start = header_end + _pad(header_end)
+    expected_length = matrix_start + n_rows * N_V_FEATURES * float_size
+    if len(body) != expected_length:
+        raise ValueError(f"Expected {expected_length} bytes for {n_rows} rows, got {len(body)}")
+
+    header = json.loads(bytes(memoryview(body)[_PREFIX.size:header_end]))
+    v_features = np.frombuffer(
+        body, dtype=_FLOAT_DTYPES[float_size], count=n_rows * N_V_FEATURES, offset=matrix_start
+    ).reshape(n_rows, N_V_FEATURES)
+    return ColumnarBatch(
+        transaction_ids=_transaction_ids(header["transaction_ids"]),
+        amounts=np.asarray(header["amounts"], dtype=np.float64),
+        timestamps=header["timestamps"],
+        v_features=v_features
+    )
+
+
+def encode_matrix_response(
+    transaction_ids: List[str],
+    probabilities: np.ndarray,
+    is_fraud: np.ndarray,
+    timestamps: List[datetime],
+    conflicts: List[str],
+    processing_time: float,
+    total_processing_time: float
+) -> bytes:
+    """Binary matrix body for a batch response"""
+    header = json.dumps({
+        "transaction_ids": transaction_ids,
+        "timestamps": [timestamp.isoformat() for timestamp in timestamps],
+        "conflicts": conflicts,
+        "processing_time": processing_time,
+        "total_processing_time": total_processing_time,
+    }).encode()
+    prefix = _PREFIX.pack(MATRIX_RESPONSE_MAGIC, MATRIX_VERSION, 8, 0, len(transaction_ids), len(header))
+    return b"".join([
+        prefix,
+        header,
+        b" " * _pad(_PREFIX.size + len(header)),
+        np.ascontiguousarray(probabilities, dtype="<f8").tobytes(),
+        np.ascontiguousarray(is_fraud, dtype=np.uint8).tobytes(),
+    ])
+
+
+def decode_matrix_response(body: bytes) -> Dict[str, Any]:
+    """Fields of a binary matrix response (for clients and tests)"""
+    magic, version, _, _, n_rows, header_length = _PREFIX.unpack_from(body)
+    if magic != MATRIX_RESPONSE_MAGIC or version != MATRIX_VERSION:
+        raise ValueError("Not a version 1 fraud matrix response")
+    header_end = _PREFIX.size + header_length
+    data_start = header_end + _pad(header_end)
+    result = json.loads(body[_PREFIX.size:header_end])
+    result["fraud_probability"] = np.frombuffer(body, dtype="<f8", count=n_rows, offset=data_start)
+    result["is_fraud"] = np.frombuffer(body, dtype=np.uint8, count=n_rows, offset=data_start + 8 * n_rows).astype(bool)
+    return result
+
+
+def decode_arrow_request(body: bytes) -> ColumnarBatch:
+    """Columns of an Arrow IPC stream request; V features are a view into `body`"""
+    pa = _pyarrow()
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all().combine_chunks()
+    features = table.column("features").chunk(0) if table.num_rows else None
+    if features is None:
+        v_features = np.empty((0, N_V_FEATURES))
+    else:
+        if not pa.types.is_fixed_size_list(features.type) or features.type.list_size != N_V_FEATURES:
+            raise ValueError(f"features must be a fixed_size_list of {N_V_FEATURES} floats")
+        if features.null_count or features.flatten().null_count:
+            raise ValueError("features must not contain nulls")
+        v_features = features.flatten().to_numpy(zero_copy_only=True).reshape(-1, N_V_FEATURES)
+
+    timestamps = table.column("timestamp")
+    if pa.types.is_timestamp(timestamps.type):
+        if timestamps.type.tz is not None:
+            import pyarrow.compute as pc
+            # day_part uses the local wall-clock hour, as for JSON timestamps with an offset
+            timestamps = pc.local_timestamp(timestamps)
+        timestamps = timestamps.to_numpy()  # datetime64
+    else:
+        timestamps = timestamps.to_pylist()
+    return ColumnarBatch(
+        transaction_ids=_transaction_ids(table.column("transaction_id").to_pylist()),
+        amounts=table.column("amount").to_numpy(),
+        timestamps=timestamps,
+        v_features=v_features
+    )
+
+
+def encode_arrow_response(
+    transaction_ids: List[str],
+    probabilities: np.ndarray,
+    is_fraud: np.ndarray,
+    timestamps: List[datetime],
+    conflicts: List[str],
+    processing_time: float,
+    total_processing_time: float
+) -> bytes:
+    """Arrow IPC stream body for a batch response"""
+    pa = _pyarrow()
+    table = pa.table(
+        {
+            "transaction_id": pa.array(transaction_ids, type=pa.string()),
+            "fraud_probability": pa.array(np.asarray(probabilities, dtype=np.float64)),
+            "is_fraud": pa.array(np.asarray(is_fraud, dtype=bool)),
+            "timestamp": pa.array(timestamps, type=pa.timestamp("us", tz="UTC")),
+        },
+        metadata={
+            "conflicts": json.dumps(conflicts),
+            "processing_time": str(processing_time),
+            "total_processing_time": str(total_processing_time),
+        }
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# Decoder and encoder for each binary media type
+CODECS: Dict[str, tuple] = {
+    MATRIX_MEDIA_TYPE: (decode_matrix_request, encode_matrix_response),
+    ARROW_MEDIA_TYPE: (decode_arrow_request, encode_arrow_response),
+}
+
+# OpenAPI request body entries for the binary formats
+BINARY_REQUEST_BODIES = {
+    "requestBody": {
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in CODECS
+        }
+    }
+}
+
+ColumnarHandler = Callable[[Request, ColumnarBatch, Callable[..., bytes], str], Awaitable[Response]]
+
+
+def accepts_columnar(handler: ColumnarHandler):
+    """Let a JSON endpoint also take binary bodies, which go to `handler` instead.
+
+    Only works on routers using ColumnarRoute.
+    """
+    def decorate(endpoint):
+        endpoint.columnar_handler = handler
+        return endpoint
+    return decorate
+
+
+class ColumnarRoute(APIRoute):
+    """APIRoute that sends binary request bodies to the endpoint's columnar handler.
+
+    JSON requests take the normal FastAPI path, so validation and the OpenAPI
+    schema of the JSON body are unchanged.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        json_handler = super().get_route_handler()
+        columnar_handler: Optional[ColumnarHandler] = getattr(self.endpoint, "columnar_handler", None)
+        if columnar_handler is None:
+            return json_handler
+
+        async def route_handler(request: Request) -> Response:
+            media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if media_type not in CODECS:
+                return await json_handler(request)
+            decode, encode = CODECS[media_type]
+            try:
+                batch = decode(await request.body())
+            except (ValueError, KeyError, TypeError, struct.error) as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid {media_type} body: {str(e)}"
+                )
+            return await columnar_handler(request, batch, encode, media_type)
+
+        return route_handler
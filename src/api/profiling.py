@@ -0,0 +1,39 @@
+"""Request profiling for routes, switched on for a while with profile_requests().
+
+ProfiledRoute handlers check for an active RequestProfiler and, while there
+is one, pass their requests through it. While nobody is profiling, that
+check is all they add.
+"""
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from src.monitoring.profiler import RequestProfiler
+
+# Profiler the ProfiledRoutes in this process send their requests through, if any
+_profiler: Optional[RequestProfiler] = None
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose requests can be profiled with profile_requests()"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            if _profiler is None:
+                return await handler(request)
+            return await _profiler.run(handler, request)
+
+        return profiled_handler
+
+
+@contextmanager
+def profile_requests(profiler: RequestProfiler) -> Iterator[RequestProfiler]:
+    """Profile requests to ProfiledRoutes until the block exits"""
+    global _profiler
+    _profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = None
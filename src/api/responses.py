@@ -0,0 +1,90 @@
+"""Fast JSON bodies for the prediction routes.
+
+Bodies are built as plain dicts and lists straight from the stored rows and
+the NumPy prediction arrays, then serialized in one call by orjson, or by
+pydantic-core when orjson is not installed. That skips building a
+TransactionResponse per row and FastAPI's response-model pass.
+
+The output matches what the pydantic response models would produce, so the
+routes keep their response_model and the OpenAPI schema stays the same.
+"""
+from typing import Any, Dict, List, Sequence
+from datetime import datetime
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # pydantic-core serializes the same bodies, a little slower
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize dicts, lists, datetimes and NumPy values to JSON bytes"""
+    if orjson is not None:
+        # OPT_UTC_Z writes UTC as 'Z', like pydantic does
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() instead of json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def prediction_body(
+    transaction_id: str,
+    fraud_probability: float,
+    is_fraud: bool,
+    processing_time: float,
+    timestamp: datetime
+) -> Dict[str, Any]:
+    """Body of a TransactionResponse"""
+    # Stored rows hold Numeric columns as Decimal, which the response model turns into floats
+    return {
+        'transaction_id': transaction_id,
+        'fraud_probability': float(fraud_probability),
+        'is_fraud': bool(is_fraud),
+        'processing_time': float(processing_time),
+        'timestamp': timestamp,
+    }
+
+
+def stored_predictions_body(predictions: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Bodies of TransactionResponses for stored Prediction rows"""
+    return [
+        prediction_body(p.transaction_id, p.fraud_probability, p.is_fraud, p.processing_time, p.created_at)
+        for p in predictions
+    ]
+
+
+def batch_body(
+    transaction_ids: Sequence[str],
+    probabilities: np.ndarray,
+    is_fraud: Sequence[bool],
+    timestamps: Sequence[datetime],
+    processing_time: float,
+    conflicts: List[str],
+    total_processing_time: float,
+    timestamp: datetime
+) -> Dict[str, Any]:
+    """Body of a BatchPredictionResponse, from columns of the stored rows"""
+    return {
+        'results': [
+            {
+                'transaction_id': transaction_id,
+                'fraud_probability': probability,
+                'is_fraud': flag,
+                'processing_time': processing_time,
+                'timestamp': created_at,
+            }
+            for transaction_id, probability, flag, created_at
+            in zip(transaction_ids, np.asarray(probabilities, dtype=np.float64).tolist(), is_fraud, timestamps)
+        ],
+        'conflicts': conflicts,
+        'total_processing_time': total_processing_time,
+        'timestamp': timestamp,
+    }
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from pydantic import BaseModel
+from typing import Optional
+import secrets
+import time
+from src.config import get_settings
+from src.core.registry import model_registry
+
+settings = get_settings()
+
+
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """Check the ADMIN_TOKEN bearer token; admin endpoints are off without one"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them"
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+class ModelReloadRequest(BaseModel):
+    """Model version to load"""
+    version: Optional[str] = None  # Directory under MODEL_REGISTRY_DIR; None reloads the configured files
+
+
+class ModelVersionResponse(BaseModel):
+    """Model version serving predictions"""
+    version: str
+    previous_version: Optional[str] = None
+    reload_time: Optional[float] = None  # in seconds
+
+
+@router.get(
+    "/model",
+    response_model=ModelVersionResponse,
+    description="Get the model version serving predictions"
+)
+async def get_model_version() -> ModelVersionResponse:
+    return ModelVersionResponse(version=model_registry.active.version)
+
+
+@router.post(
+    "/model/reload",
+    response_model=ModelVersionResponse,
+    description=(
+        "Load a model version in the background, warm it up and swap it in. "
+        "Requests in flight finish on the previous version."
+    )
+)
+async def reload_model(request: Optional[ModelReloadRequest] = None) -> ModelVersionResponse:
+    start = time.perf_counter()
+    try:
+        model, previous = await model_registry.reload(request.version if request else None)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Model reload failed, still serving {model_registry.active.version}: {str(e)}"
+        )
+    return ModelVersionResponse(
+        version=model.version,
+        previous_version=previous.version,
+        reload_time=time.perf_counter() - start
+    )
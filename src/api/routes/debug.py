@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+import asyncio
+from src.api import profiling
+from src.api.routes.admin import require_admin
+from src.config import get_settings
+from src.monitoring.profiler import RequestProfiler, StackSampler
+
+settings = get_settings()
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+# One profile at a time per worker
+_profiling = asyncio.Lock()
+
+
+def _check_idle() -> None:
+    if _profiling.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    description=(
+        "Sample the stacks of every thread in this worker for `seconds` and return them "
+        "as collapsed stacks, ready for flamegraph.pl or speedscope."
+    )
+)
+async def profile_stacks(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    interval: float = Query(0.005, ge=0.001, le=1.0, description="Seconds between samples")
+) -> PlainTextResponse:
+    _check_idle()
+    async with _profiling:
+        sampler = StackSampler(interval=interval)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+    return PlainTextResponse(sampler.collapsed())
+
+
+@router.get(
+    "/profile/requests",
+    response_class=PlainTextResponse,
+    description=(
+        "Profile a fraction of the prediction requests this worker serves in the next "
+        "`seconds` with cProfile and return the aggregated statistics."
+    )
+)
+async def profile_requests(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    fraction: float = Query(settings.PROFILE_REQUEST_FRACTION, gt=0, le=1),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    limit: int = Query(50, ge=1, le=1000, description="Functions listed")
+) -> PlainTextResponse:
+    _check_idle()
+    async with _profiling:
+        with profiling.profile_requests(RequestProfiler(fraction)) as profiler:
+            await asyncio.sleep(seconds)
+    return PlainTextResponse(profiler.report(sort, limit))
@@ -1,14 +1,16 @@
 from fastapi import APIRouter
 from fastapi.responses import Response
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest, REGISTRY
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from src.monitoring.metrics import metrics_registry
 
 router = APIRouter()
+registry = metrics_registry()
 
 @router.get("/metrics")
 async def metrics():
     """Endpoint to expose metrics for Prometheus"""
     return Response(
-        generate_latest(REGISTRY),
+        generate_latest(registry),
         media_type=CONTENT_TYPE_LATEST
     )
 
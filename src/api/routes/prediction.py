@@ -1,4 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from src.api.profiling import ProfiledRoute
+from src.api.columnar import BINARY_REQUEST_BODIES, ColumnarBatch, ColumnarRoute, accepts_columnar
+from src.api.responses import (
+    FastJSONResponse,
+    batch_body,
+    dumps,
+    prediction_body,
+    stored_predictions_body,
+)
+from src.api.streaming import NDJSONStreamResponse, iter_lines
+from src.api.timing import TimedRoute, current_timer
 from src.api.schemas import (
     TransactionRequest,
     TransactionResponse,
@@ -9,14 +22,45 @@ from src.monitoring.metrics import (
     track_prediction,
     track_request,
 )
-from src.core.model import model_manager
+from src.config import get_settings
+from src.config.constants import V_FEATURE_NAMES
+from src.core.registry import model_registry
+from src.core.batching import coalescer
+from src.core.executor import inference_executor
 from src.core.preprocessing import preprocessor
-from src.db.crud import PredictionCRUD
+from src.db.crud import AsyncPredictionCRUD
+from src.db.cache import prediction_cache
+from src.db.database import get_async_sessionmaker
+from src.db.models import Prediction
+from src.db.write_behind import write_behind
 from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import time
 
+settings = get_settings()
+
+# Status recorded for streams the client abandoned, after nginx's "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+
+class PredictionRoute(ProfiledRoute, TimedRoute, ColumnarRoute):
+    """Profiling on request and stage timing on top of the binary batch bodies"""
+
+
 # Create router with prefix
-router = APIRouter(prefix="/transactions", tags=["predictions"])
+router = APIRouter(prefix="/transactions", tags=["predictions"], route_class=PredictionRoute)
+
+
+async def _store_predictions(
+    records: List[Dict[str, Any]],
+    crud: AsyncPredictionCRUD
+) -> Tuple[List[Prediction], List[str]]:
+    """Store prediction records in one go; duplicates come back as conflicts"""
+    if settings.ENABLE_WRITE_BEHIND:
+        return await write_behind.enqueue_many(records)
+    created, conflicts = await crud.create_predictions_bulk(records)
+    prediction_cache.put_many(created)
+    return created, conflicts
 
 
 # Create prediction
@@ -28,46 +72,57 @@ router = APIRouter(prefix="/transactions", tags=["predictions"])
 )
 async def create_prediction(
     transaction: TransactionRequest,
-    crud: PredictionCRUD = Depends()
+    crud: AsyncPredictionCRUD = Depends()
 ) -> TransactionResponse:
     """Create a new fraud prediction for a transaction."""
     request_start_time = time.time()
+    timer = current_timer()
+    timer.lap('parse')
     try:
+        # Score the whole request with one model version, even if a reload happens meanwhile
+        model = model_registry.active
+
         # Convert transaction to model features (Preprocessing)
-        features_dict = transaction.model_dump() 
-        print("Features extracted: ", features_dict)  # Debug
-        features = preprocessor.preprocess_transaction(features_dict)
+        features = preprocessor.preprocess_request(transaction, model)
+        timer.lap('preprocess')
 
         # Get prediction
         predict_start = time.time()
-        probability = model_manager.predict(feature=features)
+        if settings.ENABLE_REQUEST_COALESCING:
+            probability = await coalescer.predict(features, model)
+        else:
+            probability = await inference_executor.predict(features, model)
         prediction_time = time.time() - predict_start
 
-        is_fraud = model_manager.is_fraud(probability)
+        is_fraud = model.is_fraud(probability)
+        # Scoring only: the database write is timed as its own stage
+        processing_time = time.time() - predict_start
+        timer.lap('inference')
 
         # Store prediction
-        prediction = crud.create_prediction(
+        record = dict(
             transaction_id=transaction.transaction_id,
             amount=transaction.amount,
             fraud_probability=probability,
             is_fraud=bool(is_fraud),
-            processing_time=time.time() - predict_start
+            processing_time=processing_time,
+            model_version=model.version
         )
+        if settings.ENABLE_WRITE_BEHIND:
+            prediction = await write_behind.enqueue(**record)
+        else:
+            prediction = await crud.create_prediction(**record)
+            prediction_cache.put(prediction)
+        timer.lap('persist')
 
-        response = TransactionResponse(
-            transaction_id=transaction.transaction_id,
-            fraud_probability=probability,
-            is_fraud=bool(is_fraud),
-            processing_time=time.time() - predict_start,
-            timestamp=prediction.created_at
-        )
         # track prediction metrics including drift
         track_prediction(
             fraud_probability=probability,
             is_fraud=bool(is_fraud),
-            features=features_dict['features'],  # V1-V28 features
+            features=transaction.features_dict(),  # V1-V28 features
             prediction_time=prediction_time,
-            amount=transaction.amount
+            amount=transaction.amount,
+            model_version=model.version
         )
 
         # Track successful report
@@ -76,9 +131,29 @@ async def create_prediction(
             response_time = time.time() - request_start_time,
             endpoint='create_prediction'
         )
+        timer.lap('metrics')
 
-        return response
+        body = prediction_body(
+            transaction_id=transaction.transaction_id,
+            fraud_probability=probability,
+            is_fraud=bool(is_fraud),
+            processing_time=processing_time,
+            timestamp=prediction.created_at
+        )
+        if settings.ENABLE_FAST_JSON:
+            return FastJSONResponse(body, status_code=status.HTTP_201_CREATED)
+        return TransactionResponse(**body)
     
+    except TimeoutError as e:
+        track_request(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            response_time=time.time() - request_start_time,
+            endpoint='create_prediction'
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except ValueError as e:
         track_request(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -109,47 +184,198 @@ async def create_prediction(
 )
 async def get_prediction(
     transaction_id: str,
-    crud: PredictionCRUD = Depends()
+    crud: AsyncPredictionCRUD = Depends()
 ) -> TransactionResponse:
     """Retrieve prediction result for a specific transaction."""
-    prediction = crud.get_prediction(transaction_id)
-    if not prediction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Transaction {transaction_id} not found"
+    cached = prediction_cache.get(transaction_id)
+    if cached is not None:
+        body = prediction_body(
+            transaction_id=cached['transaction_id'],
+            fraud_probability=cached['fraud_probability'],
+            is_fraud=cached['is_fraud'],
+            processing_time=cached['processing_time'],
+            timestamp=cached['created_at']
         )
-    
-    return TransactionResponse(
-        transaction_id=prediction.transaction_id,
-        fraud_probability=prediction.fraud_probability,
-        is_fraud=prediction.is_fraud,
-        processing_time=prediction.processing_time,
-        timestamp=prediction.created_at
-    )
+    else:
+        # Queued predictions are not in the database yet
+        prediction = write_behind.get_pending(transaction_id)
+        if prediction is None:
+            prediction = await crud.get_prediction(transaction_id)
+            if prediction is not None:
+                prediction_cache.put(prediction)
+        if not prediction:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Transaction {transaction_id} not found"
+            )
+        body = stored_predictions_body([prediction])[0]
+
+    if settings.ENABLE_FAST_JSON:
+        return FastJSONResponse(body)
+    return TransactionResponse(**body)
 
 
 # Get list of predictions
 @router.get(
     "",
     response_model=list[TransactionResponse],
-    description="List prediction results with pagination"
+    description=(
+        "List prediction results, newest first. Pass the X-Next-Cursor "
+        "response header back as `cursor` to get the next page."
+    )
 )
 async def list_predictions(
-    skip: int = 0,
-    limit: int = 10,
-    crud: PredictionCRUD = Depends()
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    is_fraud: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    skip: Optional[int] = Query(None, deprecated=True, description="Replaced by `cursor`; rejected"),
+    crud: AsyncPredictionCRUD = Depends()
 ) -> list[TransactionResponse]:
-    """List prediction results with pagination."""
-    predictions = crud.list_predictions(skip=skip, limit=limit)
-    return [
-        TransactionResponse(
-            transaction_id=p.transaction_id,
-            fraud_probability=p.fraud_probability,
-            is_fraud=p.is_fraud,
-            processing_time=p.processing_time,
-            timestamp=p.created_at
-        ) for p in predictions
-    ]
+    """List prediction results with cursor pagination and filters."""
+    if skip is not None:
+        # Ignoring it would return the first page forever to clients still paging by offset
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="skip is no longer supported; pass the X-Next-Cursor header of the previous page as cursor"
+        )
+    try:
+        predictions, next_cursor = await crud.list_predictions_page(
+            limit=limit,
+            cursor=cursor,
+            is_fraud=is_fraud,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start_time=start_time,
+            end_time=end_time
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    body = stored_predictions_body(predictions)
+    if settings.ENABLE_FAST_JSON:
+        return FastJSONResponse(body, headers=headers)
+    if headers:
+        response.headers.update(headers)
+    return [TransactionResponse(**p) for p in body]
+
+
+async def create_batch_predictions_columnar(
+    request: Request,
+    batch: ColumnarBatch,
+    encode: Callable[..., bytes],
+    media_type: str
+) -> Response:
+    """Batch predictions for a binary body, answered in the same format."""
+    request_start_time = time.time()
+    timer = current_timer()
+    try:
+        if not 1 <= len(batch) <= settings.BATCH_SIZE:
+            raise ValueError(f"A batch must hold between 1 and {settings.BATCH_SIZE} transactions")
+        if not (batch.amounts > 0).all():
+            raise ValueError("Transaction amounts must be greater than 0")
+        timer.lap('parse')
+
+        model = model_registry.active
+        features = preprocessor.preprocess_columns(batch.v_features, batch.amounts, batch.timestamps, model)
+        timer.lap('preprocess')
+
+        predict_start = time.time()
+        probabilities = await inference_executor.batch_predict(features, model)
+        prediction_time = time.time() - predict_start
+
+        is_fraud_flags = model.is_fraud(probabilities)
+        timer.lap('inference')
+        records = [
+            {
+                'transaction_id': transaction_id,
+                'amount': float(amount),
+                'fraud_probability': float(probability),
+                'is_fraud': bool(is_fraud),
+                'processing_time': prediction_time,
+                'model_version': model.version
+            }
+            for transaction_id, amount, probability, is_fraud
+            in zip(batch.transaction_ids, batch.amounts, probabilities, is_fraud_flags)
+        ]
+        async with get_async_sessionmaker()() as db:
+            created, conflicts = await _store_predictions(records, AsyncPredictionCRUD(db=db))
+        stored = {prediction.transaction_id: prediction for prediction in created}
+        timer.lap('persist')
+
+        rows, timestamps = [], []
+        for i, transaction_id in enumerate(batch.transaction_ids):
+            prediction = stored.pop(transaction_id, None)
+            if prediction is None:
+                continue
+            rows.append(i)
+            timestamps.append(prediction.created_at)
+            track_prediction(
+                fraud_probability=float(probabilities[i]),
+                is_fraud=bool(is_fraud_flags[i]),
+                features=dict(zip(V_FEATURE_NAMES, batch.v_features[i].tolist())),
+                prediction_time=prediction_time,
+                amount=float(batch.amounts[i]),
+                model_version=model.version
+            )
+        total_time = time.time() - request_start_time
+
+        track_request(
+            status_code=status.HTTP_201_CREATED,
+            response_time=total_time,
+            endpoint='create_batch_predictions'
+        )
+        timer.lap('metrics')
+        return Response(
+            content=encode(
+                transaction_ids=[batch.transaction_ids[i] for i in rows],
+                probabilities=probabilities[rows],
+                is_fraud=is_fraud_flags[rows],
+                timestamps=timestamps,
+                conflicts=conflicts,
+                processing_time=prediction_time,
+                total_processing_time=total_time
+            ),
+            status_code=status.HTTP_201_CREATED,
+            media_type=media_type
+        )
+    except TimeoutError as e:
+        track_request(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            response_time=time.time() - request_start_time,
+            endpoint='create_batch_predictions'
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        track_request(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            response_time=time.time() - request_start_time,
+            endpoint='create_batch_predictions'
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        track_request(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            response_time=time.time() - request_start_time,
+            endpoint='create_batch_predictions'
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch prediction failed: {str(e)}"
+        )
 
 
 # Batch prediction
@@ -157,49 +383,69 @@ async def list_predictions(
     "/batch",
     response_model=BatchPredictionResponse,
     status_code=status.HTTP_201_CREATED,
-    description="Submit multiple transactions for fraud detection"
+    description=(
+        "Submit multiple transactions for fraud detection. Besides JSON, the body can be "
+        "a binary V1-V28 matrix (application/vnd.fraud.matrix) or an Arrow IPC stream "
+        "(application/vnd.apache.arrow.stream); the response then uses the same format."
+    ),
+    openapi_extra=BINARY_REQUEST_BODIES
 )
+@accepts_columnar(create_batch_predictions_columnar)
 async def create_batch_predictions(
     request: BatchPredictionRequest,
-    crud: PredictionCRUD = Depends()
+    crud: AsyncPredictionCRUD = Depends()
 ) -> BatchPredictionResponse:
     """Create fraud predictions for multiple transactions."""
     request_start_time = time.time()
-    results = []
+    timer = current_timer()
+    timer.lap('parse')
     try:
+        model = model_registry.active
+
         # Convert transactions to model features 
-        transaction_data = [tx.model_dump() for tx in request.transactions]
-        features = preprocessor.preprocess_batch(transaction_data)
+        features = preprocessor.preprocess_requests(request.transactions, model)
+        timer.lap('preprocess')
 
         predict_start = time.time()
-        probabilities = model_manager.batch_predict(features=features)
+        probabilities = await inference_executor.batch_predict(features, model)
         prediction_time = time.time() - predict_start
 
-        for transaction, probability in zip(request.transactions, probabilities):
-            is_fraud = model_manager.is_fraud(probability)
-            crud.create_prediction(
-                transaction_id=transaction.transaction_id,
-                amount=transaction.amount,
-                fraud_probability=float(probability),
-                is_fraud=bool(is_fraud),
-                processing_time=prediction_time
-            )
+        is_fraud_flags = [bool(model.is_fraud(p)) for p in probabilities]
+        timer.lap('inference')
+
+        # Store the whole batch at once; duplicates come back as conflicts
+        records = [
+            {
+                'transaction_id': transaction.transaction_id,
+                'amount': transaction.amount,
+                'fraud_probability': float(probability),
+                'is_fraud': is_fraud,
+                'processing_time': prediction_time,
+                'model_version': model.version
+            }
+            for transaction, probability, is_fraud
+            in zip(request.transactions, probabilities, is_fraud_flags)
+        ]
+        created, conflicts = await _store_predictions(records, crud)
+        stored = {prediction.transaction_id: prediction for prediction in created}
+        timer.lap('persist')
+
+        rows, timestamps = [], []
+        for i, transaction in enumerate(request.transactions):
+            prediction = stored.pop(transaction.transaction_id, None)
+            if prediction is None:
+                continue
+            rows.append(i)
+            timestamps.append(prediction.created_at)
             # Track metrics for each prediction
             track_prediction(
-                fraud_probability=float(probability),
-                is_fraud=bool(is_fraud),
-                features=transaction.features,
+                fraud_probability=float(probabilities[i]),
+                is_fraud=is_fraud_flags[i],
+                features=transaction.features_dict(),
                 prediction_time=prediction_time,
-                amount=transaction.amount
+                amount=transaction.amount,
+                model_version=model.version
             )
-            # Add to results
-            results.append(TransactionResponse(
-                transaction_id=transaction.transaction_id,
-                fraud_probability=float(probability),
-                is_fraud=bool(is_fraud),
-                processing_time=prediction_time,
-                timestamp=datetime.now(timezone.utc)
-            ))
         total_time = time.time() - request_start_time
 
         # Track successful report
@@ -208,12 +454,31 @@ async def create_batch_predictions(
             response_time = total_time,
             endpoint='create_batch_predictions'
         )
+        timer.lap('metrics')
 
-        return BatchPredictionResponse(
-            results=results,
+        body = batch_body(
+            transaction_ids=[request.transactions[i].transaction_id for i in rows],
+            probabilities=probabilities[rows],
+            is_fraud=[is_fraud_flags[i] for i in rows],
+            timestamps=timestamps,
+            processing_time=prediction_time,
+            conflicts=conflicts,
             total_processing_time=total_time,
             timestamp=datetime.now(timezone.utc)
         )
+        if settings.ENABLE_FAST_JSON:
+            return FastJSONResponse(body, status_code=status.HTTP_201_CREATED)
+        return BatchPredictionResponse(**body)
+    except TimeoutError as e:
+        track_request(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            response_time=time.time() - request_start_time,
+            endpoint='create_batch_predictions'
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except ValueError as e:
         track_request(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -234,3 +499,135 @@ async def create_batch_predictions(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Batch prediction failed: {str(e)}"
         )
+
+
+def _stream_error(line: int, error: str, transaction_id: Optional[str] = None) -> dict:
+    """Output line for an input line that could not be scored or stored"""
+    result = {'line': line, 'error': error}
+    if transaction_id is not None:
+        result['transaction_id'] = transaction_id
+    return result
+
+
+def _validation_message(error: ValidationError) -> str:
+    """One-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc']) or 'line'}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def _score_stream_chunk(
+    chunk: list[tuple[int, TransactionRequest]],
+    outputs: dict[int, dict]
+) -> list[dict]:
+    """Score and store one chunk of streamed transactions.
+
+    `outputs` holds the errors already found in the chunk's lines. Returns
+    one output per input line, in line order.
+    """
+    if chunk:
+        model = model_registry.active
+        try:
+            features = preprocessor.preprocess_requests([transaction for _, transaction in chunk], model)
+            predict_start = time.time()
+            probabilities = await inference_executor.batch_predict(features, model)
+            prediction_time = time.time() - predict_start
+
+            is_fraud_flags = [bool(model.is_fraud(p)) for p in probabilities]
+            records = [
+                {
+                    'transaction_id': transaction.transaction_id,
+                    'amount': transaction.amount,
+                    'fraud_probability': float(probability),
+                    'is_fraud': is_fraud,
+                    'processing_time': prediction_time,
+                    'model_version': model.version
+                }
+                for (_, transaction), probability, is_fraud in zip(chunk, probabilities, is_fraud_flags)
+            ]
+            # The response outlives the request's dependencies, so use a session per chunk
+            async with get_async_sessionmaker()() as db:
+                created, _ = await _store_predictions(records, AsyncPredictionCRUD(db=db))
+        except Exception as e:
+            # Keep streaming: report the whole chunk as failed
+            for line, transaction in chunk:
+                outputs[line] = _stream_error(line, f"Prediction failed: {str(e)}", transaction.transaction_id)
+            return [outputs[line] for line in sorted(outputs)]
+
+        stored = {prediction.transaction_id: prediction for prediction in created}
+        for (line, transaction), probability, is_fraud in zip(chunk, probabilities, is_fraud_flags):
+            prediction = stored.pop(transaction.transaction_id, None)
+            if prediction is None:
+                outputs[line] = _stream_error(
+                    line, f"Transaction {transaction.transaction_id} already exists", transaction.transaction_id
+                )
+                continue
+            track_prediction(
+                fraud_probability=float(probability),
+                is_fraud=is_fraud,
+                features=transaction.features_dict(),
+                prediction_time=prediction_time,
+                amount=transaction.amount,
+                model_version=model.version
+            )
+            outputs[line] = {
+                'line': line,
+                **prediction_body(
+                    transaction_id=transaction.transaction_id,
+                    fraud_probability=float(probability),
+                    is_fraud=is_fraud,
+                    processing_time=prediction_time,
+                    timestamp=prediction.created_at
+                )
+            }
+
+    return [outputs[line] for line in sorted(outputs)]
+
+
+async def _stream_predictions(request: Request) -> AsyncIterator[bytes]:
+    """Read NDJSON transactions, score them in chunks and yield NDJSON results"""
+    request_start_time = time.time()
+    chunk, errors = [], {}
+    # Until the stream finishes, assume the client went away; that also covers
+    # the generator being closed or cancelled mid-stream
+    status_code = CLIENT_CLOSED_REQUEST
+    try:
+        async for line, raw in iter_lines(request.stream()):
+            try:
+                chunk.append((line, TransactionRequest.model_validate_json(raw)))
+            except ValidationError as e:
+                errors[line] = _stream_error(line, _validation_message(e))
+            if len(chunk) + len(errors) >= settings.BATCH_SIZE:
+                results = await _score_stream_chunk(chunk, errors)
+                chunk, errors = [], {}
+                yield b"".join(dumps(result) + b"\n" for result in results)
+        if chunk or errors:
+            results = await _score_stream_chunk(chunk, errors)
+            yield b"".join(dumps(result) + b"\n" for result in results)
+        status_code = status.HTTP_200_OK
+    except ClientDisconnect:
+        return
+    except Exception:
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        raise
+    finally:
+        track_request(
+            status_code=status_code,
+            response_time=time.time() - request_start_time,
+            endpoint='stream_predictions'
+        )
+
+
+# Streaming prediction
+@router.post(
+    "/stream",
+    response_class=NDJSONStreamResponse,
+    description=(
+        "Submit any number of transactions as NDJSON (one transaction per line). "
+        "Results stream back as NDJSON in input order, one line per input line, "
+        "with an `error` field for lines that could not be scored."
+    )
+)
+async def stream_predictions(request: Request) -> NDJSONStreamResponse:
+    """Create fraud predictions for a stream of transactions."""
+    return NDJSONStreamResponse(_stream_predictions(request))
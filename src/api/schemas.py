@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import List, Any
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Annotated, Dict, List, Sequence, Union
+from operator import attrgetter
 from datetime import datetime
+from src.config.constants import V_FEATURE_NAMES
 
 class TransactionFeatures(BaseModel):
     """V1-V28 features from the credit card dataset"""
@@ -33,28 +35,30 @@ class TransactionFeatures(BaseModel):
     V27: float = Field(default=0.0)
     V28: float = Field(default=0.0)
 
+# V1-V28 as a plain array, in that order
+FeatureArray = Annotated[List[float], Field(min_length=len(V_FEATURE_NAMES), max_length=len(V_FEATURE_NAMES))]
+_get_v_features = attrgetter(*V_FEATURE_NAMES)
+
 class TransactionRequest(BaseModel):
     """Single transaction request model"""
     transaction_id: str = Field(..., description="Unique transaction identifier")
     amount: float = Field(..., gt=0, description="Transaction Amount")
-    timestamp: str = Field(..., description="Transaction timestamp in ISO format")
-    features: TransactionFeatures = Field(default_factory=TransactionFeatures)
+    timestamp: datetime = Field(..., description="Transaction timestamp in ISO format")
+    features: Union[TransactionFeatures, FeatureArray] = Field(
+        default_factory=TransactionFeatures,
+        union_mode="left_to_right",
+        description="V1-V28 as an object, or as an array of 28 floats in V1-V28 order"
+    )
 
-    @field_validator("timestamp")
-    def validate_timestamp(cls, v: Any) -> str:
-        """Ensure timestamp is in ISO format"""
-        if isinstance(v, datetime):
-            return v.isoformat().replace("+00:00", "Z")
-        elif isinstance(v, str):
-            try:
-                # Validate string format by parsing and reformatting
-                dt = datetime.fromisoformat(v.replace('Z', '+00:00'))
-                # Return the original string if it's already in ISO format
-                return v
-            except ValueError as e:
-                raise ValueError(f"Invalid timestamp format: {str(e)}")
-        raise ValueError("Timestamp must be string or datetime")
+    def feature_values(self) -> Sequence[float]:
+        """V1-V28 in order, without dumping the model"""
+        if isinstance(self.features, TransactionFeatures):
+            return _get_v_features(self.features)
+        return self.features
 
+    def features_dict(self) -> Dict[str, float]:
+        """V1-V28 by name, e.g. for drift metrics"""
+        return dict(zip(V_FEATURE_NAMES, self.feature_values()))
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -113,5 +117,9 @@ class BatchPredictionRequest(BaseModel):
 class BatchPredictionResponse(BaseModel):
     """Batch prediction response model"""
     results: List[TransactionResponse]
+    conflicts: List[str] = Field(
+        default_factory=list,
+        description="Transaction IDs that already exist and were not stored"
+    )
     total_processing_time: float  # in milliseconds
     timestamp: datetime
\ No newline at end of file
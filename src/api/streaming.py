@@ -0,0 +1,35 @@
+from typing import AsyncIterator, Tuple
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class NDJSONStreamResponse(StreamingResponse):
+    """Newline-delimited JSON streamed while the request body is still being read.
+
+    StreamingResponse normally listens for client disconnects on `receive`,
+    which would swallow request body chunks the body iterator still needs.
+    Here the iterator reads the body itself and sees disconnects there.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Yield (line number, line) for each non-blank line of a byte stream.
+
+    Only the current partial line is held in memory.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
@@ -0,0 +1,98 @@
+"""Per-stage request timing for the prediction routes.
+
+TimedRoute starts a StageTimer when a request arrives. The endpoint calls
+`current_timer().lap(stage)` as each stage finishes, and the time since the
+previous lap is booked to that stage:
+
+    timer = current_timer()
+    timer.lap('parse')        # body read, validated and dependencies resolved
+    features = ...
+    timer.lap('preprocess')
+
+Whatever happens after the endpoint's last lap, i.e. building and encoding
+the response, is booked to 'serialize'. Each stage is observed in the
+request_stage_seconds histogram and listed in a Server-Timing header, which
+browser dev tools and most tracing proxies display.
+
+With ENABLE_STAGE_TIMING off, routes get FastAPI's handler unchanged and
+current_timer() returns a timer whose lap() does nothing.
+"""
+from typing import Awaitable, Callable, Dict, List, Tuple
+from contextvars import ContextVar
+from time import perf_counter
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from src.config import get_settings
+from src.monitoring.metrics import STAGE_TIME
+
+settings = get_settings()
+
+
+class StageTimer:
+    """Lap timer: each lap() books the time since the previous one to a stage"""
+
+    __slots__ = ('start', 'last', 'stages')
+
+    def __init__(self):
+        self.start = self.last = perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def lap(self, stage: str) -> None:
+        now = perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f"{stage};dur={seconds * 1e3:.3f}" for stage, seconds in self.stages]
+        entries.append(f"total;dur={(self.last - self.start) * 1e3:.3f}")
+        return ", ".join(entries)
+
+
+class _DisabledTimer:
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+
+_DISABLED = _DisabledTimer()
+_current: ContextVar = ContextVar('stage_timer', default=_DISABLED)
+
+
+def current_timer():
+    """Timer of the request being handled, or one that ignores laps"""
+    return _current.get()
+
+
+class TimedRoute(APIRoute):
+    """APIRoute timing the stages of its requests, when ENABLE_STAGE_TIMING is on.
+
+    Only requests whose endpoint lapped at least one stage are recorded.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        if not settings.ENABLE_STAGE_TIMING:
+            return handler
+        # Histogram children per stage, so a request does not look labels up again
+        histograms: Dict[str, object] = {}
+
+        async def timed_handler(request: Request) -> Response:
+            timer = StageTimer()
+            token = _current.set(timer)
+            try:
+                response = await handler(request)
+            finally:
+                _current.reset(token)
+            if timer.stages:
+                timer.lap('serialize')
+                for stage, seconds in timer.stages:
+                    histogram = histograms.get(stage)
+                    if histogram is None:
+                        histogram = histograms[stage] = STAGE_TIME.labels(endpoint=self.name, stage=stage)
+                    histogram.observe(seconds)
+                response.headers['Server-Timing'] = timer.server_timing()
+            return response
+
+        return timed_handler
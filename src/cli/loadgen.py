@@ -0,0 +1,265 @@
+"""Open-loop load generator replaying transactions against the API.
+
+Usage:
+    python -m src.cli.loadgen PAYLOADS [--url URL] [--rps 100,200,400] [--duration 30]
+                              [--endpoint single|batch] [--batch-size N] [--json REPORT]
+
+PAYLOADS is JSONL with one API transaction per line (the same input as
+src.cli.score), sent in a loop to /api/v1/transactions, or in groups of
+--batch-size to /api/v1/transactions/batch. Transaction IDs get a per-run
+suffix so replays are not rejected as duplicates (--keep-ids sends them
+as they are).
+
+Requests go out on a fixed schedule, one every 1/RPS seconds, whether or
+not earlier ones have come back, so a slow server builds a queue just as it
+would under real traffic. Latency is measured from when a request was
+scheduled to go out rather than when it actually did (coordinated-omission
+correction): if the generator or its connection pool falls behind, that
+delay counts against the server instead of quietly disappearing. Service
+time, from the actual send, is reported alongside.
+
+Latency covers every request, whatever its outcome: an error or a timeout
+took at least that long to come back, and leaving them out would make the
+tail look better the more the server is overloaded. The latency of
+successful requests alone is reported next to it.
+
+Each comma-separated --rps value is run for --duration seconds, in order,
+and reported separately.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from collections import Counter
+from pathlib import Path
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+import uuid
+import httpx
+import numpy as np
+
+PERCENTILES = [50, 90, 99, 99.9]
+ENDPOINTS = {
+    'single': '/api/v1/transactions',
+    'batch': '/api/v1/transactions/batch',
+}
+
+
+def load_payloads(path: Path) -> List[Dict[str, Any]]:
+    """Transactions from a JSONL file, skipping blank lines"""
+    with open(path) as f:
+        payloads = [json.loads(line) for line in f if line.strip()]
+    if not payloads:
+        raise ValueError(f"No transactions in {path}")
+    return payloads
+
+
+def request_bodies(
+    payloads: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    keep_ids: bool = False
+) -> Iterator[bytes]:
+    """Endless JSON bodies cycling through the payloads, one transaction or one batch each"""
+    run_id = uuid.uuid4().hex[:8]
+    counter = itertools.count()
+    transactions = itertools.cycle(payloads)
+
+    def next_transaction() -> Dict[str, Any]:
+        tx = next(transactions)
+        if keep_ids:
+            return tx
+        return dict(tx, transaction_id=f"{tx.get('transaction_id', 'tx')}-{run_id}-{next(counter)}")
+
+    while True:
+        if batch_size is None:
+            yield json.dumps(next_transaction()).encode()
+        else:
+            yield json.dumps({'transactions': [next_transaction() for _ in range(batch_size)]}).encode()
+
+
+class StepResult:
+    """Outcomes and timings of the requests sent during one step"""
+
+    def __init__(self, rps: float, duration: float):
+        self.rps = rps
+        self.duration = duration
+        self.outcomes: Counter = Counter()  # status code, or the transport error
+        self.latencies: List[float] = []  # From the scheduled send time, every outcome
+        self.service_times: List[float] = []  # From the actual send time, every outcome
+        self.success_latencies: List[float] = []  # From the scheduled send time, 2xx responses only
+        self.max_send_lag = 0.0  # Furthest an actual send fell behind its schedule
+        self.started = 0.0
+        self.finished = 0.0
+
+    def record(self, outcome: str, scheduled: float, sent: float, done: float) -> None:
+        self.outcomes[outcome] += 1
+        self.max_send_lag = max(self.max_send_lag, sent - scheduled)
+        self.latencies.append(done - scheduled)
+        self.service_times.append(done - sent)
+        if outcome.startswith('2'):
+            self.success_latencies.append(done - scheduled)
+
+    def summary(self) -> Dict[str, Any]:
+        sent = sum(self.outcomes.values())
+        succeeded = len(self.success_latencies)
+        elapsed = max(self.finished - self.started, 1e-9)
+        latencies = np.asarray(self.latencies) * 1e3
+        service_times = np.asarray(self.service_times) * 1e3
+
+        def percentiles(values: np.ndarray) -> Dict[str, Optional[float]]:
+            keys = [f"p{p:g}".replace('.', '') for p in PERCENTILES] + ['max']
+            if not len(values):
+                return dict.fromkeys(keys)
+            return dict(zip(keys, np.percentile(values, PERCENTILES).tolist() + [float(values.max())]))
+
+        return {
+            'target_rps': self.rps,
+            'duration': self.duration,
+            'sent': sent,
+            'succeeded': succeeded,
+            'error_rate': (sent - succeeded) / sent if sent else 0.0,
+            'achieved_rps': succeeded / elapsed,
+            'outcomes': dict(self.outcomes),
+            'latency_ms': percentiles(latencies),
+            'success_latency_ms': percentiles(np.asarray(self.success_latencies) * 1e3),
+            'service_time_ms': percentiles(service_times),
+            'max_send_lag_ms': self.max_send_lag * 1e3,
+            'histogram_ms': latency_histogram(latencies),
+        }
+
+
+def latency_histogram(latencies_ms: np.ndarray) -> List[List[float]]:
+    """[upper bound ms, count] pairs over buckets doubling from 1ms"""
+    if not len(latencies_ms):
+        return []
+    top = max(1.0, float(latencies_ms.max()))
+    edges = 2.0 ** np.arange(0, np.ceil(np.log2(top)) + 1)
+    counts = np.bincount(np.searchsorted(edges, latencies_ms), minlength=len(edges))[:len(edges)]
+    return [[float(edge), int(count)] for edge, count in zip(edges, counts)]
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    path: str,
+    body: bytes,
+    scheduled: float,
+    result: StepResult
+) -> None:
+    sent = time.perf_counter()
+    try:
+        response = await client.post(path, content=body, headers={'Content-Type': 'application/json'})
+        outcome = str(response.status_code)
+    except httpx.TimeoutException:
+        outcome = 'timeout'
+    except httpx.TransportError as e:
+        outcome = type(e).__name__
+    result.record(outcome, scheduled, sent, time.perf_counter())
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    path: str,
+    bodies: Iterator[bytes],
+    rps: float,
+    duration: float
+) -> StepResult:
+    """Send requests at `rps` for `duration` seconds and wait for the last ones to come back"""
+    result = StepResult(rps, duration)
+    pending = set()
+    result.started = start = time.perf_counter()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Open loop: never wait for earlier requests before sending the next
+        task = asyncio.create_task(_send(client, path, next(bodies), scheduled, result))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+    result.finished = time.perf_counter()
+    return result
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    payloads: List[Dict[str, Any]],
+    rates: List[float],
+    duration: float,
+    endpoint: str = 'single',
+    batch_size: int = 100,
+    warmup: float = 0.0,
+    keep_ids: bool = False
+) -> List[StepResult]:
+    """Run each rate in turn, after an unrecorded warmup at the first one"""
+    path = ENDPOINTS[endpoint]
+    bodies = request_bodies(payloads, batch_size if endpoint == 'batch' else None, keep_ids)
+    if warmup > 0:
+        await run_step(client, path, bodies, rates[0], warmup)
+    return [await run_step(client, path, bodies, rps, duration) for rps in rates]
+
+
+def print_report(summaries: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'target rps':>10} {'achieved':>9} {'sent':>7} {'errors':>7} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8} {'ok p99':>8} {'svc p50':>8} "
+        f"{'lag ms':>8}"
+    )
+    for s in summaries:
+        latency = s['latency_ms']
+        cells = [latency[key] for key in ('p50', 'p90', 'p99', 'p999', 'max')]
+        cells += [s['success_latency_ms']['p99'], s['service_time_ms']['p50']]
+        cells = ' '.join(f"{'-':>8}" if value is None else f"{value:>8.1f}" for value in cells)
+        print(
+            f"{s['target_rps']:>10g} {s['achieved_rps']:>9.1f} {s['sent']:>7} {s['error_rate']:>7.1%} "
+            f"{cells} {s['max_send_lag_ms']:>8.1f}"
+        )
+    for s in summaries:
+        print(f"\n{s['target_rps']:g} rps: outcomes {s['outcomes']}")
+        total = sum(count for _, count in s['histogram_ms']) or 1
+        for edge, count in itertools.dropwhile(lambda bucket: bucket[1] == 0, s['histogram_ms']):
+            print(f"  <= {edge:>7g} ms {count:>7} {'#' * round(50 * count / total)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay transactions against the API at a fixed request rate")
+    parser.add_argument('payloads', type=Path, help="JSONL file with one transaction per line")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the API")
+    parser.add_argument('--rps', default='50',
+                        help="Requests per second; a comma-separated list runs each rate in turn")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run each rate")
+    parser.add_argument('--warmup', type=float, default=0.0, help="Unrecorded seconds at the first rate")
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='single')
+    parser.add_argument('--batch-size', type=int, default=100, help="Transactions per batch request")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Seconds before a request counts as timed out")
+    parser.add_argument('--max-connections', type=int, default=1000, help="Open connections at most")
+    parser.add_argument('--keep-ids', action='store_true', help="Send the transaction IDs unchanged")
+    parser.add_argument('--json', type=Path, help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    rates = [float(rate) for rate in args.rps.split(',')]
+    payloads = load_payloads(args.payloads)
+
+    async def run() -> List[StepResult]:
+        limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            return await run_load(
+                client, payloads, rates, args.duration,
+                endpoint=args.endpoint,
+                batch_size=args.batch_size,
+                warmup=args.warmup,
+                keep_ids=args.keep_ids
+            )
+
+    summaries = [result.summary() for result in asyncio.run(run())]
+    print_report(summaries)
+    if args.json:
+        args.json.write_text(json.dumps(summaries, indent=2))
+    if any(s['succeeded'] == 0 for s in summaries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
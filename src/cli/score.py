@@ -0,0 +1,396 @@
+"""Re-score transaction dumps offline, without going through the API.
+
+Usage:
+    python -m src.cli.score INPUT OUTPUT [--workers N] [--chunk-size N] [--persist]
+
+INPUT is JSONL (one API transaction per line), CSV (transaction_id, amount,
+timestamp, V1..V28 columns) or Parquet with the same columns. OUTPUT is .jsonl
+or .csv with transaction_id, fraud_probability, is_fraud and error, in input
+order. Progress is checkpointed after every chunk, so re-running the same
+command after an interruption picks up where it stopped.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.config.constants import V_FEATURE_NAMES
+
+OUTPUT_FIELDS = ['transaction_id', 'fraud_probability', 'is_fraud', 'error']
+
+# Set in each worker (or in this process with --workers 0) by _init_worker
+_preprocessor = None
+_model_manager = None
+
+
+def _init_worker() -> None:
+    """Load the model once in this process"""
+    global _preprocessor, _model_manager
+    from src.core.preprocessing import preprocessor
+    _preprocessor = preprocessor
+    _model_manager = preprocessor.model_manager
+
+
+def _transaction_id_error(transaction_id: Any) -> Optional[str]:
+    """Error for a row whose transaction_id is missing or not a string; such rows cannot be stored"""
+    if not isinstance(transaction_id, str) or not transaction_id:
+        return "Missing or non-string transaction_id"
+    return None
+
+
+def _transactions_from_lines(lines: List[str]) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+    """Parse JSONL lines; unparseable lines and lines without a transaction_id become None with an error"""
+    transactions, errors = [], []
+    for line in lines:
+        try:
+            transaction = json.loads(line)
+        except json.JSONDecodeError as e:
+            transactions.append(None)
+            errors.append(f"Invalid JSON: {str(e)}")
+            continue
+        if not isinstance(transaction, dict):
+            transactions.append(None)
+            errors.append("Transaction must be a JSON object")
+        else:
+            # A row without an id would score fine but cannot be matched up or stored
+            error = _transaction_id_error(transaction.get('transaction_id'))
+            transactions.append(None if error else transaction)
+            errors.append(error)
+    return transactions, errors
+
+
+def _transactions_from_frame(frame: pd.DataFrame) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+    """Turn flat CSV/Parquet columns into API-shaped transactions; rows without an id become None with an error"""
+    v_features = frame[V_FEATURE_NAMES].to_numpy(dtype=np.float64).tolist()
+    transactions, errors = [], []
+    for transaction_id, amount, timestamp, row in zip(
+        frame['transaction_id'].tolist(), frame['amount'].tolist(), frame['timestamp'], v_features
+    ):
+        error = _transaction_id_error(transaction_id)
+        transactions.append(None if error else {
+            'transaction_id': transaction_id,
+            'amount': amount,
+            'timestamp': timestamp,
+            'features': dict(zip(V_FEATURE_NAMES, row)),
+        })
+        errors.append(error)
+    return transactions, errors
+
+
+def _preprocess_rows(
+    transactions: List[Optional[Dict[str, Any]]],
+    errors: List[Optional[str]]
+) -> Tuple[Optional[np.ndarray], List[int]]:
+    """Features for the rows that preprocess cleanly, and their positions.
+
+    Rows that fail get their error filled in.
+    """
+    valid = [i for i, transaction in enumerate(transactions) if transaction is not None]
+    try:
+        return _preprocessor.preprocess_batch([transactions[i] for i in valid]), valid
+    except ValueError:
+        # Find the bad rows and score the rest
+        rows, good = [], []
+        for i in valid:
+            try:
+                rows.append(_preprocessor.preprocess_transaction(transactions[i]))
+                good.append(i)
+            except ValueError as e:
+                errors[i] = str(e)
+        return (np.vstack(rows) if rows else None), good
+
+
+def score_chunk(chunk: Any) -> Dict[str, Any]:
+    """Score one chunk (JSONL lines or a DataFrame).
+
+    Returns columns with one entry per input row; fraud_probability is NaN
+    where error is set. model_version names the model that scored the chunk.
+    """
+    if isinstance(chunk, pd.DataFrame):
+        # Blank CSV ids come in as NaN, which is not valid JSON output
+        transaction_ids = [None if pd.isna(tid) else tid for tid in chunk['transaction_id'].tolist()]
+        errors = [_transaction_id_error(tid) for tid in transaction_ids]
+        valid = [i for i, error in enumerate(errors) if error is None]
+        rows = chunk if len(valid) == len(chunk) else chunk.iloc[valid]
+        try:
+            # Straight from the columns, no per-row dicts
+            features = _preprocessor.preprocess_columns(
+                rows[V_FEATURE_NAMES].to_numpy(dtype=np.float64),
+                rows['amount'].to_numpy(dtype=np.float64),
+                rows['timestamp'].tolist()
+            )
+        except ValueError:
+            transactions, errors = _transactions_from_frame(chunk)
+            features, valid = _preprocess_rows(transactions, errors)
+    else:
+        transactions, errors = _transactions_from_lines(chunk)
+        transaction_ids = [
+            transaction.get('transaction_id') if isinstance(transaction, dict) else None
+            for transaction in transactions
+        ]
+        features, valid = _preprocess_rows(transactions, errors)
+
+    probabilities = np.full(len(transaction_ids), np.nan)
+    if valid:
+        probabilities[valid] = _model_manager.batch_predict(features=features)
+    return {
+        'transaction_id': transaction_ids,
+        'fraud_probability': probabilities,
+        'is_fraud': _model_manager.is_fraud(probabilities),
+        'error': errors,
+        'model_version': _model_manager.version,
+    }
+
+
+def detect_format(path: Path) -> str:
+    """File format from the extension"""
+    suffix = path.suffix.lower()
+    formats = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+    if suffix not in formats:
+        raise ValueError(f"Unsupported file type: {path.name}")
+    return formats[suffix]
+
+
+def read_chunks(path: Path, chunk_size: int, skip_rows: int = 0) -> Iterator[Any]:
+    """Input rows in chunks, starting after the first `skip_rows` rows"""
+    input_format = detect_format(path)
+    if input_format == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            chunk, seen = [], 0
+            for line in f:
+                if not line.strip():
+                    continue
+                seen += 1
+                if seen <= skip_rows:
+                    continue
+                chunk.append(line)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+    elif input_format == 'csv':
+        yield from pd.read_csv(
+            path,
+            chunksize=chunk_size,
+            skiprows=range(1, skip_rows + 1),
+            dtype={'transaction_id': str, 'timestamp': str}
+        )
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet needs pyarrow (pip install pyarrow)")
+        # Batches are cut at chunk boundaries so skipping lines up with checkpoints
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            if skip_rows >= batch.num_rows:
+                skip_rows -= batch.num_rows
+                continue
+            yield batch.slice(skip_rows).to_pandas()
+            skip_rows = 0
+
+
+def _rows(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Output rows of a scored chunk"""
+    for transaction_id, probability, is_fraud, error in zip(
+        results['transaction_id'],
+        results['fraud_probability'].tolist(),
+        results['is_fraud'].tolist(),
+        results['error']
+    ):
+        if error is None:
+            yield {'transaction_id': transaction_id, 'fraud_probability': probability, 'is_fraud': is_fraud, 'error': None}
+        else:
+            yield {'transaction_id': transaction_id, 'fraud_probability': None, 'is_fraud': None, 'error': error}
+
+
+class OutputWriter:
+    """Append scored rows to a JSONL or CSV file"""
+
+    def __init__(self, path: Path, resume_at: int):
+        self.path = path
+        self.format = detect_format(path)
+        if self.format == 'parquet':
+            raise ValueError("Output must be .jsonl or .csv")
+        self.file = open(path, 'a+b')
+        # Anything after the last checkpoint came from an unfinished chunk
+        self.file.truncate(resume_at)
+        self.file.seek(resume_at)
+        if resume_at == 0 and self.format == 'csv':
+            self.file.write((','.join(OUTPUT_FIELDS) + '\n').encode())
+
+    def write(self, results: Dict[str, Any]) -> int:
+        """Write a scored chunk and flush it to disk, returning the new file size"""
+        if self.format == 'jsonl':
+            data = ''.join(json.dumps(row) + '\n' for row in _rows(results))
+        else:
+            failed = np.array([error is not None for error in results['error']], dtype=bool)
+            data = pd.DataFrame({
+                'transaction_id': results['transaction_id'],
+                'fraud_probability': results['fraud_probability'],
+                'is_fraud': pd.arrays.BooleanArray(results['is_fraud'], failed),
+                'error': results['error'],
+            }).to_csv(header=False, index=False, lineterminator='\n')
+        self.file.write(data.encode())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Checkpoint:
+    """Rows done and output size after the last completed chunk"""
+
+    def __init__(self, path: Path, input_path: Path, chunk_size: int):
+        self.path = path
+        self.key = {'input': str(input_path.resolve()), 'chunk_size': chunk_size}
+        self.rows_done = 0
+        self.output_bytes = 0
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        state = json.loads(self.path.read_text())
+        if {k: state.get(k) for k in self.key} != self.key:
+            raise ValueError(f"Checkpoint {self.path} belongs to a different run; delete it to start over")
+        self.rows_done = state['rows_done']
+        self.output_bytes = state['output_bytes']
+
+    def save(self, rows_done: int, output_bytes: int) -> None:
+        self.rows_done, self.output_bytes = rows_done, output_bytes
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({**self.key, 'rows_done': rows_done, 'output_bytes': output_bytes}))
+        os.replace(tmp, self.path)  # Atomic, a crash never leaves half a checkpoint
+
+
+def persist(results: Dict[str, Any], chunk: Any) -> int:
+    """Store scored rows in the predictions table; returns the number of new rows"""
+    from src.db.crud import PredictionCRUD
+    from src.db.database import SessionLocal
+
+    amounts = chunk['amount'].tolist() if isinstance(chunk, pd.DataFrame) else None
+    records = []
+    for i, row in enumerate(_rows(results)):
+        if row['error'] is not None:
+            continue
+        amount = amounts[i] if amounts is not None else json.loads(chunk[i])['amount']
+        records.append({
+            'transaction_id': row['transaction_id'],
+            'amount': amount,
+            'fraud_probability': row['fraud_probability'],
+            'is_fraud': row['is_fraud'],
+            'processing_time': 0.0,
+            'model_version': results['model_version'],
+        })
+    with SessionLocal() as db:
+        # Rows stored before an interruption come back as conflicts and are skipped
+        created, _ = PredictionCRUD(db=db).create_predictions_bulk(records)
+    return len(created)
+
+
+def run(
+    input_path: Path,
+    output_path: Path,
+    workers: int = 2,
+    chunk_size: int = 10000,
+    persist_predictions: bool = False,
+    checkpoint_path: Optional[Path] = None
+) -> int:
+    """Score input_path into output_path; returns the number of rows scored in this run"""
+    checkpoint = Checkpoint(
+        checkpoint_path or output_path.with_name(output_path.name + '.checkpoint'),
+        input_path,
+        chunk_size
+    )
+    checkpoint.load()
+    if checkpoint.rows_done:
+        print(f"Resuming after {checkpoint.rows_done} rows")
+
+    writer = OutputWriter(output_path, resume_at=checkpoint.output_bytes)
+    pool = None
+    if workers > 0:
+        # Spawn rather than fork: forking after XGBoost started its threads can deadlock
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=_init_worker)
+    else:
+        _init_worker()
+
+    start = time.perf_counter()
+    rows_done, rows_scored, stored = checkpoint.rows_done, 0, 0
+    # Submitted chunks in input order; a few per worker keeps them all busy without reading ahead too far
+    in_flight: deque[Tuple[Any, Future]] = deque()
+    max_in_flight = max(1, workers * 2)
+
+    def finish_oldest() -> None:
+        nonlocal rows_done, rows_scored, stored
+        chunk, future = in_flight.popleft()
+        results = future.result()
+        if persist_predictions:
+            stored += persist(results, chunk)
+        output_bytes = writer.write(results)
+        rows_done += len(results['error'])
+        rows_scored += len(results['error'])
+        checkpoint.save(rows_done, output_bytes)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {rows_done} rows ({rows_scored / elapsed:,.0f} rows/s)")
+
+    try:
+        for chunk in read_chunks(input_path, chunk_size, skip_rows=checkpoint.rows_done):
+            if pool is None:
+                future = Future()
+                future.set_result(score_chunk(chunk))
+            else:
+                future = pool.submit(score_chunk, chunk)
+            in_flight.append((chunk, future))
+            if len(in_flight) >= max_in_flight:
+                finish_oldest()
+        while in_flight:
+            finish_oldest()
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    summary = f"Done: {rows_scored} rows in {elapsed:.1f}s ({rows_scored / max(elapsed, 1e-9):,.0f} rows/s)"
+    if persist_predictions:
+        summary += f", {stored} new predictions stored"
+    print(summary)
+    return rows_scored
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score a file of transactions with the fraud model")
+    parser.add_argument('input', type=Path, help="Input .jsonl, .csv or .parquet file")
+    parser.add_argument('output', type=Path, help="Output .jsonl or .csv file")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, each with its own model (0 scores in this process)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk")
+    parser.add_argument('--persist', action='store_true', help="Also store predictions in the database")
+    parser.add_argument('--checkpoint', type=Path, help="Checkpoint file (default: OUTPUT.checkpoint)")
+    args = parser.parse_args(argv)
+
+    try:
+        run(
+            args.input,
+            args.output,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            persist_predictions=args.persist,
+            checkpoint_path=args.checkpoint
+        )
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
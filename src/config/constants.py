@@ -20,4 +20,10 @@ API_DESCRIPTION = """
         """
 
 # Monitoring related constants
-METRICS_PREFIX = "fraud_detection"
\ No newline at end of file
+METRICS_PREFIX = "fraud_detection"
+
+# Model input layout: V1-V28, then scaled Amount, then day_part
+V_FEATURE_NAMES = [f"V{i}" for i in range(1, 29)]
+AMOUNT_INDEX = 28
+DAY_PART_INDEX = 29
+N_MODEL_FEATURES = 30
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 from functools import lru_cache
 import os 
 from dotenv import load_dotenv
@@ -24,13 +24,61 @@ class Settings(BaseSettings):
     SCALER_PATH: str = "models/amount_scaler.joblib"
     CLASS_WEIGHTS_PATH: str = "models/class_weights.joblib"
     FRAUD_THRESHOLD: float = 0.8   # Based on your optimal threshold
+    INFERENCE_ENGINE: str = "xgboost"  # "xgboost", "native" (flattened trees) or "auto"
+    NATIVE_ENGINE_MAX_ROWS: int = 64  # "auto" uses the native engine up to this many rows
+    INFERENCE_EXECUTOR: str = "inline"  # "inline", "thread" or "process"
+    INFERENCE_WORKERS: int = 2  # Threads or processes for the non-inline executors
+    INFERENCE_TIMEOUT: float = 5.0  # Seconds before a queued inference call gives up
+
+    # Model registry and hot reload
+    MODEL_REGISTRY_DIR: Optional[str] = None  # Named versions as <dir>/<version>/ with the three model files
+    MODEL_WATCH: bool = False  # Reload when the configured model files change
+    MODEL_WATCH_INTERVAL: float = 2.0  # Seconds between checks of the model files
+    MODEL_WARMUP_ROWS: int = 256  # Sample rows scored before a new version is swapped in
+    ADMIN_TOKEN: Optional[str] = None  # Bearer token for /admin and /debug endpoints; unset disables them
+
+    # Pre-fork server (python -m src.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1  # Forked worker processes; 0 starts one per available CPU
+    SERVER_CPU_AFFINITY: str = "none"  # "none", "auto" (worker i on the i-th CPU) or a CPU list like "0,2"
 
     # Performance settings
     BATCH_SIZE: int = 1000
     MAX_REQUEST_PER_MINUTE: int = 100
+    ENABLE_REQUEST_COALESCING: bool = False  # Merge concurrent single predictions into batches
+    COALESCE_MAX_BATCH_SIZE: int = 32
+    COALESCE_MAX_WAIT_US: int = 1000  # Upper bound on the extra wait, in microseconds
+    ENABLE_FAST_JSON: bool = True  # Serialize prediction responses with orjson, skipping the response models
+
+    # Write-behind persistence: respond before the prediction is committed
+    ENABLE_WRITE_BEHIND: bool = False
+    WRITE_BEHIND_QUEUE_SIZE: int = 10000  # enqueue waits when this many records are queued
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 0.05  # seconds
+
+    # Cache of stored predictions for GET /transactions/{id}
+    PREDICTION_CACHE_BACKEND: str = "memory"  # "memory" or "none"
+    PREDICTION_CACHE_SIZE: int = 10000  # Entries kept per process
+    PREDICTION_CACHE_TTL: float = 300.0  # seconds
 
     # Monitoring settings
     ENABLE_METRICS: bool = True
+    ENABLE_STAGE_TIMING: bool = True  # Per-stage latency histograms and a Server-Timing header on predictions
+    DRIFT_MODE: str = "inline"  # "inline" (every request) or "scheduled" (background refresh)
+    DRIFT_REFRESH_INTERVAL: float = 5.0  # Seconds between scheduled drift refreshes
+
+    # Profiling under /debug
+    PROFILE_MAX_SECONDS: float = 60.0  # Longest profile a request can ask for
+    PROFILE_REQUEST_FRACTION: float = 0.1  # Default share of prediction requests cProfiled
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000  # Records waiting for the writer thread; more are dropped
+    LOG_RATE_LIMIT: float = 10.0  # Records per second per message type; 0 for no limit
+    LOG_RATE_BURST: int = 20
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # Fraction kept per message, e.g. {"Raw fraud probabilities: %s": 0.01}
     
     model_config = SettingsConfigDict(
         case_sensitive = True,
@@ -0,0 +1,122 @@
+from typing import Optional
+import asyncio
+import time
+import numpy as np
+from src.config import get_settings
+from src.monitoring.metrics import COALESCED_BATCH_SIZE, COALESCER_QUEUE_WAIT
+from .executor import inference_executor
+
+settings = get_settings()
+
+
+class PredictionCoalescer:
+    """Coalesce concurrent single-transaction predictions into one batch_predict call.
+
+    Batches go through the inference executor, so they run wherever it runs them.
+
+    Each caller awaits its own result. A batch is sent when it reaches
+    max_batch_size or when its wait window closes. The window follows the
+    arrival rate: when requests are too sparse for another one to arrive
+    within max_wait_us the batch goes out on the next loop iteration, so
+    low traffic pays no extra latency.
+
+    A batch only holds requests for one model version; a request for another
+    version (e.g. right after a reload) sends the pending batch first.
+    """
+
+    # Weight of the newest inter-arrival gap in the moving average
+    SMOOTHING = 0.2
+
+    def __init__(self, executor, max_batch_size: int = 32, max_wait_us: int = 1000):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1_000_000
+        self._pending: list[tuple[np.ndarray, asyncio.Future, float]] = []
+        self._pending_model = None
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._last_arrival: Optional[float] = None
+        self._arrival_gap: Optional[float] = None
+        self._running: set[asyncio.Task] = set()
+
+    def _record_arrival(self, now: float) -> None:
+        """Update the moving average of the time between requests"""
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            if self._arrival_gap is None:
+                self._arrival_gap = gap
+            else:
+                self._arrival_gap += self.SMOOTHING * (gap - self._arrival_gap)
+        self._last_arrival = now
+
+    def _window(self) -> float:
+        """Seconds to hold a new batch open for more requests"""
+        gap = self._arrival_gap
+        if gap is None or gap >= self.max_wait:
+            # Nobody else is likely to show up in time, don't make this request wait
+            return 0.0
+        # About as long as it takes to fill the batch at the current rate
+        return min(self.max_wait, gap * (self.max_batch_size - 1))
+
+    async def predict(self, feature: np.ndarray, model=None) -> float:
+        """Fraud probability for a single preprocessed (1, 30) transaction"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        now = time.perf_counter()
+        self._record_arrival(now)
+        if self._pending and model is not self._pending_model:
+            self._flush()
+        self._pending_model = model
+        self._pending.append((feature, future, now))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            window = self._window()
+            if window > 0:
+                self._flush_handle = loop.call_later(window, self._flush)
+            else:
+                # Still coalesce requests that arrived in the same loop iteration
+                self._flush_handle = loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything pending as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference so the task is not garbage collected mid-flight
+            task = asyncio.ensure_future(self._run_batch(batch, self._pending_model))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: list[tuple[np.ndarray, asyncio.Future, float]], model=None) -> None:
+        """Predict a batch and hand each caller its own probability"""
+        started = time.perf_counter()
+        COALESCED_BATCH_SIZE.observe(len(batch))
+        for _, _, enqueued in batch:
+            COALESCER_QUEUE_WAIT.observe(started - enqueued)
+
+        try:
+            features = np.vstack([feature for feature, _, _ in batch])
+            probabilities = await self.executor.batch_predict(features, model)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), probability in zip(batch, probabilities):
+            # The caller may have gone away (e.g. client disconnected)
+            if not future.done():
+                future.set_result(float(probability))
+
+
+# Create global coalescer instance
+coalescer = PredictionCoalescer(
+    executor=inference_executor,
+    max_batch_size=settings.COALESCE_MAX_BATCH_SIZE,
+    max_wait_us=settings.COALESCE_MAX_WAIT_US
+)
@@ -0,0 +1,158 @@
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+import asyncio
+import numpy as np
+from src.config import get_settings
+from src.config.constants import N_MODEL_FEATURES
+from src.monitoring.metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_TIMEOUTS
+from .registry import model_registry
+
+settings = get_settings()
+
+# Models loaded in each process-pool worker, by version. Two are kept so
+# requests started before a reload can finish on the old version.
+_worker_models: "OrderedDict[str, Any]" = OrderedDict()
+WORKER_MODEL_VERSIONS = 2
+
+
+def _worker_model(source: Dict[str, str]):
+    """The model version described by `source`, loaded in this worker on first use"""
+    model = _worker_models.get(source['version'])
+    if model is None:
+        from src.core.model import ModelManager
+        model = _worker_models[source['version']] = ModelManager(**source)
+        while len(_worker_models) > WORKER_MODEL_VERSIONS:
+            _worker_models.popitem(last=False)
+    return model
+
+
+def _init_worker(source: Dict[str, str]) -> None:
+    """Load the model in a freshly started worker process"""
+    _worker_model(source)
+
+
+def _predict_shared(name: str, shape: tuple, dtype: str, source: Dict[str, str]) -> np.ndarray:
+    """Predict on a feature matrix the parent placed in shared memory"""
+    # Spawned workers share the parent's resource tracker, which unlinks the block
+    shm = SharedMemory(name=name)
+    try:
+        features = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        probabilities = np.array(_worker_model(source).batch_predict(features=features))
+        del features  # Release the view before closing the mapping
+        return probabilities
+    finally:
+        shm.close()
+
+
+class InferenceExecutor:
+    """Run model inference without blocking the event loop.
+
+    Modes:
+    - inline: call the model directly on the event loop (no overhead)
+    - thread: run calls in a thread pool; XGBoost releases the GIL while predicting
+    - process: run calls in worker processes that each load the model once;
+      feature matrices are handed over through shared memory, not pickled
+
+    `model_manager` is the default model; predict and batch_predict also take
+    the model a request started with, so a reload does not switch it midway.
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, model_manager, mode: str = "inline", workers: int = 2, timeout: float = 5.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self.model_manager = model_manager
+        self.mode = mode
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+
+    async def start(self) -> None:
+        """Create the worker pool and make sure every worker has the model loaded"""
+        if self.mode == "inline" or self._pool is not None:
+            return
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+            return
+
+        # Spawn rather than fork: forking after XGBoost started its threads can deadlock
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_manager.source,)
+        )
+        # Start and warm every worker now instead of on the first requests
+        await self.prepare(self.model_manager)
+
+    async def prepare(self, model) -> None:
+        """Load a model version in every worker process before requests use it"""
+        if self.mode != "process" or self._pool is None:
+            return
+        # Loading takes long enough that each idle worker picks up one call
+        sample = np.zeros((1, N_MODEL_FEATURES))
+        await asyncio.gather(*(self._run_shared(sample, model.source) for _ in range(self.workers)))
+
+    async def shutdown(self) -> None:
+        """Let submitted calls finish, then stop the workers"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True)
+
+    async def predict(self, feature: np.ndarray, model=None) -> float:
+        """Fraud probability for a single preprocessed transaction"""
+        model = model or self.model_manager
+        if self.mode == "inline":
+            return model.predict(feature=feature)
+        return float((await self.batch_predict(feature, model))[0])
+
+    async def batch_predict(self, features: np.ndarray, model=None) -> np.ndarray:
+        """Fraud probabilities for a batch of preprocessed transactions"""
+        model = model or self.model_manager
+        if self.mode == "inline":
+            return model.batch_predict(features=features)
+        if self.mode == "thread":
+            return await self._run(model.batch_predict, features)
+        return await self._run_shared(features, model.source)
+
+    async def _run_shared(self, features: np.ndarray, source: Dict[str, str]) -> np.ndarray:
+        """Copy features into a shared memory block and predict in a worker process"""
+        features = np.ascontiguousarray(features)
+        shm = SharedMemory(create=True, size=max(features.nbytes, 1))
+        try:
+            np.ndarray(features.shape, dtype=features.dtype, buffer=shm.buf)[...] = features
+            return await self._run(_predict_shared, shm.name, features.shape, features.dtype.str, source)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Submit a call to the pool and wait for it with a timeout"""
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running")
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        INFERENCE_QUEUE_DEPTH.set(self._in_flight)
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._pool, func, *args), self.timeout)
+        except asyncio.TimeoutError:
+            INFERENCE_TIMEOUTS.inc()
+            raise TimeoutError(f"Inference timed out after {self.timeout}s")
+        finally:
+            self._in_flight -= 1
+            INFERENCE_QUEUE_DEPTH.set(self._in_flight)
+
+
+# Create global inference executor instance
+inference_executor = InferenceExecutor(
+    model_manager=model_registry,
+    mode=settings.INFERENCE_EXECUTOR,
+    workers=settings.INFERENCE_WORKERS,
+    timeout=settings.INFERENCE_TIMEOUT
+)
+model_registry.add_prepare_hook(inference_executor.prepare)
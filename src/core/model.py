@@ -1,35 +1,96 @@
 from typing import Optional, Dict, Any
-import joblib
+import hashlib
+import io
+import logging
 import numpy as np
 from pathlib import Path
 from src.config import  get_settings
+from .scaling import CompiledScaler
+from .tree_engine import FlatTreeEnsemble
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def content_version(*contents: bytes) -> str:
+    """Short hash of the model files' contents, the version when none is given"""
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(content)
+    return digest.hexdigest()[:12]
+
 
 class ModelManager:
     """Manages the fraud detection model lifecycle."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        scaler_path: Optional[str] = None,
+        weights_path: Optional[str] = None,
+        version: Optional[str] = None
+    ):
+        # Defaults to the configured model files
+        self.model_path = Path(model_path or settings.MODEL_PATH)
+        self.scaler_path = Path(scaler_path or settings.SCALER_PATH)
+        self.weights_path = Path(weights_path or settings.CLASS_WEIGHTS_PATH)
+        self.version = version
         self.model = None
         self.scaler = None
+        self.amount_scaler = None
         self.class_weights = None
+        self.tree_engine = None
         self._load_model()
+
+    @property
+    def source(self) -> Dict[str, str]:
+        """Arguments that load this same version again, e.g. in a worker process"""
+        return dict(
+            model_path=str(self.model_path),
+            scaler_path=str(self.scaler_path),
+            weights_path=str(self.weights_path),
+            version=self.version
+        )
     
     def _load_model(self) -> None:
         """Load the model and scaler from disk"""
         try:
-            model_path = Path(settings.MODEL_PATH)
-            scaler_path = Path(settings.SCALER_PATH)
-            weights_path = Path(settings.CLASS_WEIGHTS_PATH)
+            model_path = self.model_path
+            scaler_path = self.scaler_path
+            weights_path = self.weights_path
 
             if not model_path.exists() or not scaler_path.exists() or not weights_path.exists():
                 raise FileNotFoundError("Model or scaler file not found")
             
-            self.model = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            self.class_weights = joblib.load(weights_path)
+            # Imported here: unpickling pulls in xgboost, sklearn and pandas
+            import joblib
+
+            # Read each file once, so the version hash matches what was loaded
+            contents = [path.read_bytes() for path in (model_path, scaler_path, weights_path)]
+            self.model, self.scaler, self.class_weights = (
+                joblib.load(io.BytesIO(content)) for content in contents
+            )
+            if self.version is None:
+                self.version = content_version(*contents)
+
+            # Precompute scaler constants so the request path skips pandas/sklearn
+            self.amount_scaler = CompiledScaler.from_sklearn(self.scaler)
+
+            if settings.INFERENCE_ENGINE not in ("xgboost", "native", "auto"):
+                raise ValueError(f"Unknown inference engine: {settings.INFERENCE_ENGINE}")
+            if settings.INFERENCE_ENGINE != "xgboost":
+                self.tree_engine = FlatTreeEnsemble.from_xgboost(self.model)
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
+
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Fraud class probabilities from the engine selected by INFERENCE_ENGINE"""
+        if self.tree_engine is not None and (
+            settings.INFERENCE_ENGINE == "native"
+            or len(features) <= settings.NATIVE_ENGINE_MAX_ROWS
+        ):
+            return self.tree_engine.predict_proba(features)
+        return self.model.predict_proba(features)[:, 1]
     
     def predict(self, feature: np.ndarray) -> float:
         """Make fraud prediction for a single transaction"""
@@ -38,7 +99,7 @@ class ModelManager:
         
         try:
             # Get raw probability for fraud class
-            probability = float(self.model.predict_proba(feature)[0, 1])
+            probability = float(self._predict_proba(feature)[0])
             
             # No need to reapply class weights as they're already incorporated in the model
             return probability
@@ -52,32 +113,24 @@ class ModelManager:
             raise RuntimeError("Model not loaded")
         
         try:
-            # Print shape for debugging
-            print(f"Features shape: {features.shape}")
+            logger.debug("Features shape: %s", features.shape)
             
             # Ensure features are properly formatted
             if len(features.shape) == 1:
                 features = features.reshape(1, -1)
             
-            # Get raw probabilities directly - no need to reapply class weights
-            probabilities = self.model.predict_proba(features)
+            # Get fraud class probabilities directly - no need to reapply class weights
+            fraud_probs = self._predict_proba(features)
             
-            # Extract fraud class probabilities
-            fraud_probs = probabilities[:, 1]
-            
-            # Debug print
-            print(f"Raw fraud probabilities: {fraud_probs}")
+            logger.debug("Raw fraud probabilities: %s", fraud_probs)
             
             return fraud_probs
             
         except Exception as e:
-            print(f"Error in batch_predict: {str(e)}")
+            logger.error("Error in batch_predict: %s", e)
             raise RuntimeError(f"Batch prediction failed: {str(e)}")
     
     def is_fraud(self, probability: float) -> bool:
         """Determine if a transaction is fraudulent based on probability threshold"""
         # Use a more reasonable threshold (e.g., 0.5 or settings.FRAUD_THRESHOLD)
-        return probability >= settings.FRAUD_THRESHOLD 
-
-# Create global model manager instance
-model_manager = ModelManager()
\ No newline at end of file
+        return probability >= settings.FRAUD_THRESHOLD 
\ No newline at end of file
@@ -1,9 +1,22 @@
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Sequence, Union
+from itertools import chain
+from operator import itemgetter
+import re
+import warnings
 import numpy as np
-import pandas as pd
 from datetime import datetime
-from src.config.constants import FEATURE_NAMES
-from .model import model_manager
+from src.config.constants import (
+    FEATURE_NAMES,
+    V_FEATURE_NAMES,
+    AMOUNT_INDEX,
+    DAY_PART_INDEX,
+    N_MODEL_FEATURES,
+)
+from .registry import model_registry
+
+# Trailing 'Z' or '+HH:MM'-style UTC offset of an ISO timestamp
+_UTC_OFFSET = re.compile(r'(?:Z|[+-]\d{2}(?::?\d{2}(?::?\d{2}(?:\.\d+)?)?)?)$')
+_get_v_features = itemgetter(*V_FEATURE_NAMES)
 
 class TransactionPreprocessor:
     """Preprocess transaction data for fraud detection"""
@@ -37,31 +50,32 @@ class TransactionPreprocessor:
             timestamp = self._parse_timestamp(raw_timestamp)
             day_part = self._convert_to_day_part(timestamp)
             
-            # 2. Scale amount
+            # 2. Fill the output row in place: V1-V28 (indices 0-27),
+            #    scaled Amount (index 28), day_part (index 29)
+            features = np.empty((1, N_MODEL_FEATURES))
+            row = features[0]
+            row[:AMOUNT_INDEX] = _get_v_features(transaction_data['features'])
             amount = float(transaction_data['amount'])
-            amount_df = pd.DataFrame({'Amount': [amount]})
-            scaled_amount = self.model_manager.scaler.transform(amount_df)[0][0]
-            
-            # 3. Create feature array in EXACT same order as training
-            features = np.zeros(30)
-            
-            # First add V1-V28 (indices 0-27)
-            for i in range(1, 29):
-                feature_name = f'V{i}'
-                features[i-1] = float(transaction_data['features'][feature_name])
-            
-            # Then add Amount (index 28)
-            features[28] = scaled_amount
-            
-            # Finally add day_part (index 29)
-            features[29] = day_part
+            row[AMOUNT_INDEX] = self.model_manager.amount_scaler.transform_one(amount)
+            row[DAY_PART_INDEX] = day_part
             
-            # print(features.reshape(1, -1))   # Debug
-            return features.reshape(1, -1)
+            return features
             
         except Exception as e:
             raise ValueError(f"Failed to preprocess transaction: {str(e)}")
 
+    def preprocess_request(self, transaction: Any, model=None) -> np.ndarray:
+        """Preprocess a validated TransactionRequest straight from its fields.
+
+        `model` is the model version the request is scored with (default: ours).
+        """
+        features = np.empty((1, N_MODEL_FEATURES))
+        row = features[0]
+        row[:AMOUNT_INDEX] = transaction.feature_values()
+        row[AMOUNT_INDEX] = (model or self.model_manager).amount_scaler.transform_one(transaction.amount)
+        row[DAY_PART_INDEX] = self._convert_to_day_part(transaction.timestamp)
+        return features
+
     def debug_features(self, features: np.ndarray) -> Dict[str, float]:
         """Debug helper to print feature values"""
         feature_dict = {}
@@ -74,22 +88,121 @@ class TransactionPreprocessor:
         feature_dict['day_part'] = features[29]
         return feature_dict
 
+    def _wall_clock(self, timestamp: Union[str, datetime]) -> Union[str, datetime]:
+        """Drop the UTC offset so day_part uses the local time written in the timestamp"""
+        if isinstance(timestamp, datetime):
+            return timestamp.replace(tzinfo=None)
+        if not timestamp[:4].isdigit():
+            # NumPy would accept words like 'today' that fromisoformat rejects
+            raise ValueError(f"Invalid timestamp format: {timestamp!r}")
+        if timestamp[-1] == 'Z':
+            return timestamp[:-1]
+        return timestamp[:10] + _UTC_OFFSET.sub('', timestamp[10:], count=1)
+
+    def _batch_day_parts(self, timestamps: list) -> np.ndarray:
+        """Convert all timestamps to day parts (0-3) at once"""
+        if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.datetime64):
+            stamps = timestamps.astype('datetime64[s]')
+            if np.isnat(stamps).any():
+                raise ValueError("Missing timestamp")
+            hours = (stamps - stamps.astype('datetime64[D]')).astype('timedelta64[h]')
+            return hours.astype(np.int64) // 6
+        try:
+            with warnings.catch_warnings():
+                # A timezone NumPy still sees would be silently converted to UTC
+                warnings.simplefilter('error')
+                stamps = np.array(
+                    [self._wall_clock(ts) for ts in timestamps], dtype='datetime64[s]'
+                )
+            if np.isnat(stamps).any():
+                raise ValueError("Invalid timestamp format")
+        except (ValueError, TypeError, AttributeError, Warning):
+            # Formats NumPy cannot read (e.g. ISO basic format) go through the row parser
+            stamps = np.array(
+                [self._parse_timestamp(ts).replace(tzinfo=None) for ts in timestamps],
+                dtype='datetime64[s]'
+            )
+        hours = (stamps - stamps.astype('datetime64[D]')).astype('timedelta64[h]')
+        return hours.astype(np.int64) // 6
+
+    def _assemble_features(
+        self,
+        v_features: np.ndarray,
+        amounts: np.ndarray,
+        day_parts: np.ndarray,
+        model=None
+    ) -> np.ndarray:
+        """Build the (n, 30) model input from columnar V1-V28, raw amounts and day parts"""
+        features = np.empty((len(amounts), N_MODEL_FEATURES))
+        features[:, :AMOUNT_INDEX] = v_features
+        features[:, AMOUNT_INDEX] = (model or self.model_manager).amount_scaler.transform(amounts)
+        features[:, DAY_PART_INDEX] = day_parts
+        return features
+
+    def _row_error(self, transactions: list[Dict[str, Any]], error: Exception) -> ValueError:
+        """Find the first transaction that fails on its own so the error names it"""
+        for index, transaction in enumerate(transactions):
+            try:
+                self.preprocess_transaction(transaction_data=transaction)
+            except ValueError as row_error:
+                transaction_id = transaction.get('transaction_id') if isinstance(transaction, dict) else None
+                return ValueError(
+                    f"Failed to preprocess batch: transaction {index} "
+                    f"({transaction_id}): {str(row_error)}"
+                )
+        return ValueError(f"Failed to preprocess batch: {str(error)}")
+
+    def preprocess_columns(
+        self,
+        v_features: np.ndarray,
+        amounts: np.ndarray,
+        timestamps: Sequence[Any],
+        model=None
+    ) -> np.ndarray:
+        """Preprocess transactions already split into columns (n x 28 V features, amounts, timestamps)"""
+        return self._assemble_features(
+            np.asarray(v_features, dtype=np.float64),
+            np.asarray(amounts, dtype=np.float64),
+            self._batch_day_parts(timestamps),
+            model
+        )
+
+    def preprocess_requests(self, transactions: Sequence[Any], model=None) -> np.ndarray:
+        """Preprocess validated TransactionRequest models.
+
+        Timestamps are already parsed and features already checked, so there is
+        no model_dump() and no row that can fail.
+        """
+        n = len(transactions)
+        v_features = np.fromiter(
+            chain.from_iterable(tx.feature_values() for tx in transactions),
+            dtype=np.float64,
+            count=n * len(V_FEATURE_NAMES)
+        ).reshape(n, len(V_FEATURE_NAMES))
+        amounts = np.fromiter((tx.amount for tx in transactions), dtype=np.float64, count=n)
+        # Wall-clock hour, whatever the UTC offset
+        day_parts = np.fromiter((tx.timestamp.hour // 6 for tx in transactions), dtype=np.int64, count=n)
+        return self._assemble_features(v_features, amounts, day_parts, model)
+
     def preprocess_batch(self, transactions: list[Dict[str, Any]]) -> np.ndarray:
         """Preprocess multiple transactions for prediction"""
+        if not transactions:
+            return np.empty((0, N_MODEL_FEATURES))
         try:
-            # Preporcess all transactions
-            feature_arrays = []
-            print(f"Raw Transaction: {transactions}")  # Debug
-            for transaction in transactions:
-                print(f"transaction: {transaction}")
-                features = self.preprocess_transaction(transaction_data=transaction)
-                feature_arrays.append(features.squeeze())  # (1,30) -> (30, )
-            
-            return np.array(feature_arrays)  # (n_transactions, 30)
+            # Pull every column out in one pass instead of preprocessing row by row
+            v_features = np.fromiter(
+                chain.from_iterable(_get_v_features(tx['features']) for tx in transactions),
+                dtype=np.float64,
+                count=len(transactions) * len(V_FEATURE_NAMES)
+            ).reshape(len(transactions), len(V_FEATURE_NAMES))
+            amounts = np.array([tx['amount'] for tx in transactions], dtype=np.float64)
+            timestamps = [tx['timestamp'] for tx in transactions]
+
+            return self.preprocess_columns(v_features, amounts, timestamps)  # (n_transactions, 30)
 
         except Exception as e:
-            raise ValueError(f"Failed to preprocess batch: {str(e)}")
+            raise self._row_error(transactions, e) from e
         
 
 # Create global preprocessor instance
-preprocessor = TransactionPreprocessor(model_manager=model_manager)
\ No newline at end of file
+preprocessor = TransactionPreprocessor(model_manager=model_registry)
\ No newline at end of file
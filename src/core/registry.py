@@ -0,0 +1,222 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import asyncio
+import logging
+import re
+import time
+import numpy as np
+from src.config import get_settings
+from src.config.constants import AMOUNT_INDEX, DAY_PART_INDEX, N_MODEL_FEATURES
+from src.monitoring.metrics import MODEL_RELOAD_TIME, MODEL_RELOADS, MODEL_VERSION
+from .model import ModelManager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Version names are single directory names under MODEL_REGISTRY_DIR
+_VERSION_NAME = re.compile(r'[A-Za-z0-9_.-]+')
+
+PrepareHook = Callable[[ModelManager], Awaitable[None]]
+
+
+class ModelRegistry:
+    """The model version serving predictions, replaceable without a restart.
+
+    reload() loads a version in a background thread, warms it up with sample
+    inferences, lets the prepare hooks get it ready (e.g. load it in the
+    inference worker processes) and only then swaps it in, with a single
+    assignment. Requests read `active` once and use that model throughout,
+    so requests in flight finish on the version they started with.
+
+    Versions are either the configured model files (MODEL_PATH and friends,
+    versioned by a hash of their contents) or named directories under
+    MODEL_REGISTRY_DIR holding files with the same names.
+
+    Without a model, the configured files are loaded by start() (the API
+    lifespan) or, for scripts and tests, on first use.
+
+    Attribute access falls through to the active ModelManager, so the
+    registry can stand in wherever a ModelManager is expected.
+    """
+
+    def __init__(
+        self,
+        model: Optional[ModelManager] = None,
+        registry_dir: Optional[str] = None,
+        warmup_rows: int = 256
+    ):
+        self.registry_dir = Path(registry_dir) if registry_dir else None
+        self.warmup_rows = warmup_rows
+        self.ready = False  # Set once start() has loaded and warmed the model
+        self._active: Optional[ModelManager] = None
+        self._prepare_hooks: List[PrepareHook] = []
+        self._lock = asyncio.Lock()
+        if model is not None:
+            self._set_active(model)
+
+    @property
+    def active(self) -> ModelManager:
+        """The model new requests should use"""
+        if self._active is None:
+            self._set_active(ModelManager(**self.paths()))
+        return self._active
+
+    def _set_active(self, model: ModelManager) -> None:
+        if self._active is not None:
+            # Zero the old version rather than clearing the gauge: clear() cannot reach
+            # other workers' series in multi-process mode, and warns there
+            MODEL_VERSION.labels(version=self._active.version).set(0)
+        self._active = model
+        MODEL_VERSION.labels(version=model.version).set(1)
+
+    async def start(self) -> None:
+        """Load the configured model off the event loop and warm it up"""
+        if self.ready:
+            return
+        model = self._active or await asyncio.to_thread(ModelManager, **self.paths())
+        await asyncio.to_thread(self.warmup, model)
+        # Also publishes the version from this process when the model came from a pre-fork parent
+        self._set_active(model)
+        self.ready = True
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.active, name)
+
+    def add_prepare_hook(self, hook: PrepareHook) -> None:
+        """Run `hook(model)` on every new version before it is swapped in"""
+        self._prepare_hooks.append(hook)
+
+    def paths(self, version: Optional[str] = None) -> Dict[str, str]:
+        """Model file paths of a named version, or the configured ones"""
+        if version is None:
+            return dict(
+                model_path=settings.MODEL_PATH,
+                scaler_path=settings.SCALER_PATH,
+                weights_path=settings.CLASS_WEIGHTS_PATH
+            )
+        if self.registry_dir is None:
+            raise ValueError("Named model versions need MODEL_REGISTRY_DIR")
+        if not _VERSION_NAME.fullmatch(version) or version in ('.', '..'):
+            raise ValueError(f"Invalid model version: {version!r}")
+        version_dir = self.registry_dir / version
+        if not version_dir.is_dir():
+            raise FileNotFoundError(f"Model version {version} not found")
+        paths = dict(
+            model_path=str(version_dir / Path(settings.MODEL_PATH).name),
+            scaler_path=str(version_dir / Path(settings.SCALER_PATH).name),
+            weights_path=str(version_dir / Path(settings.CLASS_WEIGHTS_PATH).name)
+        )
+        missing = [Path(path).name for path in paths.values() if not Path(path).is_file()]
+        if missing:
+            raise FileNotFoundError(f"Model version {version} is missing {', '.join(missing)}")
+        return paths
+
+    def warmup(self, model: ModelManager) -> None:
+        """Run sample inferences through every path a request can take"""
+        rng = np.random.default_rng(0)
+        rows = rng.normal(size=(self.warmup_rows, N_MODEL_FEATURES))
+        rows[:, AMOUNT_INDEX] = model.amount_scaler.transform(rng.uniform(1, 5000, self.warmup_rows))
+        rows[:, DAY_PART_INDEX] = rng.integers(0, 4, self.warmup_rows)
+        model.predict(rows[:1])
+        # Large enough to also reach XGBoost when the native engine serves small batches
+        model.batch_predict(rows)
+
+    async def reload(self, version: Optional[str] = None) -> Tuple[ModelManager, ModelManager]:
+        """Load, warm up and swap in a version; returns the new and previous models.
+
+        Nothing changes if any step fails.
+        """
+        async with self._lock:
+            start = time.perf_counter()
+            try:
+                paths = self.paths(version)
+                model = await asyncio.to_thread(ModelManager, version=version, **paths)
+                await asyncio.to_thread(self.warmup, model)
+                for hook in self._prepare_hooks:
+                    await hook(model)
+            except Exception:
+                MODEL_RELOADS.labels(result='error').inc()
+                raise
+            MODEL_RELOAD_TIME.observe(time.perf_counter() - start)
+
+            previous = self.active
+            self._set_active(model)
+            MODEL_RELOADS.labels(result='success').inc()
+            return model, previous
+
+
+class ModelWatcher:
+    """Reload the registry when the configured model files change.
+
+    Polls the files' size and modification time. A change is only picked up
+    once the files have stayed the same for a whole interval, so a
+    deployment copying three files does not trigger a reload halfway.
+    """
+
+    def __init__(self, registry: ModelRegistry, interval: float = 2.0):
+        self.registry = registry
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = None  # Signature of the files the active model came from
+        self._seen = None  # Signature at the previous check
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def signature(self) -> Optional[tuple]:
+        """(mtime, size) of each model file, or None while one is missing"""
+        try:
+            return tuple(
+                (stat.st_mtime_ns, stat.st_size)
+                for stat in (Path(path).stat() for path in self.registry.paths().values())
+            )
+        except FileNotFoundError:
+            return None
+
+    async def start(self) -> None:
+        """Start watching on the running event loop"""
+        if self.running:
+            return
+        self._loaded = self._seen = self.signature()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def check(self) -> bool:
+        """Reload if the files changed and have settled; returns whether it reloaded"""
+        current = self.signature()
+        settled = current is not None and current == self._seen
+        self._seen = current
+        if not settled or current == self._loaded:
+            return False
+        # Mark it loaded even on failure, so a broken file is not retried every interval
+        self._loaded = current
+        try:
+            model, previous = await self.registry.reload()
+        except Exception as e:
+            logger.error("Error reloading model: %s", e)
+            return False
+        logger.info("Model reloaded: %s -> %s", previous.version, model.version)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+
+# Create global model registry and watcher instances
+model_registry = ModelRegistry(
+    registry_dir=settings.MODEL_REGISTRY_DIR,
+    warmup_rows=settings.MODEL_WARMUP_ROWS
+)
+model_watcher = ModelWatcher(registry=model_registry, interval=settings.MODEL_WATCH_INTERVAL)
@@ -0,0 +1,36 @@
+from typing import Any
+import numpy as np
+
+
+class CompiledScaler:
+    """A fitted single-column StandardScaler reduced to two constants.
+
+    transform() does the same float64 operations as StandardScaler.transform
+    (subtract mean_, then divide by scale_), so results match bit for bit
+    without going through pandas or sklearn input validation.
+    """
+
+    def __init__(self, mean: float = 0.0, scale: float = 1.0):
+        self.mean = float(mean)
+        self.scale = float(scale)
+
+    @classmethod
+    def from_sklearn(cls, scaler: Any) -> "CompiledScaler":
+        """Precompute constants from a fitted single-feature StandardScaler"""
+        if getattr(scaler, 'n_features_in_', None) != 1:
+            raise ValueError("Only single-feature scalers can be compiled")
+        if not hasattr(scaler, 'mean_') or not hasattr(scaler, 'scale_'):
+            raise ValueError(f"Cannot compile scaler of type {type(scaler).__name__}")
+
+        # sklearn leaves mean_/scale_ as None when centering/scaling is disabled
+        mean = scaler.mean_[0] if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else 0.0
+        scale = scaler.scale_[0] if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else 1.0
+        return cls(mean=mean, scale=scale)
+
+    def transform_one(self, value: float) -> float:
+        """Scale a single value"""
+        return (value - self.mean) / self.scale
+
+    def transform(self, values: np.ndarray) -> np.ndarray:
+        """Scale a 1-D array of values"""
+        return (np.asarray(values, dtype=np.float64) - self.mean) / self.scale
@@ -0,0 +1,140 @@
+from typing import Any
+import json
+import numpy as np
+
+
+class FlatTreeEnsemble:
+    """XGBoost binary classifier compiled into flat NumPy node arrays.
+
+    All trees are concatenated into one set of arrays indexed by a global node id,
+    and nodes are renumbered so the right child always sits next to the left one.
+    A step down a tree is then `first_child[node] + (x >= threshold[node])`.
+    Leaves point back to themselves with a NaN threshold, so every row can walk
+    every tree for the same fixed number of steps with plain vectorized indexing -
+    no DMatrix and no input validation.
+    """
+
+    def __init__(
+        self,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        first_child: np.ndarray,
+        default_left: np.ndarray,
+        leaf_value: np.ndarray,
+        base_margin: float,
+        max_depth: int,
+        n_features: int
+    ):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.first_child = first_child
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.base_margin = base_margin
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    @classmethod
+    def from_xgboost(cls, model: Any) -> "FlatTreeEnsemble":
+        """Compile a fitted XGBClassifier (or Booster) into flat node arrays"""
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+
+        objective = learner['objective']['name']
+        if objective != 'binary:logistic':
+            raise ValueError(f"Unsupported objective: {objective}")
+        gbtree = learner['gradient_booster']
+        if gbtree['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster: {gbtree['name']}")
+
+        trees = gbtree['model']['trees']
+        # predict_proba stops at best_iteration when early stopping was used
+        best_iteration = booster.attributes().get('best_iteration')
+        if best_iteration is not None:
+            indptr = gbtree['model']['iteration_indptr']
+            trees = trees[:indptr[int(best_iteration) + 1]]
+
+        roots, feature, threshold, first_child, default_left, leaf_value = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError("Categorical splits are not supported")
+            order, depth = cls._sibling_order(tree['left_children'], tree['right_children'])
+            new_id = np.empty(len(order), dtype=np.int64)
+            new_id[order] = np.arange(len(order))
+
+            left = np.asarray(tree['left_children'], dtype=np.int64)[order]
+            is_leaf = left == -1
+            split_conditions = np.asarray(tree['split_conditions'], dtype=np.float64)[order]
+
+            roots.append(offset)
+            first_child.append(np.where(is_leaf, np.arange(len(order)), new_id[left]) + offset)
+            feature.append(np.where(is_leaf, 0, np.asarray(tree['split_indices'])[order]))
+            # A NaN threshold never compares true, so rows parked on a leaf stay there
+            threshold.append(np.where(is_leaf, np.nan, split_conditions))
+            default_left.append(is_leaf | np.asarray(tree['default_left'], dtype=bool)[order])
+            # A leaf's split condition holds its output value
+            leaf_value.append(np.where(is_leaf, split_conditions, 0.0))
+            max_depth = max(max_depth, depth)
+            offset += len(order)
+
+        # base_score is stored in probability space for binary:logistic
+        base_score = float(learner['learner_model_param']['base_score'])
+        return cls(
+            roots=np.asarray(roots, dtype=np.int64),
+            feature=np.concatenate(feature).astype(np.int64),
+            # XGBoost compares float32 inputs against float32 split conditions
+            threshold=np.concatenate(threshold).astype(np.float32),
+            first_child=np.concatenate(first_child),
+            default_left=np.concatenate(default_left),
+            leaf_value=np.concatenate(leaf_value).astype(np.float32),
+            base_margin=float(np.log(base_score / (1.0 - base_score))),
+            max_depth=max_depth,
+            n_features=int(learner['learner_model_param']['num_feature'])
+        )
+
+    @staticmethod
+    def _sibling_order(left: list, right: list) -> tuple[list, int]:
+        """Breadth-first node order in which both children of a split are adjacent.
+
+        Returns the original node ids in their new order and the tree depth.
+        """
+        order = [0]
+        level = [0]
+        depth = 0
+        while True:
+            level = [child for node in level if left[node] != -1 for child in (left[node], right[node])]
+            if not level:
+                return order, depth
+            order.extend(level)
+            depth += 1
+
+    def predict_margin(self, features: np.ndarray) -> np.ndarray:
+        """Raw log-odds for each row of an (n, n_features) matrix"""
+        X = np.asarray(features, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows) * self.n_features)[:, None]
+        has_missing = np.isnan(flat_X).any()
+
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_offset + self.feature.take(nodes))
+            go_right = values >= self.threshold.take(nodes)
+            if has_missing:
+                go_right = np.where(np.isnan(values), ~self.default_left.take(nodes), go_right)
+            nodes = self.first_child.take(nodes) + go_right
+
+        return self.base_margin + self.leaf_value.take(nodes).sum(axis=1, dtype=np.float64)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Fraud-class probability for each row"""
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(features)))
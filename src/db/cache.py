@@ -0,0 +1,124 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import time
+from src.config import get_settings
+from src.db.models import Prediction
+from src.monitoring.metrics import PREDICTION_CACHE_EVICTIONS, PREDICTION_CACHE_REQUESTS
+
+settings = get_settings()
+
+
+class CacheBackend(ABC):
+    """Storage behind PredictionCache.
+
+    Values are plain dicts of JSON-friendly fields (plus datetimes), so a shared
+    backend only has to serialize them.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value, or None when missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value, replacing any previous one"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop a value if present"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop everything"""
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """Per-process cache bounded by entry count, with least-recently-used eviction and a TTL"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            PREDICTION_CACHE_EVICTIONS.labels(reason='expired').inc()
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            PREDICTION_CACHE_EVICTIONS.labels(reason='capacity').inc()
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PredictionCache:
+    """Read-through cache of stored predictions keyed by transaction ID.
+
+    Only rows read back from the database are cached, so cached values always
+    match what GET would return from the database. Misses are not cached.
+    """
+
+    # Prediction columns kept in the cache
+    FIELDS = ('transaction_id', 'fraud_probability', 'is_fraud', 'processing_time', 'created_at')
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        # None disables caching
+        self.backend = backend
+
+    def get(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Cached prediction fields for a transaction"""
+        if self.backend is None:
+            return None
+        value = self.backend.get(transaction_id)
+        PREDICTION_CACHE_REQUESTS.labels(result='miss' if value is None else 'hit').inc()
+        return value
+
+    def put(self, prediction: Prediction) -> None:
+        """Cache a prediction that has been committed to the database"""
+        if self.backend is not None:
+            self.backend.set(
+                prediction.transaction_id,
+                {field: getattr(prediction, field) for field in self.FIELDS}
+            )
+
+    def put_many(self, predictions: Iterable[Prediction]) -> None:
+        for prediction in predictions:
+            self.put(prediction)
+
+    def invalidate(self, transaction_id: str) -> None:
+        """Forget a transaction, e.g. after its row was changed or removed"""
+        if self.backend is not None:
+            self.backend.delete(transaction_id)
+
+
+def create_cache_backend(name: str) -> Optional[CacheBackend]:
+    """Cache backend for the PREDICTION_CACHE_BACKEND setting"""
+    if name == "memory":
+        return InMemoryLRUBackend(max_size=settings.PREDICTION_CACHE_SIZE, ttl=settings.PREDICTION_CACHE_TTL)
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown prediction cache backend: {name}")
+
+
+# Create global prediction cache instance
+prediction_cache = PredictionCache(backend=create_cache_backend(settings.PREDICTION_CACHE_BACKEND))
@@ -1,10 +1,118 @@
 from fastapi import Depends
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Optional, Dict, Any, Tuple
 from src.db.models import Prediction
-from src.db.database import get_db
+from src.db.database import get_db, get_async_db
 from datetime import datetime
+import base64
+import binascii
+import json
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING ... RETURNING
+_CONFLICT_AWARE_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# Rows per multi-row INSERT, keeps bind parameters well under driver limits
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def _split_repeated(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Keep the first record per transaction_id, report the repeats"""
+    rows, repeated, seen = [], [], set()
+    for record in records:
+        if record['transaction_id'] in seen:
+            repeated.append(record['transaction_id'])
+            continue
+        seen.add(record['transaction_id'])
+        rows.append(record)
+    return rows, repeated
+
+
+def _bulk_insert_statements(dialect_name: str, rows: List[Dict[str, Any]]):
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING statements for rows.
+
+    Returns None when the dialect has no ON CONFLICT support.
+    """
+    insert = _CONFLICT_AWARE_INSERTS.get(dialect_name)
+    if insert is None:
+        return None
+    return [
+        insert(Prediction)
+        .values(rows[start:start + BULK_INSERT_CHUNK_SIZE])
+        .on_conflict_do_nothing(index_elements=[Prediction.transaction_id])
+        .returning(Prediction)
+        for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE)
+    ]
+
+
+def _not_stored(rows: List[Dict[str, Any]], created: List[Prediction]) -> List[str]:
+    """Transaction IDs of rows the database skipped"""
+    stored = {prediction.transaction_id for prediction in created}
+    return [row['transaction_id'] for row in rows if row['transaction_id'] not in stored]
+
+
+def encode_cursor(prediction: Prediction) -> str:
+    """Opaque token pointing just past a prediction in list order"""
+    position = json.dumps([prediction.created_at.isoformat(), prediction.id])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) of the last row on the previous page"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, prediction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(prediction_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _page_query(
+    limit: int,
+    cursor: Optional[str] = None,
+    is_fraud: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+):
+    """Newest-first page of predictions, continuing after `cursor`.
+
+    Keyset pagination on (created_at, id): each page starts where the previous
+    one ended through the index, so deep pages cost the same as the first.
+    One extra row is fetched to tell whether another page follows.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    query = select(Prediction)
+    if cursor is not None:
+        query = query.where(tuple_(Prediction.created_at, Prediction.id) < decode_cursor(cursor))
+    if is_fraud is not None:
+        query = query.where(Prediction.is_fraud == is_fraud)
+    if min_amount is not None:
+        query = query.where(Prediction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Prediction.amount <= max_amount)
+    if start_time is not None:
+        query = query.where(Prediction.created_at >= start_time)
+    if end_time is not None:
+        query = query.where(Prediction.created_at < end_time)
+    return query.order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit + 1)
+
+
+def _split_page(rows: List[Prediction], limit: int) -> Tuple[List[Prediction], Optional[str]]:
+    """A page of at most `limit` rows and the cursor of the next page, if any"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
+
 
 class PredictionCRUD:
     """CRUD operations for predictions."""
@@ -18,7 +126,8 @@ class PredictionCRUD:
         amount: float,
         fraud_probability: float,
         is_fraud: bool,
-        processing_time: float
+        processing_time: float,
+        model_version: Optional[str] = None
     ) -> Prediction:
         """Create a new prediction record."""
         db_prediction = Prediction(
@@ -26,7 +135,8 @@ class PredictionCRUD:
             amount=amount,
             fraud_probability=fraud_probability,
             is_fraud=is_fraud,
-            processing_time=processing_time
+            processing_time=processing_time,
+            model_version=model_version
         )
         try: 
             self.db.add(db_prediction)
@@ -37,7 +147,56 @@ class PredictionCRUD:
             self.db.rollback()
             raise ValueError(f"Transaction {transaction_id} already exists")
 
-    
+    def create_predictions_bulk(
+        self,
+        records: List[Dict[str, Any]]
+    ) -> Tuple[List[Prediction], List[str]]:
+        """Insert many prediction records in a single transaction.
+
+        Rows whose transaction_id already exists (in the table or earlier in
+        the same batch) are skipped instead of failing the whole batch.
+        Returns the stored predictions and the skipped transaction IDs.
+        """
+        rows, conflicts = _split_repeated(records)
+        if not rows:
+            return [], conflicts
+
+        statements = _bulk_insert_statements(self.db.get_bind().dialect.name, rows)
+        created = []
+        try:
+            if statements is not None:
+                # One multi-row INSERT per chunk; RETURNING hands back ids and created_at
+                for stmt in statements:
+                    created.extend(self.db.scalars(stmt).all())
+            else:
+                created.extend(self._insert_each_with_savepoint(rows))
+
+            # Detach before commit so the returned rows are not expired and reloaded
+            for prediction in created:
+                self.db.expunge(prediction)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return created, conflicts + _not_stored(rows, created)
+
+    def _insert_each_with_savepoint(self, rows: List[Dict[str, Any]]) -> List[Prediction]:
+        """Fallback for dialects without ON CONFLICT: one savepoint per row"""
+        created = []
+        for row in rows:
+            prediction = Prediction(**row)
+            try:
+                with self.db.begin_nested():
+                    self.db.add(prediction)
+            except IntegrityError:
+                continue
+            created.append(prediction)
+        self.db.flush()
+        for prediction in created:
+            self.db.refresh(prediction)
+        return created
+
     def get_prediction(self, transaction_id: str) -> Optional[Prediction]:
         """Get prediction by transaction ID"""
         return self.db.query(Prediction).filter(
@@ -49,7 +208,126 @@ class PredictionCRUD:
         """Get list of predictions with pagination"""
         return self.db.query(Prediction).offset(skip).limit(limit).all()
 
+    def list_predictions_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        **filters: Any
+    ) -> Tuple[List[Prediction], Optional[str]]:
+        """Newest-first page of predictions and the cursor for the next page.
+
+        Filters: is_fraud, min_amount, max_amount, start_time, end_time.
+        """
+        rows = self.db.scalars(_page_query(limit, cursor, **filters)).all()
+        return _split_page(list(rows), limit)
+
     
     def get_prediction_count(self) -> int:
         """Get total count of prediction"""
-        return self.db.query(Prediction).count()
\ No newline at end of file
+        return self.db.query(Prediction).count()
+
+
+class AsyncPredictionCRUD:
+    """Async CRUD operations for predictions, used by the API routes."""
+
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
+        self.db = db
+
+    async def create_prediction(
+        self,
+        transaction_id: str,
+        amount: float,
+        fraud_probability: float,
+        is_fraud: bool,
+        processing_time: float,
+        model_version: Optional[str] = None
+    ) -> Prediction:
+        """Create a new prediction record."""
+        db_prediction = Prediction(
+            transaction_id=transaction_id,
+            amount=amount,
+            fraud_probability=fraud_probability,
+            is_fraud=is_fraud,
+            processing_time=processing_time,
+            model_version=model_version
+        )
+        try:
+            self.db.add(db_prediction)
+            await self.db.commit()
+            await self.db.refresh(db_prediction)
+            return db_prediction
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError(f"Transaction {transaction_id} already exists")
+
+    async def create_predictions_bulk(
+        self,
+        records: List[Dict[str, Any]]
+    ) -> Tuple[List[Prediction], List[str]]:
+        """Insert many prediction records in a single transaction.
+
+        Same contract as PredictionCRUD.create_predictions_bulk.
+        """
+        rows, conflicts = _split_repeated(records)
+        if not rows:
+            return [], conflicts
+
+        statements = _bulk_insert_statements(self.db.get_bind().dialect.name, rows)
+        created = []
+        try:
+            if statements is not None:
+                for stmt in statements:
+                    created.extend((await self.db.scalars(stmt)).all())
+            else:
+                created.extend(await self._insert_each_with_savepoint(rows))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        return created, conflicts + _not_stored(rows, created)
+
+    async def _insert_each_with_savepoint(self, rows: List[Dict[str, Any]]) -> List[Prediction]:
+        """Fallback for dialects without ON CONFLICT: one savepoint per row"""
+        created = []
+        for row in rows:
+            prediction = Prediction(**row)
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(prediction)
+            except IntegrityError:
+                continue
+            created.append(prediction)
+        await self.db.flush()
+        for prediction in created:
+            await self.db.refresh(prediction)
+        return created
+
+    async def get_prediction(self, transaction_id: str) -> Optional[Prediction]:
+        """Get prediction by transaction ID"""
+        result = await self.db.scalars(
+            select(Prediction).where(Prediction.transaction_id == transaction_id).limit(1)
+        )
+        return result.first()
+
+    async def list_predictions(self, skip: int = 0, limit: int = 100) -> List[Prediction]:
+        """Get list of predictions with pagination"""
+        result = await self.db.scalars(select(Prediction).offset(skip).limit(limit))
+        return list(result.all())
+
+    async def list_predictions_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        **filters: Any
+    ) -> Tuple[List[Prediction], Optional[str]]:
+        """Newest-first page of predictions and the cursor for the next page.
+
+        Same contract as PredictionCRUD.list_predictions_page.
+        """
+        result = await self.db.scalars(_page_query(limit, cursor, **filters))
+        return _split_page(list(result.all()), limit)
+
+    async def get_prediction_count(self) -> int:
+        """Get total count of prediction"""
+        return await self.db.scalar(select(func.count()).select_from(Prediction))
@@ -1,17 +1,31 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from functools import lru_cache
 from src.config import get_settings
 
 settings = get_settings()
 
-# Create database engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
+# Connection pool settings shared by the sync and async engines
+POOL_OPTIONS = dict(
     pool_size=5,  # Maximum number of database connections in the pool
     max_overflow=10,  # Maximum number of connections that can be created beyond pool_size
     pool_timeout=30,  # Seconds to wait before giving up on getting a connection from the pool
     pool_recycle=1800,  # Recycle connections after 30 minutes
+)
+
+# Async driver used for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+# Create database engine with connection pooling
+engine = create_engine(
+    settings.DATABASE_URL,
+    **POOL_OPTIONS,
     echo=False  # Set to True to log all SQL queries (development only)
 )
 
@@ -34,4 +48,57 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def to_async_url(database_url: str) -> URL:
+    """Swap the driver of a database URL for its async counterpart"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+# Created on first use so the async driver is only needed when it is used
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """Get the async database engine"""
+    return create_async_engine(
+        to_async_url(settings.DATABASE_URL),
+        **POOL_OPTIONS,
+        echo=False
+    )
+
+
+@lru_cache()
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Get the async session factory"""
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def dispose_inherited_pools() -> None:
+    """Forget connections inherited across fork() without closing them.
+
+    The parent still owns those connections; the child opens its own on
+    first use.
+    """
+    engine.dispose(close=False)
+    if get_async_engine.cache_info().currsize:
+        get_async_engine().sync_engine.dispose(close=False)
+    get_async_sessionmaker.cache_clear()
+    get_async_engine.cache_clear()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session
+    Yields:
+        AsyncSession: Database session
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,11 +1,30 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
 from src.db.database import engine
-from src.db.models import Base
+from src.db.models import Base, Prediction
+
+
+def upgrade_schema(bind: Engine = engine) -> None:
+    """Bring tables created by an older version up to date; safe to run on every start.
+
+    create_all() never alters a table that already exists, and init.sql only
+    runs on an empty Postgres volume.
+    """
+    columns = {column['name'] for column in inspect(bind).get_columns(Prediction.__tablename__)}
+    if 'model_version' not in columns:
+        with bind.begin() as connection:
+            connection.execute(text("ALTER TABLE predictions ADD COLUMN model_version VARCHAR(64)"))
+    # Keyset pagination indexes; without them cursor paging sorts the whole table
+    for index in Prediction.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
 
 def init_db():
     """Initialize database with required tables"""
     try:
         # Create all tables using our existing engine 
         Base.metadata.create_all(bind=engine)
+        upgrade_schema()
         print("Successfully initialized database tables")
     except Exception as e:
         print(f"Error initializing database tables: {str(e)}")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from src.db.database import Base
 
@@ -12,11 +13,20 @@ class Prediction(Base):
     fraud_probability = Column(Numeric(5, 4), nullable=False)
     is_fraud = Column(Boolean, nullable=False)
     processing_time = Column(Numeric(10, 2), nullable=False)
+    model_version = Column(String(64), nullable=True)  # Version that scored it; empty for older rows
     created_at = Column(
-        DateTime(timezone=True),
+        # SQLite's CURRENT_TIMESTAMP has whole seconds; store bound values the same
+        # way so they compare correctly against server defaults as text
+        DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
         server_default=func.now(),
         nullable=False
     )
 
+    __table_args__ = (
+        # Keyset pagination: newest first, optionally per fraud flag
+        Index("ix_predictions_created_at_id", "created_at", "id"),
+        Index("ix_predictions_is_fraud_created_at_id", "is_fraud", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Prediction(transaction_id={self.transaction_id}, is_fraud={self.is_fraud})>"
\ No newline at end of file
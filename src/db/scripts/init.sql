@@ -12,5 +12,14 @@ CREATE TABLE IF NOT EXISTS predictions (
     fraud_probability DECIMAL(5,4) NOT NULL,
     is_fraud BOOLEAN NOT NULL,
     processing_time DECIMAL(10,2) NOT NULL,
+    model_version VARCHAR(64),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Tables and indexes from older versions are upgraded by src.db.init_db on every start
+
+-- Indexes for keyset pagination on (created_at, id), newest first
+CREATE INDEX IF NOT EXISTS ix_predictions_created_at_id
+    ON predictions (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_predictions_is_fraud_created_at_id
+    ON predictions (is_fraud, created_at, id);
@@ -10,5 +10,5 @@ echo "Database is ready!"
 # Initialize database using existing engine configuration
 python -m src.db.init_db                                  
 
-# Start the application 
-uvicorn src.api.app:app --host 0.0.0.0 --port 8000      
\ No newline at end of file
+# Start the application: the model is loaded once and shared by SERVER_WORKERS forked workers
+exec python -m src.server --host 0.0.0.0 --port 8000      
\ No newline at end of file
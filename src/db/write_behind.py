@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Tuple, Callable
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import get_settings
+from src.db.crud import AsyncPredictionCRUD
+from src.db.database import get_async_sessionmaker
+from src.db.models import Prediction
+from src.monitoring.metrics import (
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_DROPPED,
+    WRITE_BEHIND_FLUSH_LATENCY,
+    WRITE_BEHIND_QUEUE_DEPTH,
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Put on the queue by stop() to tell the flusher to finish
+_STOP = object()
+
+
+class PredictionWriteBehind:
+    """Queue prediction records in memory and write them to the database in batches.
+
+    Requests return as soon as their record is queued. A background flusher
+    writes a batch once it holds batch_size records or flush_interval seconds
+    after its first record, whichever comes first. When the queue is full,
+    enqueue waits for room (backpressure). Records stay visible through
+    get_pending() until they are written.
+    """
+
+    # Attempts per batch before its records are dropped
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        session_factory: Optional[Callable[[], AsyncSession]] = None
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Defaults to the app's async session factory, resolved on first write
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._pending: Dict[str, Prediction] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    async def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the flusher"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._flusher
+        self._flusher = None
+
+    def get_pending(self, transaction_id: str) -> Optional[Prediction]:
+        """A queued prediction that has not been written yet"""
+        return self._pending.get(transaction_id)
+
+    async def enqueue_many(
+        self,
+        records: List[Dict[str, Any]]
+    ) -> Tuple[List[Prediction], List[str]]:
+        """Queue prediction records for writing.
+
+        Returns the queued predictions and the transaction IDs skipped because
+        they are already queued, mirroring PredictionCRUD.create_predictions_bulk.
+        """
+        if not self.running:
+            raise RuntimeError("Write-behind queue is not running")
+
+        created, conflicts = [], []
+        now = datetime.now(timezone.utc)
+        for record in records:
+            transaction_id = record['transaction_id']
+            if transaction_id in self._pending:
+                conflicts.append(transaction_id)
+                continue
+            record = {**record, 'created_at': now}
+            prediction = Prediction(**record)
+            self._pending[transaction_id] = prediction
+            # Waits here when the queue is full
+            await self._queue.put(record)
+            created.append(prediction)
+
+        WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+        return created, conflicts
+
+    async def enqueue(self, **record: Any) -> Prediction:
+        """Queue a single prediction record"""
+        created, _ = await self.enqueue_many([record])
+        if not created:
+            raise ValueError(f"Transaction {record['transaction_id']} already exists")
+        return created[0]
+
+    async def _run(self) -> None:
+        """Write batches from the queue until stopped"""
+        while True:
+            batch, stopping = await self._next_batch()
+            await self._flush(batch)
+            if stopping:
+                # Shutdown was requested: write whatever is left without waiting
+                while not self._queue.empty():
+                    size = min(self.batch_size, self._queue.qsize())
+                    await self._flush([self._queue.get_nowait() for _ in range(size)])
+                return
+
+    async def _next_batch(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Wait until a batch is full or its time is up; also reports a stop request"""
+        loop = asyncio.get_running_loop()
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Write one batch, retrying on database errors"""
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                try:
+                    _, conflicts = await self._write(batch)
+                except Exception as e:
+                    if attempt == self.MAX_ATTEMPTS:
+                        logger.error("Dropping %d queued predictions: %s", len(batch), e)
+                        WRITE_BEHIND_DROPPED.labels(reason='error').inc(len(batch))
+                        return
+                    await asyncio.sleep(0.1 * attempt)
+                else:
+                    if conflicts:
+                        logger.warning("Queued predictions already stored, skipped: %s", conflicts)
+                        WRITE_BEHIND_DROPPED.labels(reason='conflict').inc(len(conflicts))
+                    return
+        finally:
+            for record in batch:
+                self._pending.pop(record['transaction_id'], None)
+            WRITE_BEHIND_BATCH_SIZE.observe(len(batch))
+            WRITE_BEHIND_FLUSH_LATENCY.observe(time.perf_counter() - start)
+            WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> Tuple[List[Prediction], List[str]]:
+        """Bulk insert a batch on a session of its own"""
+        session_factory = self.session_factory or get_async_sessionmaker()
+        async with session_factory() as db:
+            return await AsyncPredictionCRUD(db=db).create_predictions_bulk(batch)
+
+
+# Create global write-behind queue instance
+write_behind = PredictionWriteBehind(
+    max_queue_size=settings.WRITE_BEHIND_QUEUE_SIZE,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL
+)
@@ -0,0 +1,130 @@
+from typing import Optional
+from bisect import bisect_right
+import numpy as np
+
+# Added to every bin density so empty bins don't divide by zero
+PSI_EPSILON = 1e-10
+
+
+def histogram_density(counts: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    """Bin densities computed the same way as np.histogram(..., density=True)"""
+    return counts / np.diff(bin_edges) / counts.sum()
+
+
+def psi_from_densities(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI = Σ (Actual% - Expected%) * ln(Actual% / Expected%)"""
+    expected = expected + PSI_EPSILON
+    actual = actual + PSI_EPSILON
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def fixed_bin_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    """Equal-width edges spanning the values, as np.histogram would pick them"""
+    lo, hi = float(values.min()), float(values.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def bin_index(values, bin_edges: np.ndarray):
+    """Bin of each value; values outside the edges go to the first or last bin"""
+    index = np.searchsorted(bin_edges, values, side='right') - 1
+    return np.clip(index, 0, len(bin_edges) - 2)
+
+
+class DriftAccumulator:
+    """Sliding-window PSI for a single stream of values.
+
+    The last `window_size` values are kept in a fixed-size ring buffer, split
+    into the newest `recent_size` values and the older (historical) ones.
+    Per-bin counts for both parts are updated as values come and go, so an
+    observation costs O(1) and psi() costs O(bins).
+
+    Bin edges are fixed: either given up front (e.g. [0, 1] for probabilities)
+    or taken from the range of the first full window. psi() matches
+    calculate_psi(historical, recent, bin_edges=self.bin_edges).
+    """
+
+    def __init__(
+        self,
+        window_size: int = 1000,
+        recent_size: int = 100,
+        bins: int = 10,
+        bin_edges: Optional[np.ndarray] = None
+    ):
+        if not 0 < recent_size < window_size:
+            raise ValueError("recent_size must be between 0 and window_size")
+        self.window_size = window_size
+        self.recent_size = recent_size
+        self.bins = bins
+        self.bin_edges = None
+        self._edges: list[float] = []  # Inner edges as a list, for bisect
+        if bin_edges is not None:
+            self._set_edges(np.asarray(bin_edges, dtype=np.float64))
+        self._values = np.empty(window_size, dtype=np.float64)
+        self._bin = np.zeros(window_size, dtype=np.intp)
+        self._historical = np.zeros(bins, dtype=np.int64)
+        self._recent = np.zeros(bins, dtype=np.int64)
+        self._count = 0  # Total values seen
+
+    @property
+    def ready(self) -> bool:
+        """Whether a full window has been seen"""
+        return self._count >= self.window_size
+
+    def update(self, value: float) -> None:
+        """Add one value, pushing out the oldest once the window is full"""
+        pos = self._count % self.window_size
+        self._count += 1
+
+        if self._count <= self.window_size:
+            # Still filling the first window
+            self._values[pos] = value
+            if self._count == self.window_size:
+                self._start_counting()
+            return
+
+        # The oldest value leaves the window, the one that stops being recent
+        # becomes historical, and the new value becomes recent
+        self._historical[self._bin[pos]] -= 1
+        aging = self._bin[(pos - self.recent_size) % self.window_size]
+        self._recent[aging] -= 1
+        self._historical[aging] += 1
+
+        # Same bin as bin_index(), without NumPy overhead for a single value
+        new_bin = bisect_right(self._edges, value)
+        self._values[pos] = value
+        self._bin[pos] = new_bin
+        self._recent[new_bin] += 1
+
+    def _set_edges(self, bin_edges: np.ndarray) -> None:
+        self.bin_edges = bin_edges
+        self._edges = bin_edges[1:-1].tolist()
+        self._widths = np.diff(bin_edges)
+
+    def _start_counting(self) -> None:
+        """Fix the bin edges and count the first full window"""
+        if self.bin_edges is None:
+            self._set_edges(fixed_bin_edges(self._values, self.bins))
+        self._bin[:] = bin_index(self._values, self.bin_edges)
+        split = self.window_size - self.recent_size
+        self._historical[:] = np.bincount(self._bin[:split], minlength=self.bins)
+        self._recent[:] = np.bincount(self._bin[split:], minlength=self.bins)
+
+    def window(self) -> tuple[np.ndarray, np.ndarray]:
+        """Historical and recent values in arrival order"""
+        n = min(self._count, self.window_size)
+        start = self._count % self.window_size if self.ready else 0
+        values = np.roll(self._values, -start)[:n]
+        split = max(n - self.recent_size, 0)
+        return values[:split], values[split:]
+
+    def psi(self) -> float:
+        """PSI of the recent values against the historical ones"""
+        if not self.ready:
+            return np.nan
+        # Same arithmetic as histogram_density(), with the widths and totals known
+        return psi_from_densities(
+            self._historical / self._widths / (self.window_size - self.recent_size),
+            self._recent / self._widths / self.recent_size
+        )
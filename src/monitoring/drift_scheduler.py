@@ -0,0 +1,59 @@
+from typing import Optional
+import asyncio
+import logging
+from src.config import get_settings
+from src.monitoring.metrics import refresh_drift_metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class DriftScheduler:
+    """Refresh the drift gauges in the background at a fixed interval.
+
+    Used when DRIFT_MODE is "scheduled": requests only queue their observations
+    and this applies them and recomputes PSI once per interval, so the cost of
+    drift monitoring does not grow with the request rate.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start refreshing on the running event loop"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop refreshing, applying whatever observations are still queued"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.refresh()
+
+    async def refresh(self) -> None:
+        """Run one refresh off the event loop"""
+        try:
+            await asyncio.to_thread(refresh_drift_metrics)
+        except Exception as e:
+            logger.error("Error refreshing drift metrics: %s", e)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+
+# Create global drift scheduler instance
+drift_scheduler = DriftScheduler(interval=settings.DRIFT_REFRESH_INTERVAL)
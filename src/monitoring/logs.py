@@ -0,0 +1,165 @@
+"""Structured logging that never blocks the caller.
+
+Modules log through `logging.getLogger(__name__)` as usual. configure_logging()
+gives the `src` loggers a handler that puts records on a bounded queue, and a
+writer thread formats them (one JSON object per line by default) and writes
+them to stderr. A request pays for creating the record and nothing more; if
+the writer falls behind, records are dropped rather than waited for.
+
+Log with %-style arguments so payloads are only formatted, by the writer,
+when their level is enabled:
+
+    logger.debug("Raw fraud probabilities: %s", probabilities)
+
+Pass fields for the JSON output with `extra`. Records queue as they are, so
+don't mutate logged arguments afterwards.
+
+Before the queue, each message type (the unformatted message) is:
+    - sampled: LOG_SAMPLE_RATES keeps that fraction of its records
+    - rate limited: at most LOG_RATE_LIMIT records per second, in bursts of
+      up to LOG_RATE_BURST; the next record let through carries the number
+      suppressed in between
+"""
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from src.config import get_settings
+
+settings = get_settings()
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed in `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Sample and rate limit records per message type.
+
+    Runs in the logging thread, so it only does a dict lookup and a little
+    arithmetic. Counts are approximate when several threads log at once.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_rates = sample_rates or {}
+        self.sampled_out = 0
+        self.rate_limited = 0
+        self._buckets: Dict[str, list] = {}  # message -> [tokens, last refill, suppressed since last record]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        sample_rate = self.sample_rates.get(key)
+        if sample_rate is not None and random.random() >= sample_rate:
+            self.sampled_out += 1
+            return False
+        if self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            self.rate_limited += 1
+            return False
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full and leaves formatting to the writer"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves this process, so the record can go unformatted
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> NonBlockingQueueHandler:
+    """Send the `src` loggers through the queue to the writer thread; safe to call again"""
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT, settings.LOG_RATE_BURST, settings.LOG_SAMPLE_RATES))
+    _listener = QueueListener(_handler.queue, output)
+    _listener.start()
+
+    logger = logging.getLogger("src")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.addHandler(_handler)
+    atexit.register(stop_logging)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+    return _handler
+
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork() -> None:
+    """The writer thread does not survive fork(); give the child its own queue and writer"""
+    global _listener
+    if _handler is None or _listener is None:
+        return
+    _handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(_handler.queue, *_listener.handlers)
+    _listener.start()
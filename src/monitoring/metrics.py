@@ -1,6 +1,13 @@
-from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge, REGISTRY
+from prometheus_client.multiprocess import MultiProcessCollector
+from collections import deque
+import logging
+import os
+import time
 import numpy as np
-from typing import Dict, List
+from typing import Deque, Dict, List, Optional, Tuple
+from src.config import get_settings
+from src.monitoring.drift import DriftAccumulator, histogram_density, psi_from_densities
 
 # Essential Business Metrics
 FRAUD_COUNTER = Counter(
@@ -35,6 +42,107 @@ PREDICTION_TIME = Histogram(
     buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1]
 )
 
+STAGE_TIME = Histogram(
+    'request_stage_seconds',
+    'Time spent in each stage of a request',
+    ['endpoint', 'stage'],  # stage: parse, preprocess, inference, persist, metrics or serialize
+    buckets=[0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5]
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'inference_queue_depth',
+    'Inference calls submitted to the executor and not yet finished',
+    multiprocess_mode='livesum'
+)
+
+INFERENCE_TIMEOUTS = Counter(
+    'inference_timeouts_total',
+    'Inference calls that exceeded the executor timeout'
+)
+
+COALESCED_BATCH_SIZE = Histogram(
+    'coalesced_batch_size',
+    'Number of single-transaction requests merged into one model call',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+COALESCER_QUEUE_WAIT = Histogram(
+    'coalescer_queue_wait_seconds',
+    'Time a request waits in the coalescer before its batch is sent',
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01]
+)
+
+# Startup Metrics
+STARTUP_TIME = Gauge(
+    'startup_seconds',
+    'Time from process launch until the API was ready to serve',
+    multiprocess_mode='liveall'
+)
+
+# Model Registry Metrics
+MODEL_VERSION = Gauge(
+    'model_version_info',
+    'Model version currently serving predictions (1), or replaced by a reload (0)',
+    ['version'],
+    multiprocess_mode='liveall'
+)
+
+MODEL_RELOADS = Counter(
+    'model_reloads_total',
+    'Model reload attempts',
+    ['result']  # 'success' or 'error'
+)
+
+MODEL_RELOAD_TIME = Histogram(
+    'model_reload_seconds',
+    'Time taken to load and warm up a new model version',
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+
+MODEL_PREDICTIONS = Counter(
+    'model_predictions_total',
+    'Predictions made by each model version',
+    ['model_version']
+)
+
+# Write-behind Persistence Metrics
+WRITE_BEHIND_QUEUE_DEPTH = Gauge(
+    'write_behind_queue_depth',
+    'Prediction records waiting to be written',
+    multiprocess_mode='livesum'
+)
+
+WRITE_BEHIND_BATCH_SIZE = Histogram(
+    'write_behind_batch_size',
+    'Prediction records written per flush',
+    buckets=[1, 10, 50, 100, 250, 500, 1000]
+)
+
+WRITE_BEHIND_FLUSH_LATENCY = Histogram(
+    'write_behind_flush_seconds',
+    'Time taken to write one batch of queued predictions',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0]
+)
+
+WRITE_BEHIND_DROPPED = Counter(
+    'write_behind_dropped_total',
+    'Queued prediction records that were not written',
+    ['reason']  # 'conflict' or 'error'
+)
+
+# Prediction Cache Metrics
+PREDICTION_CACHE_REQUESTS = Counter(
+    'prediction_cache_requests_total',
+    'Prediction cache lookups',
+    ['result']  # 'hit' or 'miss'
+)
+
+PREDICTION_CACHE_EVICTIONS = Counter(
+    'prediction_cache_evictions_total',
+    'Entries removed from the prediction cache',
+    ['reason']  # 'capacity' or 'expired'
+)
+
 # Model Drift Metrics
 PREDICTION_DISTRIBUTION = Histogram(
     'prediction_distribution',
@@ -45,24 +153,79 @@ PREDICTION_DISTRIBUTION = Histogram(
 FEATURE_DRIFT = Gauge(
     'feature_drift',
     'Feature drift score for each feature',
-    ['feture_name']
+    ['feature_name'],
+    multiprocess_mode='liveall'
 )
 
 MODEL_DRIFT_SCORE = Gauge(
     'model_drift_score',
-    'Overall model drift score'
+    'Overall model drift score',
+    multiprocess_mode='liveall'
 )
 
 PSI_SCORE = Gauge(
     'population_stability_index',
     'PSI score of detecting distribution shifts',
-    ['feature_name']
+    ['feature_name'],
+    multiprocess_mode='liveall'
+)
+
+DRIFT_COMPUTATION_TIME = Histogram(
+    'drift_computation_seconds',
+    'Time taken to update drift windows and recompute the drift gauges',
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5]
 )
 
-# Reference distribution for drift detection
-REFERENCE_DISTRIBUTIONS: Dict[str, List[float]] = {}  # { 'V1': [....], 'V2':[...] ... 'amount':[...], 'day_part':[...] }
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Fallback start time where the process launch time cannot be read
+_IMPORTED_AT = time.monotonic()
 
-def calculate_psi(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float:
+def process_uptime() -> float:
+    """Seconds since this process was launched (since this module was imported off Linux)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 is the start time in clock ticks after boot; skip past the command name
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose on /metrics.
+
+    Under the pre-fork server (src/server.py) every worker writes its metrics
+    to files in PROMETHEUS_MULTIPROC_DIR, and this collects them all, so a
+    scrape reaching any worker sees the whole server.
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+# Sliding windows for drift detection
+DRIFT_WINDOW_SIZE = 1000
+DRIFT_RECENT_SIZE = 100
+DRIFT_ACCUMULATORS: Dict[str, DriftAccumulator] = {}  # { 'V1': ..., 'V28': ... }
+PREDICTION_ACCUMULATOR = DriftAccumulator(
+    window_size=DRIFT_WINDOW_SIZE,
+    recent_size=DRIFT_RECENT_SIZE,
+    bin_edges=np.linspace(0, 1, 11)  # Probabilities always fall in [0, 1]
+)
+# Observations waiting for the next scheduled refresh. Anything older than a
+# full window would be pushed out of the windows anyway, so it is not kept.
+PENDING_DRIFT_OBSERVATIONS: Deque[Tuple[Dict[str, float], float]] = deque(maxlen=DRIFT_WINDOW_SIZE)
+
+def calculate_psi(
+    expected: np.ndarray,
+    actual: np.ndarray,
+    bins: int = 10,
+    bin_edges: Optional[np.ndarray] = None
+) -> float:
     """
     PSI = Σ (Actual% - Expected%) * ln(Actual% / Expected%)
     
@@ -70,43 +233,36 @@ def calculate_psi(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> f
     PSI < 0.1: No significant change
     0.1 <= PSI < 0.2: Moderate change
     PSI >= 0.2: Significant change
+
+    Without bin_edges, `bins` equal-width bins span both distributions. With
+    bin_edges, values outside them are counted in the first or last bin.
     """
     # Input validation
     if len(expected) < 2 or len(actual) < 2:
         return np.nan
         
     try:
-        # Create histograms with same bins for both distributions
-        hist_range = (min(expected.min(), actual.min()), max(expected.max(), actual.max()))
-        expected_hist, bin_edges = np.histogram(expected, bins=bins, range=hist_range, density=True)
-        actual_hist, _ = np.histogram(actual, bins=bin_edges, density=True)
-        
-        # Add small epsilon to avoid division by zero
-        epsilon = 1e-10
-        expected_hist = expected_hist + epsilon
-        actual_hist = actual_hist + epsilon
-        
-        # Calculate PSI
-        psi = np.sum((actual_hist - expected_hist) * np.log(actual_hist / expected_hist))
-        
-        return float(psi)
+        if bin_edges is None:
+            # Create histograms with same bins for both distributions
+            hist_range = (min(expected.min(), actual.min()), max(expected.max(), actual.max()))
+            _, bin_edges = np.histogram(expected, bins=bins, range=hist_range)
+        else:
+            expected = np.clip(expected, bin_edges[0], bin_edges[-1])
+            actual = np.clip(actual, bin_edges[0], bin_edges[-1])
+        expected_counts, _ = np.histogram(expected, bins=bin_edges)
+        actual_counts, _ = np.histogram(actual, bins=bin_edges)
+
+        return psi_from_densities(
+            histogram_density(expected_counts, bin_edges),
+            histogram_density(actual_counts, bin_edges)
+        )
     except Exception as e:
-        print(f"PSI calculation error: {str(e)}")
+        logger.error("PSI calculation error: %s", e)
         return np.nan
-    
-def calculate_model_drift_score(
-    current_predictions: List[float],
-    historical_predictions: List[float],
-    feature_psi_score: Dict[str, float]
-):
-    """Calculate overall model drift score combining multiple singals"""
-    # Calculate prediction distribution drift using PSI
-    pred_psi = calculate_psi(
-        np.array(historical_predictions),
-        np.array(current_predictions)
-    )
 
-    avg_feature_psi = np.mean(list(feature_psi_score.values()))
+def combine_drift_scores(prediction_psi: float, feature_psi_scores: Dict[str, float]) -> float:
+    """Weight prediction drift and average feature drift into one score"""
+    avg_feature_psi = np.mean(list(feature_psi_scores.values()))
     # weigts the components 
     weights = {
         'prediction_drift': 0.6,  # Prediction distribution changes
@@ -114,108 +270,112 @@ def calculate_model_drift_score(
     }
 
     drift_score = (
-        weights['prediction_drift'] * pred_psi +
+        weights['prediction_drift'] * prediction_psi +
         weights['feature_drift'] * avg_feature_psi
     )
 
     return min(1.0, drift_score)  # Cap at 1.0
-    
 
-def update_drift_metrics(
-    features: Dict[str, float],
-    prediction: float,
-    reference_window_size: int = 1000
+def calculate_model_drift_score(
+    current_predictions: List[float],
+    historical_predictions: List[float],
+    feature_psi_score: Dict[str, float]
 ):
-    """Updated version with model drift calculation"""
-    
-    # Store predictions for drift calculation
-    if 'predictions' not in REFERENCE_DISTRIBUTIONS:
-        REFERENCE_DISTRIBUTIONS['predictions'] = []
-    
-    REFERENCE_DISTRIBUTIONS['predictions'].append(prediction)
+    """Calculate overall model drift score combining multiple singals"""
+    # Calculate prediction distribution drift using PSI
+    pred_psi = calculate_psi(
+        np.array(historical_predictions),
+        np.array(current_predictions)
+    )
+    return combine_drift_scores(pred_psi, feature_psi_score)
     
-    # Maintain prediction history window
-    if len(REFERENCE_DISTRIBUTIONS['predictions']) > reference_window_size:
-        REFERENCE_DISTRIBUTIONS['predictions'].pop(0)
 
-    # Track model prediction distribution
-    PREDICTION_DISTRIBUTION.observe(prediction)
-    
+def _add_drift_observation(features: Dict[str, float], prediction: float) -> None:
+    """Push one prediction and its features into the drift windows"""
+    PREDICTION_ACCUMULATOR.update(prediction)
+    for feature_name, value in features.items():
+        accumulator = DRIFT_ACCUMULATORS.get(feature_name)
+        if accumulator is None:
+            accumulator = DRIFT_ACCUMULATORS[feature_name] = DriftAccumulator(
+                window_size=DRIFT_WINDOW_SIZE,
+                recent_size=DRIFT_RECENT_SIZE
+            )
+        accumulator.update(float(value))
+
+def _refresh_drift_gauges() -> None:
+    """Recompute PSI_SCORE, FEATURE_DRIFT and MODEL_DRIFT_SCORE from the windows"""
     # Store PSI scores for features
     current_psi_scores = {}
-
-    # Update feature distribution and calculate drift
-    for feature_name, value in features.items():
-        if feature_name not in REFERENCE_DISTRIBUTIONS:
-            REFERENCE_DISTRIBUTIONS[feature_name] = []
-        
-        REFERENCE_DISTRIBUTIONS[feature_name].append(float(value))
-        
-        if len(REFERENCE_DISTRIBUTIONS[feature_name]) > reference_window_size:
-            REFERENCE_DISTRIBUTIONS[feature_name].pop(0)
-            
+    for feature_name, accumulator in DRIFT_ACCUMULATORS.items():
         # Calculate PSI if enough data
-        if len(REFERENCE_DISTRIBUTIONS[feature_name]) >= reference_window_size:
-            try:
-                all_data = REFERENCE_DISTRIBUTIONS[feature_name]
-                historical_data = np.array(all_data[:-100])
-                recent_data = np.array(all_data[-100:])
-                
-                psi_score = calculate_psi(historical_data, recent_data)
-                
-                if not np.isnan(psi_score):
-                    current_psi_scores[feature_name] = psi_score
-                    PSI_SCORE.labels(feature_name=feature_name).set(psi_score)
-                    FEATURE_DRIFT.labels(feature_name=feature_name).set(psi_score)
-                    
-            except Exception as e:
-                print(f"Error calculating PSI for {feature_name}: {str(e)}")
+        if accumulator.ready:
+            psi_score = accumulator.psi()
+            if not np.isnan(psi_score):
+                current_psi_scores[feature_name] = psi_score
+                PSI_SCORE.labels(feature_name=feature_name).set(psi_score)
+                FEATURE_DRIFT.labels(feature_name=feature_name).set(psi_score)
     
     # Calculate overall model drift if we have enough data
-    if (len(REFERENCE_DISTRIBUTIONS['predictions']) >= reference_window_size and 
-            current_psi_scores):  # Only if we have PSI scores
-        try:
-            predictions = REFERENCE_DISTRIBUTIONS['predictions']
-            historical_preds = predictions[:-100]
-            recent_preds = predictions[-100:]
-            
-            model_drift = calculate_model_drift_score(
-                current_predictions=recent_preds,
-                historical_predictions=historical_preds,
-                feature_psi_scores=current_psi_scores
-            )
-            
-            # Update model drift metric
-            MODEL_DRIFT_SCORE.set(model_drift)
-            
-            # Log significant drift
-            if model_drift > 0.3:  # Threshold for significant drift
-                print(f"WARNING: Significant model drift detected: {model_drift}")
-                
-        except Exception as e:
-            print(f"Error calculating model drift: {str(e)}")
+    if PREDICTION_ACCUMULATOR.ready and current_psi_scores:  # Only if we have PSI scores
+        model_drift = combine_drift_scores(PREDICTION_ACCUMULATOR.psi(), current_psi_scores)
+
+        # Update model drift metric
+        MODEL_DRIFT_SCORE.set(model_drift)
+
+        # Log significant drift
+        if model_drift > 0.3:  # Threshold for significant drift
+            logger.warning("Significant model drift detected: %s", model_drift)
+
+def update_drift_metrics(
+    features: Dict[str, float],
+    prediction: float
+):
+    """Add one prediction to the drift windows and refresh the drift gauges"""
+    start = time.perf_counter()
+    _add_drift_observation(features, prediction)
+    _refresh_drift_gauges()
+    DRIFT_COMPUTATION_TIME.observe(time.perf_counter() - start)
+
+def refresh_drift_metrics():
+    """Apply the pending observations to the drift windows and refresh the drift gauges"""
+    start = time.perf_counter()
+    while PENDING_DRIFT_OBSERVATIONS:
+        _add_drift_observation(*PENDING_DRIFT_OBSERVATIONS.popleft())
+    _refresh_drift_gauges()
+    DRIFT_COMPUTATION_TIME.observe(time.perf_counter() - start)
 
 def track_prediction(
     fraud_probability: float,
     is_fraud: bool,
     features: Dict[str, float],
     prediction_time:  float,
-    amount: float
+    amount: float,
+    model_version: Optional[str] = None
 ):
     """Track a prediction with drift monitoring"""
     # Business metrics 
     FRAUD_COUNTER.labels(
         result='fraud' if is_fraud else 'legitimate'
     ).inc()
+    if model_version is not None:
+        MODEL_PREDICTIONS.labels(model_version=model_version).inc()
 
     TRANSACTION_AMOUNT.observe(amount)
     PREDICTION_TIME.observe(prediction_time)
 
+    # Track model prediction distribution
+    PREDICTION_DISTRIBUTION.observe(fraud_probability)
+
+    if settings.DRIFT_MODE == "scheduled":
+        # The drift scheduler picks these up on its next refresh
+        PENDING_DRIFT_OBSERVATIONS.append((features, fraud_probability))
+        return
+
     # Update drift metrics
     try:
         update_drift_metrics(features, fraud_probability)
     except Exception as e:
-        print(f"Error updating drift metrics: {str(e)}")
+        logger.error("Error updating drift metrics: %s", e)
 
 def track_request(
     status_code: int,
@@ -0,0 +1,111 @@
+"""On-demand profilers for a running worker, stdlib only.
+
+StackSampler reads every thread's stack from a background thread at a fixed
+interval and counts identical stacks. The result is in the collapsed format
+flamegraph.pl, speedscope and inferno read: one line per stack, frames from
+the root down separated by ';', then the sample count.
+
+RequestProfiler runs cProfile over a fraction of requests. Requests share
+the event loop thread, so it profiles that thread while at least one
+sampled request is in flight, which also catches whatever else the loop
+runs meanwhile. Work handed to other threads is not seen; the stack sampler
+covers those.
+
+Neither costs anything until started: the sampler thread only exists while
+sampling, and cProfile is only enabled around sampled requests.
+"""
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+from types import CodeType, FrameType
+
+
+class StackSampler:
+    """Sample all threads' stacks every `interval` seconds until stopped"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _stack(self, frame: Optional[FrameType]) -> Tuple[str, ...]:
+        frames = []
+        while frame is not None:
+            frames.append(self._label(frame.f_code))
+            frame = frame.f_back
+        frames.reverse()
+        return tuple(frames)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.stacks[(names.get(ident, str(ident)),) + self._stack(frame)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, thread name first, most sampled first"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """cProfile a random `fraction` of the requests passed through run()"""
+
+    def __init__(self, fraction: float = 0.1):
+        self.fraction = fraction
+        self.seen = 0
+        self.profiled = 0
+        self._profile = cProfile.Profile()
+        self._in_flight = 0
+
+    async def run(self, handler: Callable[..., Awaitable], *args):
+        self.seen += 1
+        if random.random() >= self.fraction:
+            return await handler(*args)
+        self.profiled += 1
+        # One profiler for all sampled requests: it runs while any of them is in flight
+        if self._in_flight == 0:
+            self._profile.enable()
+        self._in_flight += 1
+        try:
+            return await handler(*args)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._profile.disable()
+
+    def report(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """pstats listing of the profiled requests"""
+        header = f"{self.profiled} of {self.seen} requests profiled\n"
+        if not self.profiled:
+            return header
+        self._profile.disable()  # In case sampled requests are still running
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats(sort).print_stats(limit)
+        return header + output.getvalue()
@@ -0,0 +1,223 @@
+"""Pre-fork production server.
+
+The parent process imports the app and loads the model once, then forks the
+workers, which all accept connections on the socket the parent bound. The
+model, the scaler and the imported modules are shared copy-on-write, so each
+extra worker costs its own heap rather than another copy of everything.
+
+Fork safety:
+    - The parent never predicts. XGBoost's OpenMP thread pool is created on
+      the first prediction, and a pool inherited across fork() can deadlock,
+      so each worker warms the model up itself (ModelRegistry.start()).
+    - gc.freeze() moves everything loaded so far out of the collector's
+      reach, so garbage collections in a worker do not touch (and copy) the
+      shared pages.
+    - Workers drop the database connections inherited from the parent
+      without closing them, and open their own.
+    - Metrics go to PROMETHEUS_MULTIPROC_DIR (a temporary directory unless
+      set), and /metrics on any worker reports all of them.
+
+Each worker runs its own event loop, background tasks and caches. Model
+reloads through /admin reach one worker only; use MODEL_WATCH so every
+worker picks up new model files.
+
+Workers that exit are restarted. If one fails right after starting
+MAX_STARTUP_FAILURES times in a row, the server logs it and shuts down with a
+non-zero status instead of restarting it forever.
+
+Run with: python -m src.server --workers 4 --cpu-affinity auto
+"""
+from typing import Dict, List, Optional
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from src.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# A worker exiting this soon after it was started failed to start
+STARTUP_GRACE_SECONDS = 5.0
+# Shut the server down after this many failed starts of one worker in a row
+MAX_STARTUP_FAILURES = 5
+
+
+def cpu_assignments(affinity: str, workers: int) -> Optional[List[int]]:
+    """CPU to pin each worker to: none, the available CPUs in turn ("auto") or from a list"""
+    if affinity == "none":
+        return None
+    if affinity == "auto":
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = [int(cpu) for cpu in affinity.split(",")]
+    return [cpus[index % len(cpus)] for index in range(workers)]
+
+
+def prepare_environment(workers: int) -> str:
+    """Set up what has to be in place before prometheus_client and XGBoost are imported"""
+    # One multi-process metrics directory per server run, cleared of old workers' files
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="fraud-metrics-")
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(metrics_dir, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    # Split the CPUs between the workers rather than giving each an OpenMP thread per CPU
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, len(os.sched_getaffinity(0)) // workers)))
+    return metrics_dir
+
+
+class PreforkServer:
+    """Load the app once, fork workers serving one socket and restart any that die"""
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 1,
+        cpus: Optional[List[int]] = None,
+        log_level: str = "info"
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.cpus = cpus
+        self.log_level = log_level
+        self.app = None
+        self.sock: Optional[socket.socket] = None
+        self.children: Dict[int, int] = {}  # pid -> worker index
+        self.started: Dict[int, float] = {}  # worker index -> monotonic start time
+        self.startup_failures: Dict[int, int] = {}  # worker index -> failed starts in a row
+        self.stopping = False
+        self.exit_code = 0
+
+    def load(self) -> None:
+        """Import the app and load the model in the parent, to be shared by the workers"""
+        from prometheus_client import multiprocess
+        from src.api.app import app
+        from src.core.registry import model_registry
+
+        self.app = app
+        model = model_registry.active
+        # The parent serves no requests; drop the gauges it set while loading
+        multiprocess.mark_process_dead(os.getpid())
+        # Keep the collector off the shared objects in the workers
+        gc.freeze()
+        logger.info("Loaded model %s, starting %d worker(s)", model.version, self.workers)
+
+    def bind(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            self.started[index] = time.monotonic()
+            return
+        # Worker: never return into the parent's loop
+        from src.monitoring.logs import stop_logging
+        code = 1
+        try:
+            self.serve(index)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            logger.exception("Worker %d (pid %d) failed", index, os.getpid())
+        finally:
+            # os._exit skips atexit, so write out the queued log records first
+            stop_logging()
+            os._exit(code)
+
+    def serve(self, index: int) -> None:
+        """Run one worker (in the forked child)"""
+        import uvicorn
+        from src.db.database import dispose_inherited_pools
+
+        # uvicorn installs its own handlers; until then behave like a fresh process
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if self.cpus is not None:
+            os.sched_setaffinity(0, {self.cpus[index]})
+        dispose_inherited_pools()
+
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        """Serve until stopped; non-zero if a worker kept failing to start"""
+        from prometheus_client import multiprocess
+
+        self.load()
+        self.bind()
+        for index in range(self.workers):
+            self.spawn(index)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.children.pop(pid, None)
+            multiprocess.mark_process_dead(pid)
+            if index is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - self.started[index] < STARTUP_GRACE_SECONDS:
+                self.startup_failures[index] = self.startup_failures.get(index, 0) + 1
+            else:
+                self.startup_failures[index] = 0
+            if self.startup_failures[index] >= MAX_STARTUP_FAILURES:
+                logger.error(
+                    "Worker %d exited with status %d right after starting %d times in a row, shutting down",
+                    index, code, self.startup_failures[index]
+                )
+                self.exit_code = 1
+                self.stop()
+                continue
+            logger.warning("Worker %d exited with status %d, restarting", pid, code)
+            time.sleep(1)  # Don't spin if workers die on startup
+            self.spawn(index)
+        self.sock.close()
+        return self.exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one model")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="Worker processes; 0 starts one per available CPU")
+    parser.add_argument("--cpu-affinity", default=settings.SERVER_CPU_AFFINITY,
+                        help='"none", "auto" (worker i on the i-th available CPU) or CPUs like "0,2,4"')
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or len(os.sched_getaffinity(0))
+    cpus = cpu_assignments(args.cpu_affinity, workers)
+    prepare_environment(workers)
+    return PreforkServer(args.host, args.port, workers, cpus, args.log_level).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark decoding a batch body into model features: JSON vs binary matrix vs Arrow.
+
+Run with: python -m tests.benchmarks.bench_batch_formats
+"""
+import json
+import numpy as np
+from src.api.columnar import decode_arrow_request, decode_matrix_request, encode_matrix_request
+from src.api.schemas import BatchPredictionRequest
+from src.core.model import ModelManager
+from src.core.preprocessing import TransactionPreprocessor
+from tests.benchmarks.bench_preprocessing import make_transactions, time_call
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow timings are skipped
+    pa = None
+
+BATCH_SIZES = [10, 100, 1000]
+
+
+def arrow_body(transactions: list[dict]) -> bytes:
+    v_features = np.array([list(tx["features"].values()) for tx in transactions])
+    table = pa.table({
+        "transaction_id": [tx["transaction_id"] for tx in transactions],
+        "amount": [tx["amount"] for tx in transactions],
+        "timestamp": [tx["timestamp"] for tx in transactions],
+        "features": pa.FixedSizeListArray.from_arrays(pa.array(v_features.ravel()), 28),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def main():
+    preprocessor = TransactionPreprocessor(model_manager=ModelManager())
+    print(f"{'rows':>6} {'json ms':>10} {'matrix ms':>10} {'arrow ms':>10}")
+    for n in BATCH_SIZES:
+        transactions = make_transactions(n)
+        json_body = json.dumps({"transactions": transactions}).encode()
+        matrix_body = encode_matrix_request(
+            [tx["transaction_id"] for tx in transactions],
+            [tx["amount"] for tx in transactions],
+            [tx["timestamp"] for tx in transactions],
+            np.array([list(tx["features"].values()) for tx in transactions]),
+        )
+
+        def from_json():
+            request = BatchPredictionRequest.model_validate_json(json_body)
+            return preprocessor.preprocess_batch([tx.model_dump() for tx in request.transactions])
+
+        def from_columns(batch):
+            return preprocessor.preprocess_columns(batch.v_features, batch.amounts, batch.timestamps)
+
+        repeat = max(5, 2000 // n)
+        json_time = time_call(from_json, repeat)
+        matrix_time = time_call(lambda: from_columns(decode_matrix_request(matrix_body)), repeat)
+        arrow = "n/a"
+        if pa is not None:
+            body = arrow_body(transactions)
+            arrow = f"{time_call(lambda: from_columns(decode_arrow_request(body)), repeat) * 1e3:.3f}"
+        print(f"{n:>6} {json_time * 1e3:>10.3f} {matrix_time * 1e3:>10.3f} {arrow:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Requests per second on one event loop with the sync vs the async database session.
+
+"Before" reproduces the previous route shape: an async handler calling the
+synchronous PredictionCRUD, which blocks the loop for every query. "After"
+awaits AsyncPredictionCRUD. Both apps serve GET lookups through the ASGI
+interface with many requests in flight at once.
+
+Run with: python -m tests.benchmarks.bench_db_concurrency [DATABASE_URL]
+A temporary SQLite file is used when no URL is given; point it at PostgreSQL
+to see the effect of real network round trips.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.db.crud import AsyncPredictionCRUD, PredictionCRUD
+from src.db.database import POOL_OPTIONS, Base, to_async_url
+
+N_ROWS = 500
+N_REQUESTS = 3000
+# Stay within pool_size + max_overflow so neither app waits on the pool
+CONCURRENCY = 15
+
+
+def build_apps(database_url: str) -> tuple[FastAPI, FastAPI, callable]:
+    """Apps serving the same lookup with a sync and an async session"""
+    sync_engine = create_engine(database_url, **POOL_OPTIONS)
+    async_engine = create_async_engine(to_async_url(database_url), **POOL_OPTIONS)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/transactions/{transaction_id}")
+    async def sync_lookup(transaction_id: str, db=Depends(get_sync_db)):
+        prediction = PredictionCRUD(db=db).get_prediction(transaction_id)
+        return {"transaction_id": prediction.transaction_id}
+
+    async_app = FastAPI()
+
+    @async_app.get("/transactions/{transaction_id}")
+    async def async_lookup(transaction_id: str, db=Depends(get_async_db)):
+        prediction = await AsyncPredictionCRUD(db=db).get_prediction(transaction_id)
+        return {"transaction_id": prediction.transaction_id}
+
+    def seed():
+        Base.metadata.create_all(bind=sync_engine)
+        db = SyncSession()
+        PredictionCRUD(db=db).create_predictions_bulk([
+            {
+                "transaction_id": f"bench_db_{i}",
+                "amount": 10.0,
+                "fraud_probability": 0.1,
+                "is_fraud": False,
+                "processing_time": 0.01,
+            }
+            for i in range(N_ROWS)
+        ])
+        db.close()
+
+    return sync_app, async_app, seed
+
+
+async def requests_per_second(app: FastAPI) -> float:
+    """Throughput of N_REQUESTS lookups with CONCURRENCY in flight"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        counter = iter(range(N_REQUESTS))
+
+        async def worker():
+            for i in counter:
+                response = await client.get(f"/transactions/bench_db_{i % N_ROWS}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return N_REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = sys.argv[1] if len(sys.argv) > 1 else f"sqlite:///{tmp}/bench.db"
+        sync_app, async_app, seed = build_apps(database_url)
+        seed()
+        before = asyncio.run(requests_per_second(sync_app))
+        after = asyncio.run(requests_per_second(async_app))
+        print(f"sync session (before): {before:8.0f} req/s")
+        print(f"async session (after): {after:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
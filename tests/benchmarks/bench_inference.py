@@ -0,0 +1,30 @@
+"""Benchmark the flattened-tree engine against XGBoost predict_proba.
+
+Run with: python -m tests.benchmarks.bench_inference
+"""
+import numpy as np
+from src.core.model import ModelManager
+from src.core.tree_engine import FlatTreeEnsemble
+from tests.benchmarks.bench_preprocessing import time_call
+
+BATCH_SIZES = [1, 32, 1000]
+
+
+def main():
+    model = ModelManager().model
+    engine = FlatTreeEnsemble.from_xgboost(model)
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>6} {'xgboost us':>12} {'native us':>12} {'speedup':>8} {'max abs diff':>13}")
+    for n in BATCH_SIZES:
+        features = rng.normal(scale=2.0, size=(n, 30))
+        features[:, 29] = rng.integers(0, 4, size=n)
+        repeat = max(20, 5000 // n)
+        old = time_call(lambda: model.predict_proba(features)[:, 1], repeat)
+        new = time_call(lambda: engine.predict_proba(features), repeat)
+        diff = np.abs(model.predict_proba(features)[:, 1] - engine.predict_proba(features)).max()
+        print(f"{n:>6} {old * 1e6:>12.1f} {new * 1e6:>12.1f} {old / new:>7.1f}x {diff:>13.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark offset pagination against keyset (cursor) pagination on deep pages.
+
+Run with: python -m tests.benchmarks.bench_pagination
+"""
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.db.crud import PredictionCRUD
+from src.db.database import Base
+
+N_ROWS = 200_000
+PAGE_SIZE = 20
+PAGES = [1, 10, 100, 1000, 5000]
+
+
+def fill(crud: PredictionCRUD) -> None:
+    """Insert N_ROWS synthetic predictions, one per second"""
+    start_time = datetime(2024, 1, 1)
+    for start in range(0, N_ROWS, 10_000):
+        crud.create_predictions_bulk([
+            {
+                "transaction_id": f"bench_tx_{i}",
+                "amount": float(i % 5000),
+                "fraud_probability": (i % 100) / 100,
+                "is_fraud": i % 100 >= 80,
+                "processing_time": 0.01,
+                "created_at": start_time + timedelta(seconds=i),
+            }
+            for i in range(start, start + 10_000)
+        ])
+
+
+def time_ms(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            crud = PredictionCRUD(db=db)
+            fill(crud)
+
+            # Walk the cursors once to find where each measured page starts
+            cursors, cursor = {1: None}, None
+            for page in range(1, max(PAGES)):
+                _, cursor = crud.list_predictions_page(limit=PAGE_SIZE, cursor=cursor)
+                cursors[page + 1] = cursor
+
+            print(f"{'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+            for page in PAGES:
+                skip = (page - 1) * PAGE_SIZE
+                offset = time_ms(lambda: crud.list_predictions(skip=skip, limit=PAGE_SIZE))
+                keyset = time_ms(lambda: crud.list_predictions_page(limit=PAGE_SIZE, cursor=cursors[page]))
+                print(f"{page:>6} {offset:>10.3f} {keyset:>10.3f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
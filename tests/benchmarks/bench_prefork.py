@@ -0,0 +1,112 @@
+"""Benchmark worker memory: uvicorn --workers against the pre-fork server.
+
+Starts each server with the same number of workers, waits until every worker
+has reported ready on /metrics, sends some predictions and reads each
+worker's memory from /proc/<pid>/smaps_rollup:
+
+    RSS      resident pages, counting shared ones in full
+    PSS      shared pages split between the processes sharing them
+    private  pages only this worker uses
+
+With uvicorn --workers every worker imports the app and loads its own
+model; pre-forked workers share what the parent loaded, which shows in PSS
+and private memory. The model here is small, so most of the saving is the
+imported libraries.
+
+Run with: python -m tests.benchmarks.bench_prefork [workers]
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from tests.benchmarks.bench_startup import free_port
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+REQUESTS = 200
+
+
+def children(pid: int) -> list[int]:
+    """Pids of the direct children of a process"""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return sorted(found)
+
+
+def memory(pid: int) -> dict:
+    """RSS, PSS and private memory of a process, in MB"""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        kb = {name: int(value) for name, value in re.findall(r"^(\w+):\s+(\d+) kB", f.read(), re.M)}
+    return {
+        "rss": kb["Rss"] / 1024,
+        "pss": kb["Pss"] / 1024,
+        "private": (kb["Private_Clean"] + kb["Private_Dirty"]) / 1024,
+    }
+
+
+def measure(name: str, command: list[str], port: int, timeout: float = 120.0) -> None:
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="bench-metrics-"))
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            start = time.perf_counter()
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"{name} did not start {WORKERS} workers")
+                try:
+                    ready = client.get("/metrics").text.count("\nstartup_seconds{")
+                except httpx.TransportError:
+                    ready = 0
+                if ready >= WORKERS:
+                    break
+                time.sleep(0.2)
+            for i in range(REQUESTS):
+                client.post("/api/v1/transactions", json={
+                    "transaction_id": f"bench-prefork-{name}-{os.getpid()}-{i}",
+                    "amount": 10.0 + i,
+                    "timestamp": "2026-01-01T12:00:00Z",
+                    "features": [0.1] * 28,
+                })
+
+        workers = [pid for pid in children(server.pid) if "resource_tracker" not in open(f"/proc/{pid}/cmdline").read()]
+        print(f"\n{name} ({len(workers)} workers)")
+        print(f"{'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+        totals = {"rss": 0.0, "pss": 0.0, "private": 0.0}
+        for pid in [server.pid] + workers:
+            usage = memory(pid)
+            for key in totals:
+                totals[key] += usage[key]
+            label = "parent" if pid == server.pid else str(pid)
+            print(f"{label:>8} {usage['rss']:>8.1f} {usage['pss']:>8.1f} {usage['private']:>11.1f}")
+        print(f"{'total':>8} {totals['rss']:>8.1f} {totals['pss']:>8.1f} {totals['private']:>11.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    port = free_port()
+    measure("uvicorn --workers", [
+        sys.executable, "-m", "uvicorn", "src.api.app:app", "--port", str(port),
+        "--workers", str(WORKERS), "--log-level", "warning"
+    ], port)
+    port = free_port()
+    measure("src.server (pre-fork)", [
+        sys.executable, "-m", "src.server", "--port", str(port), "--host", "127.0.0.1",
+        "--workers", str(WORKERS), "--log-level", "warning"
+    ], port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark building and serializing batch prediction responses.
+
+Compares the response models through jsonable_encoder and json.dumps (what
+the batch route used to do) with the fast bodies of src.api.responses,
+serialized by orjson and by the pydantic-core fallback.
+
+Run with: python -m tests.benchmarks.bench_responses
+"""
+from datetime import datetime, timezone
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.api import responses
+from src.api.schemas import BatchPredictionResponse, TransactionResponse
+from tests.benchmarks.bench_preprocessing import time_call
+
+RESULT_COUNTS = [10, 100, 1000]
+
+
+def make_results(n: int) -> dict:
+    """Columns of n stored predictions"""
+    rng = np.random.default_rng(42)
+    probabilities = rng.uniform(size=n)
+    return dict(
+        transaction_ids=[f"bench_tx_{i}" for i in range(n)],
+        probabilities=probabilities,
+        is_fraud=(probabilities > 0.8).tolist(),
+        timestamps=[datetime(2024, 2, 18, i % 24, 30, tzinfo=timezone.utc) for i in range(n)],
+        processing_time=1.5,
+        conflicts=[],
+        total_processing_time=3.0,
+        timestamp=datetime.now(timezone.utc)
+    )
+
+
+def response_models(results: dict) -> bytes:
+    """The previous path: a TransactionResponse per row, then jsonable_encoder and json.dumps"""
+    model = BatchPredictionResponse(
+        results=[
+            TransactionResponse(
+                transaction_id=transaction_id,
+                fraud_probability=float(probability),
+                is_fraud=is_fraud,
+                processing_time=results["processing_time"],
+                timestamp=created_at
+            )
+            for transaction_id, probability, is_fraud, created_at in zip(
+                results["transaction_ids"], results["probabilities"], results["is_fraud"], results["timestamps"]
+            )
+        ],
+        conflicts=results["conflicts"],
+        total_processing_time=results["total_processing_time"],
+        timestamp=results["timestamp"]
+    )
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_body(results: dict) -> bytes:
+    return responses.FastJSONResponse(responses.batch_body(**results)).body
+
+
+def main():
+    orjson = responses.orjson
+    print(f"{'results':>7} {'models ms':>10} {'orjson ms':>10} {'pydantic-core ms':>17} {'speedup':>8}")
+    for n in RESULT_COUNTS:
+        results = make_results(n)
+        repeat = max(5, 5000 // n)
+        old = time_call(lambda: response_models(results), repeat)
+        responses.orjson = orjson
+        fast = time_call(lambda: fast_body(results), repeat)
+        responses.orjson = None
+        fallback = time_call(lambda: fast_body(results), repeat)
+        responses.orjson = orjson
+        print(f"{n:>7} {old * 1e3:>10.3f} {fast * 1e3:>10.3f} {fallback * 1e3:>17.3f} {old / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark per-request validation and preprocessing of JSON transaction bodies.
+
+Compares the old route path (validate, model_dump(), preprocess the dict) with
+building features straight from the validated model, for V1-V28 sent as an
+object and as an array.
+
+Run with: python -m tests.benchmarks.bench_schema
+"""
+import json
+from src.api.schemas import TransactionRequest
+from src.core.model import ModelManager
+from src.core.preprocessing import TransactionPreprocessor
+from tests.benchmarks.bench_preprocessing import make_transactions, time_call
+
+N_REQUESTS = 1000
+
+
+def main():
+    preprocessor = TransactionPreprocessor(model_manager=ModelManager())
+    transactions = make_transactions(N_REQUESTS)
+    object_bodies = [json.dumps(tx).encode() for tx in transactions]
+    array_bodies = [
+        json.dumps(dict(tx, features=list(tx["features"].values()))).encode() for tx in transactions
+    ]
+    validate = TransactionRequest.model_validate_json
+
+    cases = {
+        "validate (object)": lambda: [validate(body) for body in object_bodies],
+        "validate (array)": lambda: [validate(body) for body in array_bodies],
+        "validate + model_dump + preprocess": lambda: [
+            preprocessor.preprocess_transaction(validate(body).model_dump()) for body in object_bodies
+        ],
+        "validate + preprocess_request (object)": lambda: [
+            preprocessor.preprocess_request(validate(body)) for body in object_bodies
+        ],
+        "validate + preprocess_request (array)": lambda: [
+            preprocessor.preprocess_request(validate(body)) for body in array_bodies
+        ],
+    }
+    print(f"{'path':<40} {'us/request':>10}")
+    for name, func in cases.items():
+        seconds = time_call(func, 20)
+        print(f"{name:<40} {seconds / N_REQUESTS * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark the overhead of per-stage request timing.
+
+Times a lap on its own, on the disabled timer, and everything TimedRoute adds
+to one prediction request: the timer, six laps, six histogram observations
+and the Server-Timing header.
+
+Run with: python -m tests.benchmarks.bench_stage_timing
+"""
+import timeit
+from src.api.timing import StageTimer, _DISABLED
+from src.monitoring.metrics import STAGE_TIME
+
+STAGES = ['parse', 'preprocess', 'inference', 'persist', 'metrics', 'serialize']
+NUMBER = 100000
+
+
+def timed_request(histograms: dict) -> str:
+    """What TimedRoute and the endpoint add to one request"""
+    timer = StageTimer()
+    for stage in STAGES:
+        timer.lap(stage)
+    for stage, seconds in timer.stages:
+        histograms[stage].observe(seconds)
+    return timer.server_timing()
+
+
+def main():
+    timer = StageTimer()
+    histograms = {stage: STAGE_TIME.labels(endpoint='bench', stage=stage) for stage in STAGES}
+
+    def per_call(func) -> float:
+        return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+    lap = per_call(lambda: timer.lap('inference'))
+    timer.stages.clear()
+    disabled = per_call(lambda: _DISABLED.lap('inference'))
+    request = per_call(lambda: timed_request(histograms))
+    print(f"{'lap us':>8} {'disabled lap us':>16} {'per request us':>15} {'per stage us':>13}")
+    print(f"{lap:>8.3f} {disabled:>16.3f} {request:>15.3f} {request / len(STAGES):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
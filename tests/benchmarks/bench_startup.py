@@ -0,0 +1,65 @@
+"""Benchmark startup: importing the app, and process launch until /ready passes.
+
+Starts uvicorn in a subprocess, polls /ready and reports the wall time seen
+from outside next to the startup_time the server reports for itself.
+
+Run with: python -m tests.benchmarks.bench_startup
+"""
+import socket
+import subprocess
+import sys
+import time
+import httpx
+
+RUNS = 3
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time() -> float:
+    """Seconds to import the app in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import src.api.app; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_to_ready(timeout: float = 60.0) -> tuple[float, float]:
+    """Wall seconds from launching uvicorn until /ready passes, and the server's own figure"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.app:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # One client, polled gently: on a small box polling competes with the server for CPU
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    response = client.get("/ready")
+                    if response.status_code == 200:
+                        return time.perf_counter() - start, response.json()["startup_time"]
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.1)
+        raise TimeoutError("Server did not become ready")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    print(f"{'run':>3} {'import s':>9} {'to /ready s':>12} {'reported s':>11}")
+    for run in range(RUNS):
+        imported = import_time()
+        ready, reported = time_to_ready()
+        print(f"{run:>3} {imported:>9.3f} {ready:>12.3f} {reported:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Benchmark suite for the scoring hot path, with regression gates.
+
+Times each stage on its own (preprocessing, prediction, the drift update) and
+the prediction routes end to end through the ASGI app, at several batch
+sizes. The routes run against a throwaway SQLite database standing in for
+get_db / get_async_db, so no PostgreSQL is needed.
+
+Each benchmark loops long enough for a sample to take 0.2s (timeit's
+autorange) and records the best per-call time of five samples. A fixed
+reference workload is timed right before each benchmark, and regressions are
+judged on the ratio to it, so the whole machine running slower for a while
+(other tenants, frequency scaling) does not read as a regression.
+
+--save writes the results as the JSON baseline; without it they are compared
+with the baseline and the run fails (exit status 1) when any benchmark got
+slower by more than the threshold. Baselines only compare on the machine
+that saved them.
+
+Run with:
+    python -m tests.benchmarks.bench_suite --save            # record a baseline
+    python -m tests.benchmarks.bench_suite                   # compare against it
+    python -m tests.benchmarks.bench_suite --threshold 0.1 --only preprocess
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The app needs a DATABASE_URL at import; without one, point it at the stand-in database too
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix="bench-suite-"), "predictions.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DATABASE_FILE}")
+
+import numpy as np  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from src.api.app import create_app  # noqa: E402
+from src.api.schemas import TransactionRequest  # noqa: E402
+from src.core.model import ModelManager  # noqa: E402
+from src.core.preprocessing import TransactionPreprocessor  # noqa: E402
+from src.db.database import Base, get_async_db, get_db, to_async_url  # noqa: E402
+from src.monitoring.metrics import update_drift_metrics  # noqa: E402
+from tests.benchmarks.bench_preprocessing import make_transactions  # noqa: E402
+
+BATCH_SIZES = [1, 10, 100, 1000]  # 1000 is the most the batch route accepts
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "suite.json")
+DEFAULT_THRESHOLD = 0.25  # Fail when a benchmark is 25% slower than its baseline
+SAMPLES = 5  # Timed samples per benchmark; the best one counts
+
+Benchmark = Tuple[str, Callable[[], object]]
+
+_REFERENCE_MATRIX = np.random.default_rng(0).normal(size=(1000, 30))
+
+
+def reference_workload() -> None:
+    """Interpreter and NumPy work that never changes, to gauge the machine's current speed"""
+    sum(i * i for i in range(2000))
+    (_REFERENCE_MATRIX @ _REFERENCE_MATRIX.T).sum()
+
+
+def best_time(call: Callable[[], object]) -> float:
+    """Best seconds per call over SAMPLES samples of at least 0.2s each"""
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=SAMPLES, number=number)) / number
+
+
+def use_sqlite(app: FastAPI, url: str) -> None:
+    """Serve the app's database dependencies from a SQLite file"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SyncSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    AsyncSession = async_sessionmaker(bind=create_async_engine(to_async_url(url)), expire_on_commit=False)
+
+    def sqlite_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def sqlite_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = sqlite_db
+    app.dependency_overrides[get_async_db] = sqlite_async_db
+
+
+def stage_benchmarks(model: ModelManager) -> List[Benchmark]:
+    """Each scoring stage on its own"""
+    preprocessor = TransactionPreprocessor(model_manager=model)
+    benchmarks = []
+    for n in BATCH_SIZES:
+        transactions = make_transactions(n)
+        requests = [TransactionRequest(**tx) for tx in transactions]
+        features = preprocessor.preprocess_batch(transactions)
+        if n == 1:
+            benchmarks += [
+                ("preprocess_transaction", lambda: preprocessor.preprocess_transaction(transactions[0])),
+                ("preprocess_request", lambda: preprocessor.preprocess_request(requests[0])),
+                ("predict", lambda: model.predict(features)),
+                ("update_drift_metrics", lambda: update_drift_metrics(transactions[0]["features"], 0.1)),
+            ]
+        benchmarks += [
+            (f"preprocess_batch[{n}]", lambda t=transactions: preprocessor.preprocess_batch(t)),
+            (f"preprocess_requests[{n}]", lambda r=requests: preprocessor.preprocess_requests(r)),
+            (f"batch_predict[{n}]", lambda f=features: model.batch_predict(f)),
+        ]
+    return benchmarks
+
+
+def route_benchmarks(client: TestClient) -> List[Benchmark]:
+    """The prediction routes end to end, with a fresh transaction ID every call"""
+    ids = itertools.count()
+
+    def with_new_ids(transactions: List[dict]) -> List[dict]:
+        return [dict(tx, transaction_id=f"bench_suite_{next(ids)}") for tx in transactions]
+
+    def post(path: str, body: dict) -> None:
+        response = client.post(path, json=body)
+        if response.status_code != 201:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text}")
+
+    single = make_transactions(1)[0]
+    benchmarks = [
+        ("POST /api/v1/transactions", lambda: post("/api/v1/transactions", with_new_ids([single])[0]))
+    ]
+    for n in BATCH_SIZES[1:]:
+        transactions = make_transactions(n)
+        benchmarks.append((
+            f"POST /api/v1/transactions/batch[{n}]",
+            lambda t=transactions: post("/api/v1/transactions/batch", {"transactions": with_new_ids(t)})
+        ))
+    return benchmarks
+
+
+def run(only: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Best seconds per call, and relative to the reference workload, of the benchmarks matching `only`"""
+    results = {}
+    model = ModelManager()
+    app = create_app()
+    use_sqlite(app, f"sqlite:///{DATABASE_FILE}")
+    with TestClient(app) as client:
+        for name, call in stage_benchmarks(model) + route_benchmarks(client):
+            if only and only not in name:
+                continue
+            reference = best_time(reference_workload)
+            seconds = best_time(call)
+            results[name] = {"seconds": seconds, "relative": seconds / reference}
+            print(f"{name:<40} {seconds * 1e3:>10.3f} ms")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float
+) -> List[str]:
+    """Print the change against the baseline; returns the benchmarks over the threshold"""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, result in results.items():
+        now = result["seconds"] * 1e3
+        if name not in baseline:
+            print(f"{name:<40} {'-':>12} {now:>10.3f} {'new':>8}")
+            continue
+        # Judged relative to the reference workload; the times are for reading
+        change = result["relative"] / baseline[name]["relative"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40} {baseline[name]['seconds'] * 1e3:>12.3f} {now:>10.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring hot path against a saved baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline to compare with or save to")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Largest allowed slowdown as a fraction, e.g. 0.25 for 25%%")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "cpus": os.cpu_count(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
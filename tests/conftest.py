@@ -3,9 +3,12 @@ import numpy as np
 from datetime import datetime
 from src.api.app import create_app
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
-from src.db.database import get_db
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.db.database import get_db, Base
 from src.db.models import Prediction
+from src.db.cache import prediction_cache
 from src.core.model import ModelManager
 from src.core.preprocessing import TransactionPreprocessor
 
@@ -30,6 +33,31 @@ def preprocessor(model_manager):
     """similar to model manager loads the actual preprocessor"""
     return TransactionPreprocessor(model_manager=model_manager)
 
+@pytest.fixture
+def sqlite_session():
+    """Session on a throwaway in-memory SQLite database with the predictions table"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def sqlite_file_url(tmp_path):
+    """URL of a throwaway SQLite file database with the predictions table"""
+    url = f"sqlite:///{tmp_path / 'predictions.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return url
+
 @pytest.fixture
 def valid_single_transaction():
     """Fixture providing a valid transaction data. These values are form actual fraud data we trained on."""
@@ -142,6 +170,7 @@ def cleanup_prediction(valid_single_transaction):
         if prediction:
             prediction.delete()
             db.commit()
+            prediction_cache.invalidate(transactions["transaction_id"])
             print(f"Prediction data for {transactions['transaction_id']} deleted")  
     except Exception as e:
         db.rollback()
@@ -163,6 +192,8 @@ def cleanup_batch_predictions(valid_batch_transactions):
             if prediction:
                 db.delete(prediction)
         db.commit()
+        for transaction_id in transaction_ids:
+            prediction_cache.invalidate(transaction_id)
         print(f"Predictions with transaction_ids {transaction_ids} removed.")
     except Exception as e:
         db.rollback()
@@ -1,7 +1,25 @@
 import pytest
-from datetime import datetime
+import asyncio
+import json
+from datetime import datetime, timezone
 import numpy as np
-from src.api.schemas import TransactionRequest, BatchPredictionRequest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.requests import Request
+from src.api.columnar import (
+    ARROW_MEDIA_TYPE,
+    MATRIX_MEDIA_TYPE,
+    decode_arrow_request,
+    decode_matrix_response,
+    encode_matrix_request
+)
+from src.api import responses, timing
+from src.api.app import create_app
+from src.api.routes import prediction
+from src.api.schemas import TransactionRequest, BatchPredictionRequest, BatchPredictionResponse
+from src.core.registry import model_registry
+from src.db.database import get_db
+from src.db.models import Prediction
 
 def test_health_check(client):
     """Test health check endpoint"""
@@ -9,6 +27,17 @@ def test_health_check(client):
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
+def test_ready_after_warmup(app):
+    """Test /ready only passes once the lifespan has loaded and warmed up the model"""
+    assert TestClient(app).get("/ready").status_code == 503  # Lifespan has not run
+
+    with TestClient(app) as client:
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["model_version"] == model_registry.active.version
+        assert response.json()["startup_time"] > 0
+        assert model_registry.ready
+
 def test_single_prediction(client, valid_single_transaction, cleanup_prediction):
     """Test single transaction prediction endpoint"""
     transaction = valid_single_transaction.copy()
@@ -30,6 +59,15 @@ def test_single_prediction(client, valid_single_transaction, cleanup_prediction)
     assert isinstance(data["is_fraud"], (bool, np.bool)), f"Fraud prediction must be boolean, got {type(data['is_fraud'])}"
     assert 0 <= data["fraud_probability"] <= 1, f"Fraud probability must be between 0 and 1, got {data['fraud_probability']}"
 
+def test_single_prediction_array_features(client, valid_single_transaction, cleanup_prediction):
+    """Test V1-V28 can be sent as a plain array and must have 28 values"""
+    transaction = dict(valid_single_transaction, features=list(valid_single_transaction["features"].values()))
+    response = client.post("/api/v1/transactions", json=dict(transaction, features=transaction["features"][:27]))
+    assert response.status_code == 422
+
+    response = client.post("/api/v1/transactions", json=transaction)
+    assert response.status_code == 201
+
 def test_batch_prediction(client, valid_batch_transactions, cleanup_batch_predictions):
     """Test batch transaction prediction endpoint"""
     # Simplify the request creation
@@ -45,7 +83,7 @@ def test_batch_prediction(client, valid_batch_transactions, cleanup_batch_predic
 
     data = response.json()
     assert isinstance(data.get("results"), list), "Expected a list of predictions"
-    assert len(data) == len(valid_batch_transactions), "Number of predictions should match number of transactions"
+    assert len(data["results"]) == len(valid_batch_transactions), "Number of predictions should match number of transactions"
 
     assert(all("transaction_id" in p for p in data["results"])), "Transaction id missing in response"
     assert(all("fraud_probability" in p for p in data["results"])), "Fraud probability missing in response"
@@ -56,4 +94,249 @@ def test_batch_prediction(client, valid_batch_transactions, cleanup_batch_predic
     for p in data["results"]:
         assert isinstance(p["fraud_probability"], float), f"Expected float, got type {type(p['fraud_probability'])}"
         assert isinstance(p["is_fraud"], (bool, np.bool)), f"Fraud prediction must be boolean, got {type(p['is_fraud'])}"
-        assert 0 <= p["fraud_probability"] <= 1, f"Fraud probability must be between 0 and 1, got {p['fraud_probability']}"
\ No newline at end of file
+        assert 0 <= p["fraud_probability"] <= 1, f"Fraud probability must be between 0 and 1, got {p['fraud_probability']}"
+
+def test_batch_prediction_returns_partial_results(client, valid_batch_transactions, cleanup_batch_predictions):
+    """Test already stored transactions are reported as conflicts instead of failing the batch"""
+    first = client.post("/api/v1/transactions/batch", json={"transactions": valid_batch_transactions[:1]})
+    assert first.status_code == 201
+
+    response = client.post("/api/v1/transactions/batch", json={"transactions": valid_batch_transactions})
+    assert response.status_code == 201
+
+    data = response.json()
+    assert data["conflicts"] == [valid_batch_transactions[0]["transaction_id"]]
+    assert [p["transaction_id"] for p in data["results"]] == [
+        tx["transaction_id"] for tx in valid_batch_transactions[1:]
+    ]
+
+def test_list_predictions_follows_cursor(client, valid_batch_transactions, cleanup_batch_predictions):
+    """Test the next-page cursor is returned in a header and rejected when malformed"""
+    client.post("/api/v1/transactions/batch", json={"transactions": valid_batch_transactions})
+
+    response = client.get("/api/v1/transactions", params={"limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    cursor = response.headers["X-Next-Cursor"]
+
+    next_page = client.get("/api/v1/transactions", params={"limit": 1, "cursor": cursor})
+    assert next_page.status_code == 200
+    assert next_page.json()[0]["transaction_id"] != response.json()[0]["transaction_id"]
+
+    assert client.get("/api/v1/transactions", params={"cursor": "garbage"}).status_code == 400
+
+    # Offset paging is gone; say so instead of serving the first page again
+    response = client.get("/api/v1/transactions", params={"skip": 10})
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"]
+
+def test_stream_predictions_reports_bad_lines(client, valid_batch_transactions, cleanup_batch_predictions, monkeypatch):
+    """Test NDJSON is scored across chunks with per-line errors and results in input order"""
+    monkeypatch.setattr(prediction.settings, "BATCH_SIZE", 2)
+
+    bad_timestamp = dict(valid_batch_transactions[2], timestamp="yesterday")
+    lines = [
+        json.dumps(valid_batch_transactions[0]),
+        "{not json",
+        "",
+        json.dumps(valid_batch_transactions[1]),
+        json.dumps(valid_batch_transactions[0]),  # Already stored by the first line
+        json.dumps(valid_batch_transactions[2]),
+    ]
+    body = "\n".join(lines) + "\n" + json.dumps(bad_timestamp)
+
+    response = client.post(
+        "/api/v1/transactions/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2, 4, 5, 6, 7]
+    assert [r.get("transaction_id") for r in results if "error" not in r] == ["test_tx_0", "test_tx_1", "test_tx_2"]
+    assert [r["line"] for r in results if "error" in r] == [2, 5, 7]
+    assert "already exists" in results[3]["error"]
+
+def test_stream_predictions_records_outcome(client, valid_single_transaction, monkeypatch):
+    """Test the requests metric records failed and abandoned streams, not just 200"""
+    def requests_with(status_code):
+        labels = {"endpoint": "stream_predictions", "status_code": str(status_code)}
+        return REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+    async def fail(chunk, errors):
+        raise RuntimeError("scoring failed")
+
+    before = requests_with(500)
+    monkeypatch.setattr(prediction, "_score_stream_chunk", fail)
+    with pytest.raises(RuntimeError):
+        client.post("/api/v1/transactions/stream", content=json.dumps(valid_single_transaction))
+    assert requests_with(500) == before + 1
+
+    async def disconnect():
+        return {"type": "http.disconnect"}
+
+    async def consume():
+        request = Request({"type": "http", "method": "POST", "headers": []}, disconnect)
+        return [chunk async for chunk in prediction._stream_predictions(request)]
+
+    before = requests_with(prediction.CLIENT_CLOSED_REQUEST)
+    assert asyncio.run(consume()) == []
+    assert requests_with(prediction.CLIENT_CLOSED_REQUEST) == before + 1
+
+def test_batch_prediction_binary_matrix(client, model_manager, preprocessor, valid_batch_transactions, cleanup_batch_predictions):
+    """Test a binary matrix body is scored like JSON and answered in binary"""
+    body = encode_matrix_request(
+        transaction_ids=[tx["transaction_id"] for tx in valid_batch_transactions],
+        amounts=[tx["amount"] for tx in valid_batch_transactions],
+        timestamps=[tx["timestamp"] for tx in valid_batch_transactions],
+        v_features=np.array([[tx["features"][f"V{i}"] for i in range(1, 29)] for tx in valid_batch_transactions]),
+        float_size=8
+    )
+
+    response = client.post("/api/v1/transactions/batch", content=body, headers={"Content-Type": MATRIX_MEDIA_TYPE})
+    assert response.status_code == 201
+    assert response.headers["content-type"] == MATRIX_MEDIA_TYPE
+
+    result = decode_matrix_response(response.content)
+    expected = model_manager.batch_predict(preprocessor.preprocess_batch(valid_batch_transactions))
+    assert result["transaction_ids"] == [tx["transaction_id"] for tx in valid_batch_transactions]
+    np.testing.assert_array_equal(result["fraud_probability"], expected)
+    assert result["conflicts"] == []
+
+    # Same body again: everything is already stored
+    again = decode_matrix_response(
+        client.post("/api/v1/transactions/batch", content=body, headers={"Content-Type": MATRIX_MEDIA_TYPE}).content
+    )
+    assert again["transaction_ids"] == []
+    assert again["conflicts"] == result["transaction_ids"]
+
+def test_batch_prediction_rejects_truncated_matrix(client):
+    """Test a malformed binary body is a 400, not a 500"""
+    body = encode_matrix_request(["t"], [1.0], ["2024-02-18T10:30:00Z"], np.zeros((1, 28)))
+    response = client.post("/api/v1/transactions/batch", content=body[:-4], headers={"Content-Type": MATRIX_MEDIA_TYPE})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("transaction_id", [None, 123, ""])
+def test_batch_prediction_rejects_invalid_binary_ids(client, transaction_id):
+    """Test binary bodies need non-empty string transaction ids, like JSON bodies"""
+    body = encode_matrix_request([transaction_id], [1.0], ["2024-02-18T10:30:00Z"], np.zeros((1, 28)))
+    response = client.post("/api/v1/transactions/batch", content=body, headers={"Content-Type": MATRIX_MEDIA_TYPE})
+    assert response.status_code == 400
+    assert "transaction_id" in response.json()["detail"]
+
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({
+        "transaction_id": pa.array([transaction_id]),
+        "amount": [1.0],
+        "timestamp": ["2024-02-18T10:30:00Z"],
+        "features": pa.FixedSizeListArray.from_arrays(pa.array(np.zeros(28)), 28),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post(
+        "/api/v1/transactions/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": ARROW_MEDIA_TYPE}
+    )
+    assert response.status_code == 400
+
+def test_batch_prediction_arrow(client, valid_batch_transactions, cleanup_batch_predictions):
+    """Test an Arrow IPC body is answered with an Arrow table"""
+    pa = pytest.importorskip("pyarrow")
+    v_features = np.array([[tx["features"][f"V{i}"] for i in range(1, 29)] for tx in valid_batch_transactions])
+    table = pa.table({
+        "transaction_id": [tx["transaction_id"] for tx in valid_batch_transactions],
+        "amount": [tx["amount"] for tx in valid_batch_transactions],
+        "timestamp": [tx["timestamp"] for tx in valid_batch_transactions],
+        "features": pa.FixedSizeListArray.from_arrays(pa.array(v_features.ravel()), 28),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    response = client.post(
+        "/api/v1/transactions/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": ARROW_MEDIA_TYPE}
+    )
+    assert response.status_code == 201
+    result = pa.ipc.open_stream(response.content).read_all()
+    assert result.column("transaction_id").to_pylist() == [tx["transaction_id"] for tx in valid_batch_transactions]
+
+def test_arrow_zoned_timestamps_match_json(preprocessor, valid_single_transaction):
+    """Test a zoned Arrow timestamp gets the same local day_part as the same time sent as JSON"""
+    pa = pytest.importorskip("pyarrow")
+    # 20:00 in New York is 01:00 UTC the next day
+    transaction = dict(valid_single_transaction, timestamp="2024-01-01T20:00:00-05:00")
+    table = pa.table({
+        "transaction_id": [transaction["transaction_id"]],
+        "amount": [transaction["amount"]],
+        "timestamp": pa.array(
+            [datetime.fromisoformat(transaction["timestamp"])], type=pa.timestamp("us", tz="America/New_York")
+        ),
+        "features": pa.FixedSizeListArray.from_arrays(
+            pa.array([transaction["features"][f"V{i}"] for i in range(1, 29)]), 28
+        ),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    batch = decode_arrow_request(sink.getvalue().to_pybytes())
+    from_arrow = preprocessor.preprocess_columns(batch.v_features, batch.amounts, batch.timestamps)
+    from_json = preprocessor.preprocess_requests([TransactionRequest(**transaction)])
+    assert preprocessor._batch_day_parts(batch.timestamps).tolist() == [3]
+    np.testing.assert_array_equal(from_arrow, from_json)
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_matches_response_models(monkeypatch, use_orjson):
+    """Test fast response bodies serialize exactly like the pydantic response models"""
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+
+    body = responses.batch_body(
+        transaction_ids=["a", "b", "c"],
+        probabilities=np.array([0.0, 0.123456789012345, 1.0], dtype=np.float32),
+        is_fraud=[False, False, True],
+        timestamps=[
+            datetime(2024, 2, 18, 10, 30),
+            datetime(2024, 2, 18, 10, 30, 0, 250, tzinfo=timezone.utc),
+            datetime.fromisoformat("2024-02-18T23:59:59+05:30"),
+        ],
+        processing_time=0.5,
+        conflicts=["d"],
+        total_processing_time=1.25,
+        timestamp=datetime(2024, 2, 18, 11, 0, tzinfo=timezone.utc)
+    )
+    expected = BatchPredictionResponse(**body).model_dump_json()
+    assert responses.dumps(body) == expected.encode()
+    assert json.loads(responses.dumps(body)) == json.loads(expected)
+
+def test_stage_timing(client, monkeypatch, valid_single_transaction, cleanup_prediction):
+    """Test predictions report each stage in Server-Timing and the stage histogram"""
+    labels = {"endpoint": "create_prediction", "stage": "inference"}
+    before = REGISTRY.get_sample_value("request_stage_seconds_count", labels) or 0
+
+    response = client.post("/api/v1/transactions", json=valid_single_transaction)
+    assert response.status_code == 201
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["parse", "preprocess", "inference", "persist", "metrics", "serialize", "total"]
+    assert REGISTRY.get_sample_value("request_stage_seconds_count", labels) == before + 1
+    assert "Server-Timing" not in client.get("/health").headers
+
+    # Switched off, routes are built without the timer
+    monkeypatch.setattr(timing.settings, "ENABLE_STAGE_TIMING", False)
+    transaction = dict(valid_single_transaction, transaction_id="test_tx_untimed")
+    with TestClient(create_app()) as untimed:
+        response = untimed.post("/api/v1/transactions", json=transaction)
+    db = next(get_db())
+    try:
+        db.query(Prediction).filter_by(transaction_id="test_tx_untimed").delete()
+        db.commit()
+    finally:
+        db.close()
+    assert response.status_code == 201
+    assert "Server-Timing" not in response.headers
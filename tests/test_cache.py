@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timezone
+from prometheus_client import REGISTRY
+from src.db.cache import InMemoryLRUBackend, PredictionCache
+from src.db.crud import AsyncPredictionCRUD
+from src.db.models import Prediction
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_prediction(transaction_id: str) -> Prediction:
+    return Prediction(
+        transaction_id=transaction_id,
+        amount=10.0,
+        fraud_probability=0.25,
+        is_fraud=False,
+        processing_time=0.01,
+        created_at=datetime(2024, 2, 18, tzinfo=timezone.utc)
+    )
+
+
+def test_lru_backend_evicts_least_recently_used():
+    """Test the entry untouched for longest goes first when the cache is full"""
+    backend = InMemoryLRUBackend(max_size=2, ttl=60)
+    evictions = sample('prediction_cache_evictions_total', reason='capacity')
+    backend.set("a", {"v": 1})
+    backend.set("b", {"v": 2})
+    backend.get("a")  # "b" is now the least recently used
+    backend.set("c", {"v": 3})
+
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": 1}
+    assert backend.get("c") == {"v": 3}
+    assert sample('prediction_cache_evictions_total', reason='capacity') == evictions + 1
+
+
+def test_lru_backend_expires_entries():
+    """Test entries are dropped once their TTL has passed"""
+    clock = FakeClock()
+    backend = InMemoryLRUBackend(max_size=10, ttl=5, clock=clock)
+    backend.set("a", {"v": 1})
+    clock.now = 4.9
+    assert backend.get("a") == {"v": 1}
+    clock.now = 5.0
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_prediction_cache_counts_hits_and_misses():
+    """Test lookups are counted and invalidated entries miss"""
+    cache = PredictionCache(InMemoryLRUBackend(max_size=10, ttl=60))
+    hits = sample('prediction_cache_requests_total', result='hit')
+    misses = sample('prediction_cache_requests_total', result='miss')
+
+    cache.put(make_prediction("tx_1"))
+    assert cache.get("tx_1")["fraud_probability"] == 0.25
+    cache.invalidate("tx_1")
+    assert cache.get("tx_1") is None
+
+    assert sample('prediction_cache_requests_total', result='hit') == hits + 1
+    assert sample('prediction_cache_requests_total', result='miss') == misses + 1
+
+
+def test_get_prediction_served_from_cache(client, valid_single_transaction, cleanup_prediction, mocker):
+    """Test GET after POST is answered without a database query"""
+    created = client.post("/api/v1/transactions", json=valid_single_transaction)
+    assert created.status_code == 201
+    get_from_db = mocker.spy(AsyncPredictionCRUD, "get_prediction")
+
+    response = client.get(f"/api/v1/transactions/{valid_single_transaction['transaction_id']}")
+
+    assert response.status_code == 200
+    assert get_from_db.call_count == 0
+    assert response.json()["fraud_probability"] == pytest.approx(created.json()["fraud_probability"], abs=1e-4)
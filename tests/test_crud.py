@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.db.crud import PredictionCRUD, AsyncPredictionCRUD
+from src.db.database import to_async_url
+from src.db.init_db import upgrade_schema
+
+
+def make_record(transaction_id: str, probability: float = 0.25) -> dict:
+    """Prediction record as passed to create_predictions_bulk"""
+    return {
+        "transaction_id": transaction_id,
+        "amount": 42.5,
+        "fraud_probability": probability,
+        "is_fraud": probability >= 0.8,
+        "processing_time": 0.01,
+    }
+
+
+def test_bulk_insert_returns_stored_rows(sqlite_session):
+    """Test a batch is stored in one go with server-generated columns returned"""
+    crud = PredictionCRUD(db=sqlite_session)
+    created, conflicts = crud.create_predictions_bulk([make_record(f"bulk_{i}") for i in range(5)])
+
+    assert conflicts == []
+    assert sorted(p.transaction_id for p in created) == [f"bulk_{i}" for i in range(5)]
+    assert all(p.id is not None and p.created_at is not None for p in created)
+    assert crud.get_prediction_count() == 5
+
+
+def test_bulk_insert_reports_conflicts(sqlite_session):
+    """Test existing and repeated transaction IDs are skipped and reported per row"""
+    crud = PredictionCRUD(db=sqlite_session)
+    crud.create_prediction(**make_record("existing", probability=0.9))
+
+    created, conflicts = crud.create_predictions_bulk([
+        make_record("new_1"),
+        make_record("existing"),
+        make_record("new_2"),
+        make_record("new_1"),
+    ])
+
+    assert sorted(p.transaction_id for p in created) == ["new_1", "new_2"]
+    assert sorted(conflicts) == ["existing", "new_1"]
+    # The existing row was left untouched
+    assert float(crud.get_prediction("existing").fraud_probability) == 0.9
+    assert crud.get_prediction_count() == 3
+
+
+@pytest.mark.asyncio
+async def test_async_crud_matches_sync_contract(sqlite_file_url):
+    """Test the async CRUD stores, conflicts and reads back like the sync one"""
+    engine = create_async_engine(to_async_url(sqlite_file_url))
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            crud = AsyncPredictionCRUD(db=db)
+            single = await crud.create_prediction(**make_record("async_single"))
+            assert single.id is not None and single.created_at is not None
+
+            with pytest.raises(ValueError):
+                await crud.create_prediction(**make_record("async_single"))
+
+            created, conflicts = await crud.create_predictions_bulk(
+                [make_record("async_single"), make_record("async_bulk")]
+            )
+            assert [p.transaction_id for p in created] == ["async_bulk"]
+            assert conflicts == ["async_single"]
+
+            assert (await crud.get_prediction("async_bulk")).created_at is not None
+            assert await crud.get_prediction("missing") is None
+            assert await crud.get_prediction_count() == 2
+            assert len(await crud.list_predictions(limit=1)) == 1
+    finally:
+        await engine.dispose()
+
+
+def test_keyset_pages_cover_every_row_once(sqlite_session):
+    """Test cursor pages are newest first, stable, and neither skip nor repeat rows"""
+    crud = PredictionCRUD(db=sqlite_session)
+    # One bulk insert: every row shares the same created_at, so only id breaks ties
+    crud.create_predictions_bulk([make_record(f"page_{i}", probability=(i % 10) / 10) for i in range(25)])
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = crud.list_predictions_page(limit=7, cursor=cursor)
+        seen.extend(p.id for p in page)
+        if cursor is None:
+            break
+
+    assert len(page) == 4
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 25
+
+
+def test_keyset_pages_apply_filters(sqlite_session):
+    """Test filters narrow every page, not just the first"""
+    crud = PredictionCRUD(db=sqlite_session)
+    records = [make_record(f"filter_{i}", probability=0.9 if i % 3 == 0 else 0.1) for i in range(12)]
+    for i, record in enumerate(records):
+        record["amount"] = 10.0 * i
+    crud.create_predictions_bulk(records)
+
+    page, cursor = crud.list_predictions_page(limit=2, is_fraud=True, min_amount=20, max_amount=90)
+    rest, end = crud.list_predictions_page(limit=2, cursor=cursor, is_fraud=True, min_amount=20, max_amount=90)
+
+    assert [p.transaction_id for p in page + rest] == ["filter_9", "filter_6", "filter_3"]
+    assert end is None
+
+
+def test_invalid_cursor_is_rejected(sqlite_session):
+    """Test a cursor that was not issued by the API raises ValueError"""
+    with pytest.raises(ValueError):
+        PredictionCRUD(db=sqlite_session).list_predictions_page(cursor="not-a-cursor")
+
+
+def test_upgrade_schema_updates_old_tables(tmp_path):
+    """Test a predictions table from before model versions and keyset indexes is brought up to date"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE predictions (id INTEGER PRIMARY KEY, transaction_id VARCHAR(100) NOT NULL UNIQUE, "
+            "amount NUMERIC(15, 2) NOT NULL, fraud_probability NUMERIC(5, 4) NOT NULL, is_fraud BOOLEAN NOT NULL, "
+            "processing_time NUMERIC(10, 2) NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        ))
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+    assert "model_version" in {column["name"] for column in inspect(engine).get_columns("predictions")}
+    assert {index["name"] for index in inspect(engine).get_indexes("predictions")} >= {
+        "ix_predictions_created_at_id", "ix_predictions_is_fraud_created_at_id"
+    }
+    engine.dispose()
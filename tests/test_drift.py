@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from src.monitoring import metrics
+from src.monitoring.drift import DriftAccumulator
+from src.monitoring.drift_scheduler import DriftScheduler
+from src.monitoring.metrics import calculate_psi
+
+
+@pytest.mark.parametrize("n_values", [1000, 1001, 1737, 5000])
+def test_accumulator_psi_matches_calculate_psi(n_values):
+    """Test the incremental PSI equals calculate_psi over the same window"""
+    rng = np.random.default_rng(n_values)
+    # Shift the distribution halfway so later values fall outside the first window's range
+    values = np.concatenate([rng.normal(size=n_values // 2), rng.normal(1.5, 2, size=n_values - n_values // 2)])
+
+    accumulator = DriftAccumulator(window_size=1000, recent_size=100)
+    for value in values:
+        accumulator.update(value)
+
+    historical, recent = accumulator.window()
+    np.testing.assert_array_equal(historical, values[-1000:-100])
+    np.testing.assert_array_equal(recent, values[-100:])
+    expected = calculate_psi(historical, recent, bin_edges=accumulator.bin_edges)
+    assert accumulator.psi() == pytest.approx(expected, rel=1e-12)
+
+
+def test_accumulator_matches_calculate_psi_with_fixed_edges():
+    """Test the accumulator and calculate_psi agree when both use the same fixed edges"""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 1, size=1000)
+    accumulator = DriftAccumulator(bin_edges=np.linspace(0, 1, 11))
+    for value in values:
+        accumulator.update(value)
+
+    assert accumulator.psi() == pytest.approx(
+        calculate_psi(values[:-100], values[-100:], bin_edges=np.linspace(0, 1, 11)), rel=1e-12
+    )
+
+
+def test_accumulator_not_ready_until_window_full():
+    """Test PSI is undefined before a full window has been seen"""
+    accumulator = DriftAccumulator(window_size=10, recent_size=2)
+    for value in range(9):
+        accumulator.update(value)
+    assert not accumulator.ready
+    assert np.isnan(accumulator.psi())
+    accumulator.update(9)
+    assert accumulator.ready
+    assert accumulator.psi() >= 0
+
+
+@pytest.mark.asyncio
+async def test_scheduled_drift_defers_work_to_scheduler(monkeypatch):
+    """Test scheduled mode only queues observations until the scheduler refreshes"""
+    monkeypatch.setattr(metrics.settings, "DRIFT_MODE", "scheduled")
+    monkeypatch.setattr(metrics, "DRIFT_ACCUMULATORS", {})
+    monkeypatch.setattr(metrics, "PREDICTION_ACCUMULATOR", DriftAccumulator(bin_edges=np.linspace(0, 1, 11)))
+    monkeypatch.setattr(metrics, "PENDING_DRIFT_OBSERVATIONS", type(metrics.PENDING_DRIFT_OBSERVATIONS)(maxlen=1000))
+
+    rng = np.random.default_rng(1)
+    for _ in range(1000):
+        metrics.track_prediction(
+            fraud_probability=float(rng.uniform()),
+            is_fraud=False,
+            features={"V1": float(rng.normal())},
+            prediction_time=0.001,
+            amount=10.0
+        )
+    assert metrics.DRIFT_ACCUMULATORS == {}
+    assert len(metrics.PENDING_DRIFT_OBSERVATIONS) == 1000
+
+    await DriftScheduler(interval=60).refresh()
+
+    assert not metrics.PENDING_DRIFT_OBSERVATIONS
+    psi = metrics.DRIFT_ACCUMULATORS["V1"].psi()
+    assert metrics.PSI_SCORE.labels(feature_name="V1")._value.get() == psi
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from src.cli.loadgen import load_payloads, run_load
+
+
+def recording_transport(sent: list, delay: float = 0.0) -> httpx.MockTransport:
+    """Transport answering 201, optionally stalling the event loop like an overloaded client"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        time.sleep(delay)
+        return httpx.Response(201, json={})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_steps_send_at_each_rate_with_unique_ids(valid_single_transaction):
+    """Test each rate sends rps * duration requests and replays get fresh transaction IDs"""
+    sent = []
+    async with httpx.AsyncClient(transport=recording_transport(sent), base_url="http://test") as client:
+        results = await run_load(client, [valid_single_transaction], [20, 40], duration=0.5)
+
+    assert [sum(result.outcomes.values()) for result in results] == [10, 20]
+    assert len({body["transaction_id"] for body in sent}) == 30
+    summary = results[1].summary()
+    assert summary["outcomes"] == {"201": 20} and summary["error_rate"] == 0
+    assert summary["latency_ms"]["p50"] is not None
+    assert sum(count for _, count in summary["histogram_ms"]) == 20
+
+
+@pytest.mark.asyncio
+async def test_latency_counts_from_the_schedule(valid_single_transaction):
+    """Test time spent behind schedule counts as latency (coordinated omission)"""
+    sent = []
+    async with httpx.AsyncClient(transport=recording_transport(sent, delay=0.02), base_url="http://test") as client:
+        # 20ms per request at 200 rps: sends fall further and further behind
+        result, = await run_load(client, [valid_single_transaction], [200], duration=0.25)
+
+    summary = result.summary()
+    assert summary["service_time_ms"]["max"] < 100
+    assert summary["latency_ms"]["max"] > 500
+    assert summary["max_send_lag_ms"] > 500
+
+
+@pytest.mark.asyncio
+async def test_latency_includes_errors_and_timeouts(valid_single_transaction):
+    """Test failed and timed-out requests count in the latency percentiles"""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) % 2:
+            await asyncio.sleep(0.2)
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(503)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://test") as client:
+        result, = await run_load(client, [valid_single_transaction], [20], duration=0.2)
+
+    summary = result.summary()
+    assert summary["outcomes"] == {"timeout": 2, "503": 2}
+    assert summary["succeeded"] == 0 and summary["error_rate"] == 1
+    assert summary["latency_ms"]["max"] >= 200
+    assert summary["success_latency_ms"]["p50"] is None
+    assert sum(count for _, count in summary["histogram_ms"]) == 4
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_groups_transactions(tmp_path, valid_single_transaction):
+    """Test batch mode posts groups of transactions replayed from a JSONL file"""
+    path = tmp_path / "payloads.jsonl"
+    path.write_text(json.dumps(valid_single_transaction) + "\n\n")
+    sent = []
+    async with httpx.AsyncClient(transport=recording_transport(sent), base_url="http://test") as client:
+        await run_load(client, load_payloads(path), [20], duration=0.1, endpoint="batch", batch_size=3)
+
+    assert [len(body["transactions"]) for body in sent] == [3, 3]
@@ -0,0 +1,52 @@
+import json
+import logging
+import queue
+from src.monitoring.logs import JSONFormatter, NonBlockingQueueHandler, RateLimitFilter
+
+
+def make_record(msg: str = "Model reloaded: %s", *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("src.test", logging.INFO, __file__, 1, msg, args or ("v2",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    """Test records become one JSON object with the message and the `extra` fields"""
+    entry = json.loads(JSONFormatter().format(make_record(model_version="v2", startup_time=1.5)))
+    assert entry["message"] == "Model reloaded: v2"
+    assert entry["level"] == "INFO" and entry["logger"] == "src.test"
+    assert entry["model_version"] == "v2" and entry["startup_time"] == 1.5
+
+
+def test_rate_limit_and_sampling_per_message_type(monkeypatch):
+    """Test each message type gets its own budget and the next record reports what was suppressed"""
+    now = [100.0]
+    monkeypatch.setattr("src.monitoring.logs.time.monotonic", lambda: now[0])
+    log_filter = RateLimitFilter(rate=1.0, burst=2, sample_rates={"Sampled out: %s": 0.0})
+
+    assert [log_filter.filter(make_record()) for _ in range(4)] == [True, True, False, False]
+    assert log_filter.filter(make_record("Another message: %s")), "Other messages have their own budget"
+    assert not log_filter.filter(make_record("Sampled out: %s"))
+
+    now[0] += 1.0
+    record = make_record()
+    assert log_filter.filter(record)
+    assert record.suppressed == 2
+    assert log_filter.rate_limited == 2 and log_filter.sampled_out == 1
+
+
+def test_queue_handler_never_blocks_or_formats():
+    """Test a full queue drops records, and payloads are left for the writer to format"""
+    class Payload:
+        formatted = 0
+
+        def __str__(self):
+            Payload.formatted += 1
+            return "payload"
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record("Raw fraud probabilities: %s", Payload()))
+    handler.handle(make_record("Raw fraud probabilities: %s", Payload()))
+    assert handler.dropped == 1
+    assert Payload.formatted == 0
+    assert handler.queue.get_nowait().getMessage() == "Raw fraud probabilities: payload"
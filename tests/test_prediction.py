@@ -1,6 +1,13 @@
 import pytest
+import asyncio
+import time
 import numpy as np
+import pandas as pd
+from datetime import datetime
 from src.core.preprocessing import TransactionPreprocessor
+from src.core.tree_engine import FlatTreeEnsemble
+from src.core.batching import PredictionCoalescer
+from src.core.executor import InferenceExecutor
 
 def test_single_transaction_preprocessing(preprocessor, valid_single_transaction):
     """Test preprocessing of a single valid transaction"""
@@ -82,4 +89,136 @@ def test_batch_transaction_processing(preprocessor, model_manager, valid_batch_t
 
     # Test fraud classifications
     fraud_flags = [model_manager.is_fraud(p) for p in predictions]
-    assert all(isinstance(f, (bool, np.bool)) for f in fraud_flags), "All fraud flags should be boolean"
\ No newline at end of file
+    assert all(isinstance(f, (bool, np.bool)) for f in fraud_flags), "All fraud flags should be boolean"
+
+def test_batch_preprocessing_matches_single(preprocessor, valid_batch_transactions):
+    """Test vectorized batch preprocessing gives the same rows as the single path"""
+    transactions = [dict(tx) for tx in valid_batch_transactions]
+    # Mix timestamp styles: UTC offsets keep their local hour, basic format falls back
+    transactions[0]["timestamp"] = "2024-02-18T23:59:59.250+05:30"
+    transactions[1]["timestamp"] = datetime(2024, 2, 18, 13, 5)
+    transactions[2]["timestamp"] = "20240218T061500"
+
+    features = preprocessor.preprocess_batch(transactions)
+    expected = np.vstack([preprocessor.preprocess_transaction(tx) for tx in transactions])
+
+    np.testing.assert_array_equal(features, expected)
+    np.testing.assert_array_equal(features[:, -1], [3, 2, 1])
+
+
+def test_request_preprocessing_matches_dicts(preprocessor, valid_batch_transactions):
+    """Test validated requests, with object or array features, preprocess like the dict path"""
+    from src.api.schemas import TransactionRequest
+    transactions = [dict(tx) for tx in valid_batch_transactions]
+    transactions[0]["timestamp"] = "2024-02-18T23:59:59.250+05:30"
+    expected = preprocessor.preprocess_batch(transactions)
+
+    transactions[1]["features"] = list(transactions[1]["features"].values())
+    requests = [TransactionRequest.model_validate(tx) for tx in transactions]
+
+    np.testing.assert_array_equal(preprocessor.preprocess_requests(requests), expected)
+    for request, row in zip(requests, expected):
+        np.testing.assert_array_equal(preprocessor.preprocess_request(request)[0], row)
+
+
+def test_batch_preprocessing_reports_bad_row(preprocessor, valid_batch_transactions):
+    """Test a bad transaction in a batch is reported by position and id"""
+    transactions = [dict(tx) for tx in valid_batch_transactions]
+    transactions[1]["timestamp"] = "not-a-timestamp"
+
+    with pytest.raises(ValueError) as exc_info:
+        preprocessor.preprocess_batch(transactions)
+
+    assert "transaction 1 (test_tx_1)" in str(exc_info.value)
+
+
+def test_compiled_scaler_matches_sklearn(model_manager, preprocessor, valid_single_transaction):
+    """Test the precompiled Amount scaler is bit-for-bit identical to the fitted scaler"""
+    rng = np.random.default_rng(0)
+    amounts = np.concatenate([[0.01, 1.0, 88.35, 150.0, 25691.16], rng.uniform(0, 30000, 1000)])
+    expected = model_manager.scaler.transform(pd.DataFrame({"Amount": amounts}))[:, 0]
+
+    np.testing.assert_array_equal(model_manager.amount_scaler.transform(amounts), expected)
+    single = [model_manager.amount_scaler.transform_one(float(a)) for a in amounts]
+    np.testing.assert_array_equal(single, expected)
+
+    transaction = dict(valid_single_transaction, amount=float(amounts[-1]))
+    features = preprocessor.preprocess_transaction(transaction)
+    assert features[0, 28] == expected[-1]
+
+
+def test_native_engine_matches_predict_proba(model_manager, preprocessor, valid_batch_transactions):
+    """Test the flattened-tree engine reproduces XGBoost probabilities"""
+    engine = FlatTreeEnsemble.from_xgboost(model_manager.model)
+
+    rng = np.random.default_rng(7)
+    features = rng.normal(scale=2.0, size=(2000, 30))
+    features[:, 29] = rng.integers(0, 4, size=2000)
+    features[::9, 3] = np.nan  # Missing values follow each split's default branch
+    features = np.vstack([features, preprocessor.preprocess_batch(valid_batch_transactions)])
+
+    expected = model_manager.model.predict_proba(features)[:, 1]
+    np.testing.assert_allclose(engine.predict_proba(features), expected, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(engine.predict_proba(features[:1]), expected[:1], rtol=0, atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_batches_concurrent_requests(mocker, model_manager, preprocessor, valid_batch_transactions):
+    """Test concurrent single predictions are merged and each caller gets its own result"""
+    executor = InferenceExecutor(model_manager, mode="inline")
+    coalescer = PredictionCoalescer(executor, max_batch_size=4, max_wait_us=50_000)
+    # Pretend requests are arriving fast so the coalescer holds batches open
+    coalescer._arrival_gap = 0.0001
+
+    batch_predict = mocker.spy(model_manager, "batch_predict")
+
+    transactions = [dict(valid_batch_transactions[i % 3], amount=10.0 * (i + 1)) for i in range(10)]
+    features = [preprocessor.preprocess_transaction(tx) for tx in transactions]
+    results = await asyncio.gather(*(coalescer.predict(f) for f in features))
+    calls = [len(call.kwargs["features"]) for call in batch_predict.call_args_list]
+
+    assert results == [model_manager.predict(f) for f in features]
+    assert sum(calls) == 10
+    assert max(calls) <= 4 and len(calls) < 10, f"Requests were not coalesced: {calls}"
+
+
+@pytest.mark.asyncio
+async def test_coalescer_does_not_wait_at_low_traffic(model_manager):
+    """Test a sparse request stream gets a zero wait window"""
+    coalescer = PredictionCoalescer(InferenceExecutor(model_manager), max_batch_size=32, max_wait_us=1000)
+    assert coalescer._window() == 0.0
+
+    coalescer._arrival_gap = 0.5  # One request every half second
+    assert coalescer._window() == 0.0
+
+    coalescer._arrival_gap = 0.00001
+    assert 0 < coalescer._window() <= 0.001
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process"])
+async def test_inference_executor_matches_inline(mode, model_manager, preprocessor, valid_batch_transactions):
+    """Test pooled inference returns the same probabilities as calling the model directly"""
+    features = preprocessor.preprocess_batch(valid_batch_transactions)
+    executor = InferenceExecutor(model_manager, mode=mode, workers=1, timeout=60)
+    await executor.start()
+    try:
+        np.testing.assert_array_equal(
+            await executor.batch_predict(features), model_manager.batch_predict(features)
+        )
+        assert await executor.predict(features[:1]) == model_manager.predict(features[:1])
+    finally:
+        await executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_times_out(mocker, model_manager):
+    """Test a call that takes longer than the timeout is abandoned with TimeoutError"""
+    mocker.patch.object(model_manager, "batch_predict", side_effect=lambda features: time.sleep(0.5))
+    executor = InferenceExecutor(model_manager, mode="thread", workers=1, timeout=0.05)
+    await executor.start()
+    try:
+        with pytest.raises(TimeoutError):
+            await executor.batch_predict(np.zeros((1, 30)))
+    finally:
+        await executor.shutdown()
@@ -0,0 +1,48 @@
+import threading
+from src.api import profiling
+from src.monitoring.profiler import RequestProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_stacks(client, monkeypatch):
+    """Test the stack sampler needs the admin token and returns collapsed stacks of running threads"""
+    from src.api.routes import admin
+    assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 403
+    monkeypatch.setattr(admin.settings, "ADMIN_TOKEN", "secret")
+    headers = {"Authorization": "Bearer secret"}
+    assert client.get("/debug/profile", params={"seconds": 1000}, headers=headers).status_code == 422
+
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        response = client.get("/debug/profile", params={"seconds": 0.2, "interval": 0.001}, headers=headers)
+    finally:
+        stop.set()
+        worker.join()
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and "busy_loop (test_profiling.py:" in busy[0]
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert not any(line.startswith("stack-sampler;") for line in lines)
+
+
+def test_profile_requests(client, valid_single_transaction, cleanup_prediction):
+    """Test profile_requests cProfiles prediction requests only while it is active"""
+    with profiling.profile_requests(RequestProfiler(fraction=1.0)) as profiler:
+        response = client.post("/api/v1/transactions", json=valid_single_transaction)
+        client.get("/health")
+    assert response.status_code == 201
+    assert profiling._profiler is None
+
+    report = profiler.report(sort="tottime", limit=200)
+    assert report.startswith("1 of 1 requests profiled")
+    assert "create_prediction" in report
+    client.get("/api/v1/transactions")
+    assert profiler.seen == 1
+    assert RequestProfiler(fraction=0.5).report() == "0 of 0 requests profiled\n"
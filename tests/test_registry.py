@@ -0,0 +1,110 @@
+import os
+import shutil
+import pytest
+import numpy as np
+from prometheus_client import REGISTRY
+from src.core.registry import ModelRegistry, ModelWatcher, model_registry
+from src.db.database import get_db
+from src.db.models import Prediction
+
+MODEL_FILES = ["models/model.joblib", "models/amount_scaler.joblib", "models/class_weights.joblib"]
+
+
+@pytest.fixture
+def registry_dir(tmp_path):
+    """Registry directory with the current model files as version "v2" """
+    (tmp_path / "v2").mkdir()
+    for path in MODEL_FILES:
+        shutil.copy(path, tmp_path / "v2")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_after_warmup_and_hooks(mocker, model_manager, registry_dir):
+    """Test a new version is warmed and prepared before it replaces the old one"""
+    registry = ModelRegistry(model_manager, registry_dir=str(registry_dir), warmup_rows=8)
+    warmup = mocker.spy(registry, "warmup")
+    seen_active = []
+
+    async def hook(model):
+        seen_active.append(registry.active)
+
+    registry.add_prepare_hook(hook)
+    model, previous = await registry.reload("v2")
+
+    assert previous is model_manager and registry.active is model
+    assert model.version == "v2"
+    assert seen_active == [model_manager], "Hooks must run while the old version still serves"
+    warmup.assert_called_once_with(model)
+    assert REGISTRY.get_sample_value("model_version_info", {"version": "v2"}) == 1
+    assert REGISTRY.get_sample_value("model_version_info", {"version": model_manager.version}) == 0
+    # The registry stands in for the active model
+    features = np.zeros((2, 30))
+    np.testing.assert_array_equal(registry.batch_predict(features), model_manager.batch_predict(features))
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_serving(model_manager, registry_dir):
+    """Test unknown or unsafe versions leave the active model in place"""
+    registry = ModelRegistry(model_manager, registry_dir=str(registry_dir))
+    with pytest.raises(FileNotFoundError):
+        await registry.reload("v3")
+    with pytest.raises(ValueError):
+        await registry.reload("..")
+    shutil.copytree(registry_dir / "v2", registry_dir / "incomplete")
+    os.remove(registry_dir / "incomplete" / "amount_scaler.joblib")
+    with pytest.raises(FileNotFoundError, match="amount_scaler.joblib"):
+        await registry.reload("incomplete")
+    shutil.copytree(registry_dir / "v2", registry_dir / "broken")
+    (registry_dir / "broken" / "model.joblib").write_bytes(b"not a model")
+    with pytest.raises(RuntimeError):
+        await registry.reload("broken")
+    assert registry.active is model_manager
+
+
+@pytest.mark.asyncio
+async def test_watcher_reloads_once_files_settle(mocker, model_manager, tmp_path, monkeypatch):
+    """Test a change to the model files triggers one reload after it settles"""
+    from src.core import registry as registry_module
+    for setting, path in zip(["MODEL_PATH", "SCALER_PATH", "CLASS_WEIGHTS_PATH"], MODEL_FILES):
+        shutil.copy(path, tmp_path)
+        monkeypatch.setattr(registry_module.settings, setting, str(tmp_path / os.path.basename(path)))
+    registry = ModelRegistry(model_manager)
+    reload = mocker.patch.object(registry, "reload", return_value=(model_manager, model_manager))
+    watcher = ModelWatcher(registry)
+    watcher._loaded = watcher._seen = watcher.signature()
+
+    assert not await watcher.check()
+    os.utime(tmp_path / "model.joblib", ns=(0, 0))
+    assert not await watcher.check(), "Waits one interval for the files to settle"
+    assert await watcher.check()
+    assert not await watcher.check()
+    reload.assert_called_once_with()
+
+
+def test_admin_reload_records_model_version(client, monkeypatch, registry_dir, valid_single_transaction, cleanup_prediction):
+    """Test the admin endpoint swaps versions and new predictions record the version"""
+    from src.api.routes import admin
+    monkeypatch.setattr(model_registry, "_active", model_registry.active)  # Restored afterwards
+    monkeypatch.setattr(model_registry, "registry_dir", registry_dir)
+
+    assert client.post("/admin/model/reload").status_code == 403
+    monkeypatch.setattr(admin.settings, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/model/reload", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+    headers = {"Authorization": "Bearer secret"}
+    assert client.post("/admin/model/reload", json={"version": "missing"}, headers=headers).status_code == 404
+    (registry_dir / "empty").mkdir()
+    assert client.post("/admin/model/reload", json={"version": "empty"}, headers=headers).status_code == 404
+    response = client.post("/admin/model/reload", json={"version": "v2"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == "v2"
+    assert client.get("/admin/model", headers=headers).json()["version"] == "v2"
+
+    assert client.post("/api/v1/transactions", json=valid_single_transaction).status_code == 201
+    db = next(get_db())
+    try:
+        stored = db.query(Prediction).filter_by(transaction_id=valid_single_transaction["transaction_id"]).one()
+        assert stored.model_version == "v2"
+    finally:
+        db.close()
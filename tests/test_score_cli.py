@@ -0,0 +1,148 @@
+import json
+import pytest
+from src.cli import score
+
+
+@pytest.fixture
+def jsonl_input(tmp_path, valid_batch_transactions):
+    """Five transactions with a bad JSON line and a bad timestamp in between"""
+    bad_timestamp = dict(valid_batch_transactions[1], transaction_id="bad_ts", timestamp="yesterday")
+    lines = [
+        json.dumps(dict(valid_batch_transactions[0], transaction_id="cli_0")),
+        "{not json",
+        json.dumps(bad_timestamp),
+        json.dumps(dict(valid_batch_transactions[1], transaction_id="cli_1")),
+        json.dumps(dict(valid_batch_transactions[2], transaction_id="cli_2")),
+    ]
+    path = tmp_path / "input.jsonl"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_score_jsonl_in_order_with_errors(tmp_path, jsonl_input):
+    """Test every input row gets an output row in order, bad rows with an error"""
+    output = tmp_path / "scores.jsonl"
+    assert score.run(jsonl_input, output, workers=0, chunk_size=2) == 5
+
+    results = read_output(output)
+    assert [r["transaction_id"] for r in results] == ["cli_0", None, "bad_ts", "cli_1", "cli_2"]
+    assert [r["error"] is None for r in results] == [True, False, False, True, True]
+    assert all(0 <= r["fraud_probability"] <= 1 for r in results if r["error"] is None)
+
+
+def test_score_flags_rows_without_transaction_id(tmp_path, valid_batch_transactions):
+    """Test rows without a string transaction_id are errors and are not persisted"""
+    from src.db.database import get_db
+    from src.db.models import Prediction
+    no_id = {k: v for k, v in valid_batch_transactions[0].items() if k != "transaction_id"}
+    lines = [
+        json.dumps(no_id),
+        json.dumps(dict(valid_batch_transactions[1], transaction_id=123)),
+        json.dumps([1, 2]),
+        json.dumps(dict(valid_batch_transactions[2], transaction_id="cli_persist_0")),
+    ]
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text("\n".join(lines) + "\n")
+    output = tmp_path / "scores.jsonl"
+    try:
+        assert score.run(input_path, output, workers=0, chunk_size=10, persist_predictions=True) == 4
+    finally:
+        db = next(get_db())
+        try:
+            stored = db.query(Prediction).filter_by(transaction_id="cli_persist_0").delete()
+            db.commit()
+        finally:
+            db.close()
+
+    results = read_output(output)
+    assert [r["error"] for r in results[:3]] == [
+        "Missing or non-string transaction_id",
+        "Missing or non-string transaction_id",
+        "Transaction must be a JSON object",
+    ]
+    assert results[3]["error"] is None
+    assert stored == 1
+
+
+def test_score_csv_flags_rows_without_transaction_id(tmp_path, valid_batch_transactions):
+    """Test blank CSV ids are row errors, written as null and not persisted"""
+    from src.db.database import get_db
+    from src.db.models import Prediction
+    rows = ["transaction_id,amount,timestamp," + ",".join(f"V{i}" for i in range(1, 29))]
+    for transaction_id, tx in zip(["", "csv_persist_0"], valid_batch_transactions):
+        rows.append(",".join([transaction_id, str(tx["amount"]), tx["timestamp"]]
+                             + [str(tx["features"][f"V{i}"]) for i in range(1, 29)]))
+    input_path = tmp_path / "input.csv"
+    output = tmp_path / "scores.jsonl"
+    try:
+        input_path.write_text("\n".join(rows) + "\n")
+        assert score.run(input_path, output, workers=0, chunk_size=10, persist_predictions=True) == 2
+        # A bad timestamp as well takes the row-by-row path
+        bad_timestamp = rows[2].replace(valid_batch_transactions[1]["timestamp"], "yesterday")
+        input_path.write_text("\n".join(rows[:2] + [bad_timestamp]) + "\n")
+        score.run(input_path, tmp_path / "fallback.jsonl", workers=0, chunk_size=10)
+    finally:
+        db = next(get_db())
+        try:
+            stored = db.query(Prediction).filter_by(transaction_id="csv_persist_0").delete()
+            db.commit()
+        finally:
+            db.close()
+
+    assert "NaN" not in output.read_text()
+    results = read_output(output)
+    assert [r["transaction_id"] for r in results] == [None, "csv_persist_0"]
+    assert [r["error"] for r in results] == ["Missing or non-string transaction_id", None]
+    assert stored == 1
+    fallback = read_output(tmp_path / "fallback.jsonl")
+    assert fallback[0] == results[0]
+    assert fallback[1]["transaction_id"] == "csv_persist_0" and "timestamp" in fallback[1]["error"].lower()
+
+
+def test_score_resumes_from_checkpoint(tmp_path, jsonl_input, mocker):
+    """Test an interrupted run picks up after the last finished chunk"""
+    expected_output = tmp_path / "expected.jsonl"
+    score.run(jsonl_input, expected_output, workers=0, chunk_size=2)
+
+    output = tmp_path / "scores.jsonl"
+    real_score_chunk = score.score_chunk
+
+    def interrupt_on_second_chunk(chunk):
+        if score_chunk.call_count == 2:
+            raise KeyboardInterrupt
+        return real_score_chunk(chunk)
+
+    score_chunk = mocker.patch.object(score, "score_chunk", side_effect=interrupt_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        score.run(jsonl_input, output, workers=0, chunk_size=2)
+    mocker.stopall()
+
+    resumed = score.run(jsonl_input, output, workers=0, chunk_size=2)
+    assert resumed == 3
+    assert output.read_text() == expected_output.read_text()
+
+
+def test_score_csv_with_worker_processes(tmp_path, valid_batch_transactions, model_manager):
+    """Test CSV input scored in a process pool matches the model called directly"""
+    from src.core.preprocessing import TransactionPreprocessor
+    rows = ["transaction_id,amount,timestamp," + ",".join(f"V{i}" for i in range(1, 29))]
+    for tx in valid_batch_transactions:
+        rows.append(",".join([tx["transaction_id"], str(tx["amount"]), tx["timestamp"]]
+                             + [str(tx["features"][f"V{i}"]) for i in range(1, 29)]))
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("\n".join(rows) + "\n")
+    output = tmp_path / "scores.csv"
+
+    score.run(input_path, output, workers=1, chunk_size=2)
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == "transaction_id,fraud_probability,is_fraud,error"
+    expected = model_manager.batch_predict(
+        TransactionPreprocessor(model_manager).preprocess_batch(valid_batch_transactions)
+    )
+    probabilities = [float(line.split(",")[1]) for line in lines[1:]]
+    assert probabilities == pytest.approx(expected.tolist(), abs=1e-12)
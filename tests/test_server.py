@@ -0,0 +1,65 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+from src.server import MAX_STARTUP_FAILURES, cpu_assignments
+from tests.benchmarks.bench_startup import free_port
+
+
+def test_cpu_assignments():
+    """Test workers are pinned in turn to the listed or available CPUs"""
+    assert cpu_assignments("none", 3) is None
+    assert cpu_assignments("0,2", 3) == [0, 2, 0]
+    available = sorted(os.sched_getaffinity(0))
+    assert cpu_assignments("auto", 2) == [available[0], available[1 % len(available)]]
+
+
+def test_prefork_workers_share_socket_and_metrics(tmp_path, valid_single_transaction, cleanup_prediction):
+    """Test forked workers serve predictions, report metrics together and stop on SIGTERM"""
+    port = free_port()
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            deadline = time.monotonic() + 60
+            metrics = ""
+            while metrics.count("\nstartup_seconds{") < 2:
+                assert time.monotonic() < deadline, "Workers did not become ready"
+                time.sleep(0.2)
+                try:
+                    metrics = client.get("/metrics").text
+                except httpx.TransportError:
+                    pass
+
+            response = client.post("/api/v1/transactions", json=valid_single_transaction)
+            assert response.status_code == 201
+            metrics = client.get("/metrics").text
+            assert "model_predictions_total{" in metrics
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+
+
+def test_prefork_gives_up_on_workers_failing_to_start(tmp_path):
+    """Test a worker that cannot start is logged with its traceback and stops the server"""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    server = subprocess.run(
+        [sys.executable, "-m", "src.server", "--host", "127.0.0.1", "--port", str(free_port()), "--workers", "1",
+         "--cpu-affinity", "99999"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=120
+    )
+    assert server.returncode == 1
+    assert server.stderr.count("Worker 0 (pid") == MAX_STARTUP_FAILURES
+    assert "sched_setaffinity" in server.stderr
+    assert "shutting down" in server.stderr
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.db.crud import PredictionCRUD
+from src.db.database import to_async_url
+from src.db.write_behind import PredictionWriteBehind
+from tests.test_crud import make_record
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_in_batches_and_drains_on_stop(sqlite_file_url):
+    """Test queued predictions stay visible until written and are all written on stop"""
+    async_engine = create_async_engine(to_async_url(sqlite_file_url))
+    queue = PredictionWriteBehind(
+        max_queue_size=4,
+        batch_size=3,
+        flush_interval=60,  # Only size and shutdown trigger a flush
+        session_factory=async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    )
+    await queue.start()
+
+    created, conflicts = await queue.enqueue_many([make_record(f"wb_{i}") for i in range(7)])
+    assert len(created) == 7 and conflicts == []
+    assert queue.get_pending("wb_6").created_at is not None
+
+    with pytest.raises(ValueError):
+        await queue.enqueue(**make_record("wb_6"))
+
+    await queue.stop()
+    await async_engine.dispose()
+
+    db = sessionmaker(bind=create_engine(sqlite_file_url))()
+    crud = PredictionCRUD(db=db)
+    assert crud.get_prediction_count() == 7
+    assert queue.get_pending("wb_6") is None
+    assert crud.get_prediction("wb_6") is not None
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_requires_running_flusher():
+    """Test records are not silently queued when nothing would write them"""
+    queue = PredictionWriteBehind()
+    with pytest.raises(RuntimeError):
+        await queue.enqueue(**make_record("wb_not_running"))